@@ -1,15 +1,69 @@
 """
 blockchain.py
 
+Requires: clock.py, ledger.py, ledger_writer.py
+
 Simulates the invocation of a blockchain smart contract for ZKP-OTP verification and logs authentication events
 
 - Anonymizes vehicle IDs using hashing before logging
-- Simulates a smart contract call and logs the event with vehicle hash, timestamp, and authentication status
+- Simulates a smart contract call and records the event with vehicle hash, timestamp, and authentication status
+  into the ledger (ledger.py), which commits events in Merkle-rooted blocks per RSU instead of one by one
+- Stamps each event with the time it was recorded, read from the pluggable clock in clock.py
+- Prints events only in debug mode, so logging stays off the console at scale
+- Answers indexed queries over the logged events: a vehicle's history and failed authentications in a time window
+- Serves Merkle inclusion proofs of logged events, so auditors and vehicles can check an event against a block
+  root they trust without the full log (verify_inclusion_proof needs only the proof and that root or block hash)
+- submit_blockchain_verification() logs through a write-behind queue (ledger_writer.py) instead, so the RSU's
+  access decision does not wait for block commits or console output; ledger_writer_stats() reports its backpressure
 - Returns the outcome to mimic infrastructure access control
 """
 
+import atexit
 import hashlib
 
+from clock import now
+from ledger import AuthEvent, get_ledger, proof_digest, verify_inclusion_proof
+from ledger_writer import LedgerWriter, set_debug_mode as set_writer_debug_mode
+
+DEBUG_MODE = False
+
+DEFAULT_RSU_ID = "RSU"
+
+# Process-wide write-behind queue, started on first use
+_writer = None
+
+"""Enable or disable printing of every logged event"""
+def set_debug_mode(enabled):
+    global DEBUG_MODE
+    DEBUG_MODE = enabled
+    set_writer_debug_mode(enabled)
+
+"""Log entry of an event, as printed and returned by the queries"""
+def _log_entry(event):
+    
+    return {
+        "vehicle_hash": event.vehicle_hash.hex(),
+        "timestamp": event.timestamp,
+        "recorded_at": event.recorded_at,
+        "authenticated": event.authenticated
+    }
+
+"""Print a logged event in debug mode"""
+def _print_event(event):
+    
+    if DEBUG_MODE:
+        
+        log_entry = _log_entry(event)
+        print(f"[Blockchain] Verifying ZKP-OTP proof for anonymized vehicle ID: {log_entry['vehicle_hash'][:10]}...\n")
+        print(f"[Blockchain] Event logged: {log_entry}\n")
+
+"""Build the event logged for an RSU verification, stamped with the current time"""
+def _auth_event(vehicle_id, zkp_proof, timestamp, verification_result, rsu_id):
+    
+    vehicle_hash = hashlib.sha256(vehicle_id.encode()).digest()
+    
+    return AuthEvent(rsu_id, vehicle_hash, int(timestamp), int(now()), bool(verification_result), proof_digest(zkp_proof))
+
 """
 Simulate invoking a smart contract for ZKP-OTP verification and logging the event
 
@@ -18,29 +72,143 @@ vehicle_id (str): The unique identifier for the vehicle
 zkp_proof (str): The zero-knowledge proof generated by the vehicle
 timestamp (int): The timestamp associated with the OTP
 verification_result (bool): The result of RSU verification (True if authenticated)
+rsu_id (str): RSU that verified the proof, whose chain the event is committed to
+ledger (Ledger, optional): Ledger to record into (defaults to the process-wide ledger from ledger.py)
     
 Returns:
 bool: The outcome of the simulated blockchain verification (same as input verification_result)
 """
-def simulate_blockchain_verification(vehicle_id, zkp_proof, timestamp, verification_result):
+def simulate_blockchain_verification(vehicle_id, zkp_proof, timestamp, verification_result, rsu_id=DEFAULT_RSU_ID, ledger=None):
     
-    anonymized_id = hashlib.sha256(vehicle_id.encode()).hexdigest()[:10]
-    print(f"[Blockchain] Verifying ZKP-OTP proof for anonymized vehicle ID: {anonymized_id}...\n")
+    event = _auth_event(vehicle_id, zkp_proof, timestamp, verification_result, rsu_id)
     
-    log_entry = {
-        "vehicle_hash": hashlib.sha256(vehicle_id.encode()).hexdigest(),
-        "timestamp": timestamp,
-        "authenticated": verification_result
-    }
+    (get_ledger() if ledger is None else ledger).record(event)
+    _print_event(event)
+    
+    return verification_result
+
+
+"""
+Get the process-wide write-behind queue, starting it on first use
+- It records into the process-wide ledger, prints events in debug mode, and is drained when the interpreter exits
 
-    print(f"[Blockchain] Event logged: {log_entry}\n")
+Returns:
+LedgerWriter: The writer
+"""
+def get_ledger_writer():
+    global _writer
+    
+    if _writer is None or _writer.closed:
+        _writer = LedgerWriter(on_record=_print_event)
+        atexit.register(_writer.close)
+        
+    return _writer
+
+
+"""
+Log an RSU verification through a write-behind queue, without waiting for the ledger
+- The event is stamped now and recorded by the writer's worker thread; call flush_ledger_writer() before querying it
+
+Args:
+vehicle_id (str): The unique identifier for the vehicle
+zkp_proof (str): The zero-knowledge proof generated by the vehicle
+timestamp (int): The timestamp associated with the OTP
+verification_result (bool): The result of RSU verification (True if authenticated)
+rsu_id (str): RSU that verified the proof, whose chain the event is committed to
+writer (LedgerWriter, optional): Queue to submit to (defaults to the process-wide writer)
+
+Returns:
+bool: The outcome for access control (same as input verification_result, whether or not the event was queued)
+"""
+def submit_blockchain_verification(vehicle_id, zkp_proof, timestamp, verification_result, rsu_id=DEFAULT_RSU_ID, writer=None):
+    
+    event = _auth_event(vehicle_id, zkp_proof, timestamp, verification_result, rsu_id)
+    (get_ledger_writer() if writer is None else writer).submit(event)
     
     return verification_result
 
 
+"""Wait until every event submitted to the process-wide writer is in the ledger"""
+def flush_ledger_writer():
+    
+    if _writer is not None:
+        _writer.flush()
+
+
+"""Backpressure metrics of the process-wide writer (see LedgerWriter.stats), or None if it was never started"""
+def ledger_writer_stats():
+    
+    return _writer.stats() if _writer is not None else None
+
+
+"""
+Get the logged authentication history of a vehicle
+
+Args:
+vehicle_hash (str or bytes): Anonymized vehicle ID as logged (hex string or raw 32-byte SHA-256)
+start (int, optional): First recorded-at time included (Unix seconds)
+end (int, optional): First recorded-at time excluded
+ledger (Ledger, optional): Ledger to query (defaults to the process-wide ledger from ledger.py)
+
+Returns:
+list of dict: Log entries, oldest first
+"""
+def query_vehicle_history(vehicle_hash, start=None, end=None, ledger=None):
+    
+    if isinstance(vehicle_hash, str):
+        vehicle_hash = bytes.fromhex(vehicle_hash)
+        
+    ledger = get_ledger() if ledger is None else ledger
+    
+    with ledger.lock:
+        events = ledger.store.events(ledger.store.vehicle_history(vehicle_hash, start, end))
+        
+    return [_log_entry(event) for event in events]
+
+
+"""
+Get the failed authentications logged in the last few seconds
+
+Args:
+seconds (int): Length of the window ending now (default: the last 5 minutes)
+ledger (Ledger, optional): Ledger to query (defaults to the process-wide ledger from ledger.py)
+
+Returns:
+list of dict: Log entries, oldest first
+"""
+def query_failed_authentications(seconds=300, ledger=None):
+    
+    ledger = get_ledger() if ledger is None else ledger
+    
+    with ledger.lock:
+        events = ledger.store.events(ledger.store.failed(start=int(now()) - seconds))
+        
+    return [_log_entry(event) for event in events]
+
+
+"""
+Get the Merkle inclusion proof of a logged authentication event
+
+Args:
+vehicle_hash (str or bytes): Anonymized vehicle ID as logged (hex string or raw 32-byte SHA-256)
+timestamp (int): The timestamp associated with the OTP
+ledger (Ledger, optional): Ledger to query (defaults to the process-wide ledger from ledger.py)
+
+Returns:
+InclusionProof or None: The proof (check it with verify_inclusion_proof), or None if the event is not committed yet
+"""
+def get_inclusion_proof(vehicle_hash, timestamp, ledger=None):
+    
+    if isinstance(vehicle_hash, str):
+        vehicle_hash = bytes.fromhex(vehicle_hash)
+        
+    return (get_ledger() if ledger is None else ledger).inclusion_proof(vehicle_hash, int(timestamp))
+
+
 if __name__ == "__main__":
     
     # Simple test for blockchain verification simulation
+    set_debug_mode(True)
     vehicle_id = "TEST_VEHICLE"
     zkp_proof = "dummy_zkp_proof"
     timestamp = 1234567890
@@ -48,4 +216,18 @@ if __name__ == "__main__":
     result = simulate_blockchain_verification(vehicle_id, zkp_proof, timestamp, verification_result)
     
     print(f"[Blockchain] Simulated verification result: {result}")
+    block = get_ledger().flush()[0]
+    print(f"[Blockchain] Committed block root: {block.merkle_root.hex()}")
+    
+    proof = get_inclusion_proof(hashlib.sha256(vehicle_id.encode()).hexdigest(), timestamp)
+    print(f"[Blockchain] Inclusion proof verifies against the block root: {verify_inclusion_proof(proof, block.merkle_root)}")
+    
+    simulate_blockchain_verification(vehicle_id, zkp_proof, timestamp + 1, False)
+    print(f"[Blockchain] Failed authentications in the last 5 minutes: {query_failed_authentications()}")
+    print(f"[Blockchain] Vehicle history: {len(query_vehicle_history(hashlib.sha256(vehicle_id.encode()).hexdigest()))} events")
+    
+    submit_blockchain_verification(vehicle_id, zkp_proof, timestamp + 2, True)
+    flush_ledger_writer()
+    print(f"[Blockchain] Vehicle history after a write-behind submission: {len(query_vehicle_history(hashlib.sha256(vehicle_id.encode()).hexdigest()))} events")
+    print(f"[Blockchain] Write-behind queue: {ledger_writer_stats()}")
 
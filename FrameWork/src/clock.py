@@ -0,0 +1,130 @@
+"""
+clock.py
+
+Provides the clock that OTP generation, vehicles, RSUs and the blockchain simulation read the time from
+
+- SystemClock reads the wall clock and really sleeps
+- VirtualClock keeps its own time that only moves when it is told to, so sleeping is instant and a long
+  scenario can be replayed in seconds with identical timestamps on every run
+- The process-wide clock is a SystemClock until set_clock() installs another one
+"""
+
+import time
+
+
+"""
+SystemClock Class
+
+Wall-clock time (time.time) and real sleeping (time.sleep)
+"""
+class SystemClock:
+
+    """Current Unix time in seconds"""
+    def time(self):
+
+        return time.time()
+
+
+    """Block for the given number of seconds"""
+    def sleep(self, seconds):
+
+        time.sleep(seconds)
+
+
+"""
+VirtualClock Class
+
+Simulated time that advances only through sleep(), advance() or set()
+
+Usage:
+clock = VirtualClock(start=1700000000)
+set_clock(clock)
+clock.advance(3600)
+
+Args:
+start (float): Initial Unix time in seconds
+"""
+class VirtualClock:
+
+    def __init__(self, start=0.0):
+
+        self.now = float(start)
+
+
+    """Current virtual Unix time in seconds"""
+    def time(self):
+
+        return self.now
+
+
+    """Advance virtual time instead of blocking"""
+    def sleep(self, seconds):
+
+        self.advance(seconds)
+
+
+    """Move virtual time forward by the given number of seconds"""
+    def advance(self, seconds):
+
+        if seconds < 0:
+            raise ValueError("Virtual time cannot move backwards")
+
+        self.now += seconds
+
+
+    """Jump to a virtual Unix time, which must not lie in the past"""
+    def set(self, timestamp):
+
+        self.advance(timestamp - self.now)
+
+
+_clock = SystemClock()
+
+
+"""Get the process-wide clock"""
+def get_clock():
+
+    return _clock
+
+
+"""
+Install a process-wide clock
+
+Args:
+clock (SystemClock or VirtualClock): Any object with time() and sleep(seconds)
+
+Returns:
+The previously installed clock, so callers can restore it
+"""
+def set_clock(clock):
+    global _clock
+
+    previous = _clock
+    _clock = clock
+
+    return previous
+
+
+"""Current Unix time in seconds from the process-wide clock"""
+def now():
+
+    return _clock.time()
+
+
+"""Sleep on the process-wide clock (instant under a VirtualClock)"""
+def sleep(seconds):
+
+    _clock.sleep(seconds)
+
+
+if __name__ == "__main__":
+
+    # Simple test for the virtual clock: a day passes instantly
+    clock = VirtualClock(start=1700000000)
+    previous = set_clock(clock)
+    sleep(24 * 3600)
+
+    print(f"[Clock] Virtual time after sleeping a day: {now():.0f}")
+
+    set_clock(previous)
+    print(f"[Clock] System time: {now():.0f}")
@@ -0,0 +1,374 @@
+"""
+event_store.py
+
+Columnar, indexed store of authentication events, so the event log can be queried without scanning it
+
+- Events are kept column by column in compact arrays (32-byte hashes and digests in flat byte buffers, times in
+  64-bit integer arrays) rather than as one object per event, so tens of millions of events fit in memory
+- Events are appended in the order they are recorded, so the recorded-at column is sorted and a time range is two
+  binary searches; an event stamped earlier than its predecessor (a clock that stepped back) is filed under the
+  latest time seen so far
+- Secondary indexes map each vehicle hash and each authentication status to the sorted positions of its events, so
+  "history of vehicle X" and "failed auths in the last 5 minutes" are a dict lookup plus binary searches
+- Each event also remembers the block and leaf it was committed to, for inclusion proofs
+- delta() cuts the columns of the events appended since a position, and extend() appends such a delta and indexes
+  it, so a snapshot only has to store what is new since the previous one
+"""
+
+import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+HASH_BYTES = 32
+UNCOMMITTED = -1
+
+# Per-event columns and the bytes (or items) each event takes in them, as cut by delta()
+COLUMNS = (
+    ("_rsus", 1), ("_vehicle_hashes", HASH_BYTES), ("_timestamps", 1), ("_times", 1), ("_authenticated", 1),
+    ("_proof_digests", HASH_BYTES), ("_heights", 1), ("_leaf_indexes", 1)
+)
+
+"""
+Authentication event as committed to the ledger
+
+Fields:
+rsu_id (str): RSU that verified the request
+vehicle_hash (bytes): SHA-256 of the vehicle ID (32 bytes)
+timestamp (int): OTP timestamp of the request
+recorded_at (int): Unix time the event was recorded
+authenticated (bool): Verification result
+proof_digest (bytes): SHA-256 of the submitted proof (32 bytes)
+"""
+AuthEvent = namedtuple("AuthEvent", ("rsu_id", "vehicle_hash", "timestamp", "recorded_at", "authenticated", "proof_digest"))
+
+
+"""
+EventStore Class
+
+Append-only event log with indexes on time, vehicle hash and authentication status
+- Queries return event positions (cheap to produce); events() turns positions into AuthEvent tuples
+
+Usage:
+store = EventStore()
+store.append(event)
+failed = store.events(store.by_status(False, start=now() - 300))
+history = store.events(store.vehicle_history(vehicle_hash))
+"""
+class EventStore:
+
+    def __init__(self):
+
+        self.rsu_ids = []
+        self._rsu_codes = {}
+        self._rsus = array.array("i")
+        self._vehicle_hashes = bytearray()
+        self._timestamps = array.array("q")
+        self._times = array.array("q")
+        self._authenticated = bytearray()
+        self._proof_digests = bytearray()
+        self._heights = array.array("q")
+        self._leaf_indexes = array.array("q")
+
+        # Positions whose recorded-at time differs from their (clamped) index time
+        self._recorded_exceptions = {}
+
+        # vehicle_hash -> positions, and authenticated -> positions, each in append order
+        self._by_vehicle = {}
+        self._by_status = {True: array.array("q"), False: array.array("q")}
+
+
+    def __len__(self):
+
+        return len(self._times)
+
+
+    """Snapshot state: the vehicle index is flattened into three buffers instead of one array object per vehicle"""
+    def __getstate__(self):
+
+        state = dict(self.__dict__)
+        counts = array.array("q", map(len, self._by_vehicle.values()))
+        positions = array.array("q")
+
+        for vehicle_positions in self._by_vehicle.values():
+            positions.extend(vehicle_positions)
+
+        state["_by_vehicle"] = (b"".join(self._by_vehicle), counts, positions)
+
+        return state
+
+
+    def __setstate__(self, state):
+
+        hashes, counts, positions = state["_by_vehicle"]
+        by_vehicle = {}
+        offset = 0
+
+        for index, count in enumerate(counts):
+            by_vehicle[hashes[index * HASH_BYTES:(index + 1) * HASH_BYTES]] = positions[offset:offset + count]
+            offset += count
+
+        self.__dict__.update(state)
+        self._by_vehicle = by_vehicle
+
+
+    """
+    Cut the events from a position on, for an incremental snapshot
+    - Indexes are not included; extend() rebuilds their entries from the columns
+
+    Args:
+    start (int): First position included
+
+    Returns:
+    dict: Start position, RSU table and the column slices of the events from start on
+    """
+    def delta(self, start):
+
+        delta = {"start": start, "rsu_ids": list(self.rsu_ids)}
+
+        for column, width in COLUMNS:
+            delta[column] = getattr(self, column)[start * width:]
+
+        delta["_recorded_exceptions"] = {position: recorded for position, recorded in self._recorded_exceptions.items() if position >= start}
+
+        return delta
+
+
+    """
+    Append a delta cut by delta() and index its events
+
+    Args:
+    delta (dict): Delta starting at the current end of the store
+
+    Raises:
+    ValueError: If the delta does not start where the store ends
+    """
+    def extend(self, delta):
+
+        start = len(self._times)
+
+        if delta["start"] != start:
+            raise ValueError(f"Delta starts at position {delta['start']}, but the store holds {start} events")
+
+        self.rsu_ids = list(delta["rsu_ids"])
+        self._rsu_codes = {rsu_id: code for code, rsu_id in enumerate(self.rsu_ids)}
+
+        for column, _width in COLUMNS:
+            getattr(self, column).extend(delta[column])
+
+        self._recorded_exceptions.update(delta["_recorded_exceptions"])
+
+        for position in range(start, len(self._times)):
+
+            offset = position * HASH_BYTES
+            vehicle_hash = bytes(self._vehicle_hashes[offset:offset + HASH_BYTES])
+            positions = self._by_vehicle.get(vehicle_hash)
+
+            if positions is None:
+                positions = self._by_vehicle[vehicle_hash] = array.array("q")
+
+            positions.append(position)
+            self._by_status[bool(self._authenticated[position])].append(position)
+
+
+    """
+    Append an event and index it
+
+    Args:
+    event (AuthEvent): The event
+
+    Returns:
+    int: Position of the event in the store
+    """
+    def append(self, event):
+
+        position = len(self._times)
+        code = self._rsu_codes.get(event.rsu_id)
+
+        if code is None:
+            code = self._rsu_codes[event.rsu_id] = len(self.rsu_ids)
+            self.rsu_ids.append(event.rsu_id)
+
+        recorded_at = int(event.recorded_at)
+        time = recorded_at
+
+        if self._times and recorded_at < self._times[-1]:
+            time = self._times[-1]
+            self._recorded_exceptions[position] = recorded_at
+
+        self._rsus.append(code)
+        self._vehicle_hashes += event.vehicle_hash
+        self._timestamps.append(int(event.timestamp))
+        self._times.append(time)
+        self._authenticated.append(bool(event.authenticated))
+        self._proof_digests += event.proof_digest
+        self._heights.append(UNCOMMITTED)
+        self._leaf_indexes.append(UNCOMMITTED)
+
+        positions = self._by_vehicle.get(event.vehicle_hash)
+
+        if positions is None:
+            positions = self._by_vehicle[event.vehicle_hash] = array.array("q")
+
+        positions.append(position)
+        self._by_status[bool(event.authenticated)].append(position)
+
+        return position
+
+
+    """Rebuild the event at a position"""
+    def event(self, position):
+
+        offset = position * HASH_BYTES
+
+        return AuthEvent(
+            self.rsu_ids[self._rsus[position]],
+            bytes(self._vehicle_hashes[offset:offset + HASH_BYTES]),
+            self._timestamps[position],
+            self._recorded_exceptions.get(position, self._times[position]),
+            bool(self._authenticated[position]),
+            bytes(self._proof_digests[offset:offset + HASH_BYTES])
+        )
+
+
+    """Rebuild the events at several positions"""
+    def events(self, positions):
+
+        return [self.event(position) for position in positions]
+
+
+    """OTP timestamp of the event at a position"""
+    def timestamp(self, position):
+
+        return self._timestamps[position]
+
+
+    """Record the block height and leaf index an event was committed to"""
+    def set_location(self, position, height, leaf_index):
+
+        self._heights[position] = height
+        self._leaf_indexes[position] = leaf_index
+
+
+    """
+    Look up where an event was committed
+
+    Returns:
+    tuple or None: (rsu_id, block height, leaf index), or None while the event is still pending
+    """
+    def location(self, position):
+
+        height = self._heights[position]
+
+        if height == UNCOMMITTED:
+            return None
+
+        return self.rsu_ids[self._rsus[position]], height, self._leaf_indexes[position]
+
+
+    """
+    Positions of the events recorded in a time range
+
+    Args:
+    start (int, optional): First recorded-at time included (Unix seconds)
+    end (int, optional): First recorded-at time excluded
+
+    Returns:
+    range: Event positions, oldest first
+    """
+    def time_range(self, start=None, end=None):
+
+        low = 0 if start is None else bisect_left(self._times, start)
+        high = len(self._times) if end is None else bisect_left(self._times, end)
+
+        return range(low, max(low, high))
+
+
+    """Slice a sorted position array down to the positions of a time range"""
+    def _within(self, positions, start, end):
+
+        if start is None and end is None:
+            return positions[:]
+
+        window = self.time_range(start, end)
+
+        return positions[bisect_left(positions, window.start):bisect_right(positions, window.stop - 1)]
+
+
+    """
+    Positions of a vehicle's events
+
+    Args:
+    vehicle_hash (bytes): SHA-256 of the vehicle ID
+    start (int, optional): First recorded-at time included
+    end (int, optional): First recorded-at time excluded
+
+    Returns:
+    array of int: Event positions, oldest first
+    """
+    def vehicle_history(self, vehicle_hash, start=None, end=None):
+
+        positions = self._by_vehicle.get(vehicle_hash)
+
+        if positions is None:
+            return array.array("q")
+
+        return self._within(positions, start, end)
+
+
+    """
+    Positions of the events with an authentication status
+
+    Args:
+    authenticated (bool): False for failed authentications, True for successful ones
+    start (int, optional): First recorded-at time included
+    end (int, optional): First recorded-at time excluded
+
+    Returns:
+    array of int: Event positions, oldest first
+    """
+    def by_status(self, authenticated, start=None, end=None):
+
+        return self._within(self._by_status[bool(authenticated)], start, end)
+
+
+    """Positions of failed authentications in a time range (see by_status)"""
+    def failed(self, start=None, end=None):
+
+        return self.by_status(False, start, end)
+
+
+if __name__ == "__main__":
+
+    # Simple test for the event store: queries over two million events
+    import hashlib
+    import os
+    import time
+
+    vehicles = [hashlib.sha256(f"VEH{i}".encode()).digest() for i in range(100000)]
+    digest = os.urandom(32)
+    store = EventStore()
+
+    start = time.perf_counter()
+
+    # 1000 events per second for about 33 minutes, one in fifty failing
+    for i in range(2000000):
+        store.append(AuthEvent(f"RSU{i % 8}", vehicles[i % len(vehicles)], 1700000000 + i // 1000, 1700000000 + i // 1000, i % 50 != 0, digest))
+
+    print(f"[Event Store] Indexed {len(store)} events in {time.perf_counter() - start:.2f}s")
+
+    latest = 1700000000 + 2000000 // 1000
+
+    for name, query in (
+        ("Failed auths in the last 5 minutes", lambda: store.failed(start=latest - 300)),
+        ("History of one vehicle", lambda: store.vehicle_history(vehicles[4242])),
+        ("Events in one minute", lambda: store.time_range(latest - 600, latest - 540))
+    ):
+
+        query_start = time.perf_counter()
+
+        for _ in range(1000):
+            positions = query()
+
+        print(f"[Event Store] {name}: {len(positions)} events in {(time.perf_counter() - query_start) / 1000 * 1e6:.1f}us")
+
+    print(f"[Event Store] Latest failed event: {store.event(store.failed()[-1])}")
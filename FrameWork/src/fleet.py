@@ -0,0 +1,351 @@
+"""
+fleet.py
+
+Requires: otp.py, otp_bulk.py, zkp.py
+
+Defines the Fleet class, a compact container for very large simulated fleets
+
+- Vehicle IDs and 32-byte secrets live in two contiguous buffers instead of one Vehicle object per car,
+  so a million vehicles take about 48 MB
+- Vehicles are sorted by ID, so a fleet can be looked up by vehicle ID and passed to an RSU as its secrets mapping
+- FleetVehicle is a __slots__ view onto one fleet entry with the same methods as Vehicle, created only on access
+- generate_otps() and create_proofs() work on the whole fleet at once through otp_bulk.py, writing raw digests into
+  preallocated buffers; close() (or a with block) stops the worker processes large fleets use
+"""
+
+import os
+
+from otp import generate_otp_at, current_timestamp, time_step, step_timestamp
+from otp_bulk import BulkOtpGenerator, DIGEST_BYTES, SECRET_BYTES, fill_proofs
+from zkp import generate_zkp_proof
+
+ID_BYTES = 16
+
+
+"""
+Read one digest out of a bulk output buffer
+
+Args:
+buffer (bytearray): Buffer filled by Fleet.generate_otps or Fleet.create_proofs
+index (int): Vehicle index
+
+Returns:
+str: The digest as a hex string, as returned by the per-vehicle functions
+"""
+def digest_hex(buffer, index):
+
+    return bytes(buffer[index * DIGEST_BYTES:(index + 1) * DIGEST_BYTES]).hex()
+
+
+"""
+FleetVehicle Class
+
+Lightweight view of one vehicle in a Fleet, interchangeable with Vehicle for simulated proofs
+
+Args:
+fleet (Fleet): The fleet the vehicle belongs to
+index (int): Position of the vehicle in the fleet
+"""
+class FleetVehicle:
+
+    __slots__ = ("fleet", "index")
+
+    def __init__(self, fleet, index):
+
+        self.fleet = fleet
+        self.index = index
+
+
+    @property
+    def vehicle_id(self):
+
+        return self.fleet.vehicle_id(self.index)
+
+
+    @property
+    def secret(self):
+
+        return self.fleet.secret(self.index)
+
+
+    """
+    Generate a one-time password (OTP) using the vehicle's secret and current timestamp
+
+    Returns:
+    tuple: (otp (str), timestamp (int))
+    """
+    def generate_otp(self):
+
+        timestamp = step_timestamp(time_step(current_timestamp()))
+
+        return generate_otp_at(self.secret, timestamp), timestamp
+
+
+    """
+    Create a simulated zero-knowledge proof (ZKP) for the OTP and timestamp
+
+    Args:
+    otp (str): The OTP to prove knowledge of
+    timestamp (int): The timestamp used for OTP
+
+    Returns:
+    str: The ZKP proof
+    """
+    def create_zkp(self, otp, timestamp):
+
+        return generate_zkp_proof(otp, timestamp)
+
+
+"""
+Fleet Class
+
+Array-backed collection of vehicles
+- Entry i has its null-padded ID at ids[i * ID_BYTES] and its raw secret at secrets[i * SECRET_BYTES]
+- A vehicle's secret string (as used by otp.py and the RSU) is the hex encoding of its raw secret
+- Entries are kept sorted by ID, so get() is a binary search rather than a dict lookup
+
+Usage:
+fleet = Fleet.generate(1000000)
+otps, timestamp = fleet.generate_otps()
+proofs = fleet.create_proofs(otps, timestamp)
+rsu = RSU(fleet)
+
+Args:
+ids (bytes-like): Sorted, null-padded vehicle IDs, ID_BYTES each
+secrets (bytes-like): Raw vehicle secrets, SECRET_BYTES each, in the same order
+"""
+class Fleet:
+
+    def __init__(self, ids, secrets):
+
+        if len(ids) % ID_BYTES or len(secrets) != len(ids) // ID_BYTES * SECRET_BYTES:
+            raise ValueError("Fleet ID and secret buffers do not describe the same number of vehicles")
+
+        self.ids = bytes(ids)
+        self.secrets = bytes(secrets)
+        self.count = len(ids) // ID_BYTES
+        self._generator = None
+
+
+    """
+    Create a fleet of vehicles with sequential IDs and random secrets
+
+    Args:
+    count (int): Number of vehicles
+    prefix (str): Vehicle ID prefix
+
+    Returns:
+    Fleet: The new fleet, with IDs like VEH0000001 zero-padded so they sort in index order
+    """
+    @classmethod
+    def generate(cls, count, prefix="VEH"):
+
+        width = len(str(max(count - 1, 0)))
+
+        if len(prefix) + width > ID_BYTES:
+            raise ValueError(f"Vehicle IDs do not fit in {ID_BYTES} bytes")
+
+        ids = b"".join(f"{prefix}{i:0{width}d}".encode().ljust(ID_BYTES, b"\0") for i in range(count))
+
+        return cls(ids, os.urandom(count * SECRET_BYTES))
+
+
+    """
+    Create a fleet from existing vehicle IDs and secrets
+
+    Args:
+    items (iterable of tuple): (vehicle_id, secret) pairs, where each secret is the hex encoding of SECRET_BYTES bytes
+
+    Returns:
+    Fleet: The new fleet
+    """
+    @classmethod
+    def from_items(cls, items):
+
+        entries = []
+
+        for vehicle_id, secret in items:
+
+            raw_id = vehicle_id.encode()
+            raw_secret = bytes.fromhex(secret)
+
+            if len(raw_id) > ID_BYTES or len(raw_secret) != SECRET_BYTES:
+                raise ValueError(f"Vehicle {vehicle_id!r} does not fit a fleet entry")
+
+            entries.append((raw_id.ljust(ID_BYTES, b"\0"), raw_secret))
+
+        entries.sort()
+
+        return cls(b"".join(raw_id for raw_id, _secret in entries), b"".join(secret for _id, secret in entries))
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+    def __len__(self):
+
+        return self.count
+
+
+    def __getitem__(self, index):
+
+        if not -self.count <= index < self.count:
+            raise IndexError("Fleet index out of range")
+
+        return FleetVehicle(self, index % self.count)
+
+
+    def __iter__(self):
+
+        return (FleetVehicle(self, index) for index in range(self.count))
+
+
+    """Vehicle ID of entry index"""
+    def vehicle_id(self, index):
+
+        return self.ids[index * ID_BYTES:(index + 1) * ID_BYTES].rstrip(b"\0").decode()
+
+
+    """Secret string of entry index (hex of the raw secret)"""
+    def secret(self, index):
+
+        return self.secrets[index * SECRET_BYTES:(index + 1) * SECRET_BYTES].hex()
+
+
+    """
+    Find the entry of a vehicle
+
+    Args:
+    vehicle_id (str): The vehicle's unique identifier
+
+    Returns:
+    int or None: The entry index, or None if the vehicle is not in the fleet
+    """
+    def index_of(self, vehicle_id):
+
+        key = vehicle_id.encode()
+
+        if len(key) > ID_BYTES:
+            return None
+
+        key = key.ljust(ID_BYTES, b"\0")
+        low, high = 0, self.count
+
+        while low < high:
+
+            middle = (low + high) // 2
+            entry = self.ids[middle * ID_BYTES:(middle + 1) * ID_BYTES]
+
+            if entry < key:
+                low = middle + 1
+
+            elif entry > key:
+                high = middle
+
+            else:
+                return middle
+
+        return None
+
+
+    """Look up a vehicle's secret, so a fleet can stand in for an RSU's vehicle_secrets mapping"""
+    def get(self, vehicle_id, default=None):
+
+        index = self.index_of(vehicle_id)
+
+        return default if index is None else self.secret(index)
+
+
+    """Allocate or check an output buffer with one digest per vehicle"""
+    def _output_buffer(self, out):
+
+        if out is None:
+            return bytearray(self.count * DIGEST_BYTES)
+
+        if len(out) != self.count * DIGEST_BYTES:
+            raise ValueError(f"Output buffer must hold {self.count} digests of {DIGEST_BYTES} bytes")
+
+        return out
+
+
+    """
+    Generate the OTP of every vehicle for one time step through the fleet's BulkOtpGenerator (otp_bulk.py), which
+    keeps each vehicle's prefix state between time steps and splits large fleets across worker processes
+
+    Args:
+    timestamp (int, optional): Start of the time step (defaults to the current step)
+    out (bytearray, optional): Preallocated buffer of len(fleet) * DIGEST_BYTES bytes to write into
+
+    Returns:
+    tuple: (otps (bytearray) with the raw OTP digest of vehicle i at i * DIGEST_BYTES, timestamp (int))
+    """
+    def generate_otps(self, timestamp=None, out=None):
+
+        if timestamp is None:
+            timestamp = step_timestamp(time_step(current_timestamp()))
+
+        if self._generator is None:
+            self._generator = BulkOtpGenerator(self.secrets)
+
+        otps, _proofs = self._generator.generate(timestamp, otps_out=self._output_buffer(out), with_proofs=False)
+
+        return otps, timestamp
+
+
+    """
+    Create the simulated ZKP of every vehicle from bulk OTPs
+
+    Args:
+    otps (bytearray): Buffer returned by generate_otps
+    timestamp (int): The timestamp the OTPs were generated for
+    out (bytearray, optional): Preallocated buffer of len(fleet) * DIGEST_BYTES bytes to write into
+
+    Returns:
+    bytearray: Raw proof digest of vehicle i at i * DIGEST_BYTES (see digest_hex)
+    """
+    def create_proofs(self, otps, timestamp, out=None):
+
+        out = self._output_buffer(out)
+        fill_proofs(otps, timestamp, out)
+
+        return out
+
+
+    """Shut down the bulk generator's worker processes and free its shared memory"""
+    def close(self):
+
+        if self._generator is not None:
+            self._generator.close()
+            self._generator = None
+
+
+if __name__ == "__main__":
+
+    # Simple test for the fleet: bulk OTPs and proofs match the per-vehicle functions
+    import time
+    import tracemalloc
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    fleet = Fleet.generate(100000)
+    otps, timestamp = fleet.generate_otps()
+    proofs = fleet.create_proofs(otps, timestamp)
+    elapsed = time.perf_counter() - start
+    fleet.close()
+    _current, peak = tracemalloc.get_traced_memory()
+
+    print(f"[Fleet] {len(fleet)} vehicles: OTPs and proofs in {elapsed:.3f}s, peak memory {peak / 1e6:.1f} MB")
+
+    vehicle = fleet[12345]
+    otp_value = generate_otp_at(vehicle.secret, timestamp)
+
+    print(f"[Fleet] Vehicle {vehicle.vehicle_id} matches per-call OTP: {digest_hex(otps, 12345) == otp_value}")
+    print(f"[Fleet] Vehicle {vehicle.vehicle_id} matches per-call proof: {digest_hex(proofs, 12345) == vehicle.create_zkp(otp_value, timestamp)}")
+    print(f"[Fleet] Lookup by ID: {fleet.get(vehicle.vehicle_id) == vehicle.secret}")
@@ -0,0 +1,269 @@
+"""
+keystore.py
+
+On-disk store of vehicle secrets for RSUs serving very large fleets, usable in place of the vehicle_secrets dict
+
+- Secrets are kept as fixed-width binary records (vehicle ID, secret length, secret), so any record can be
+  located by offset without parsing the file
+- Records are split into shards by a prefix of the hash of the vehicle ID, and sorted by ID within each shard,
+  so a lookup is a binary search over one shard
+- Opening a store only reads its small metadata file; shards are memory-mapped on first use, so startup is
+  constant time and only pages holding looked-up vehicles become resident
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+ID_BYTES = 32
+SECRET_BYTES = 64
+RECORD_FORMAT = f"{ID_BYTES}sB{SECRET_BYTES}s"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+DEFAULT_SHARD_BITS = 8
+METADATA_FILE = "keystore.json"
+
+
+"""
+Encode a vehicle ID as a fixed-width record key
+
+Args:
+vehicle_id (str): The vehicle's unique identifier
+
+Returns:
+bytes or None: The null-padded ID, or None if it does not fit in ID_BYTES
+"""
+def _encode_id(vehicle_id):
+
+    raw = vehicle_id.encode()
+
+    if len(raw) > ID_BYTES:
+        return None
+
+    return raw.ljust(ID_BYTES, b"\0")
+
+
+"""Shard index of a vehicle ID: the top shard_bits bits of its hash"""
+def _shard_index(vehicle_id, shard_bits):
+
+    if shard_bits == 0:
+        return 0
+
+    digest = hashlib.blake2b(vehicle_id.encode(), digest_size=2).digest()
+
+    return int.from_bytes(digest, "big") >> (16 - shard_bits)
+
+
+"""Path of a shard file"""
+def _shard_path(directory, index):
+
+    return os.path.join(directory, f"shard-{index:04x}.bin")
+
+
+"""
+Write a keystore directory from vehicle secrets
+
+Args:
+directory (str): Directory to write the store to (created if missing)
+items (iterable of tuple): (vehicle_id, secret) pairs, e.g. vehicle_secrets.items()
+shard_bits (int): The store is split into 2 ** shard_bits shards (at most 16 bits)
+
+Returns:
+KeyStore: The opened store
+"""
+def build_keystore(directory, items, shard_bits=DEFAULT_SHARD_BITS):
+
+    if not 0 <= shard_bits <= 16:
+        raise ValueError("shard_bits must be between 0 and 16")
+
+    os.makedirs(directory, exist_ok=True)
+    shards = [[] for _ in range(1 << shard_bits)]
+
+    for vehicle_id, secret in items:
+
+        key = _encode_id(vehicle_id)
+        raw_secret = secret.encode()
+
+        if key is None or len(raw_secret) > SECRET_BYTES:
+            raise ValueError(f"Vehicle {vehicle_id!r} does not fit a {RECORD_SIZE}-byte keystore record")
+
+        shards[_shard_index(vehicle_id, shard_bits)].append(struct.pack(RECORD_FORMAT, key, len(raw_secret), raw_secret))
+
+    count = 0
+
+    for index, records in enumerate(shards):
+
+        # Records start with the padded ID, so sorting the packed bytes sorts by ID
+        records.sort()
+        count += len(records)
+
+        with open(_shard_path(directory, index), "wb") as shard_file:
+            shard_file.write(b"".join(records))
+
+    metadata = {"record_format": RECORD_FORMAT, "shard_bits": shard_bits, "count": count}
+
+    with open(os.path.join(directory, METADATA_FILE), "w") as metadata_file:
+        json.dump(metadata, metadata_file)
+
+    return KeyStore(directory)
+
+
+"""
+KeyStore Class
+
+Read-only, memory-mapped mapping from vehicle ID to secret
+- Behaves like the vehicle_secrets dict for lookups (get, [], in, len), so an RSU can take it instead
+- Each shard is memory-mapped the first time one of its vehicles is looked up
+- Secrets that have been looked up are kept in a small dict, so repeat visitors skip the binary search
+
+Usage:
+keystore = KeyStore("fleet_keys")
+rsu = RSU(keystore)
+
+Args:
+directory (str): Directory written by build_keystore
+"""
+class KeyStore:
+
+    def __init__(self, directory):
+
+        with open(os.path.join(directory, METADATA_FILE)) as metadata_file:
+            metadata = json.load(metadata_file)
+
+        if metadata["record_format"] != RECORD_FORMAT:
+            raise ValueError(f"Keystore {directory} uses record format {metadata['record_format']}, expected {RECORD_FORMAT}")
+
+        self.directory = directory
+        self.shard_bits = metadata["shard_bits"]
+        self.count = metadata["count"]
+        self._shards = {}
+        self._seen = {}
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+    """Unmap all shards"""
+    def close(self):
+
+        for shard in self._shards.values():
+
+            if shard is not None:
+                shard.close()
+
+        self._shards.clear()
+
+
+    """Memory-map a shard on first use (None for an empty shard)"""
+    def _shard(self, index):
+
+        if index not in self._shards:
+
+            with open(_shard_path(self.directory, index), "rb") as shard_file:
+
+                if os.fstat(shard_file.fileno()).st_size == 0:
+                    self._shards[index] = None
+
+                else:
+                    self._shards[index] = mmap.mmap(shard_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._shards[index]
+
+
+    """
+    Look up a vehicle's secret
+
+    Args:
+    vehicle_id (str): The vehicle's unique identifier
+    default: Value returned when the vehicle is unknown
+
+    Returns:
+    str: The vehicle's secret, or default if the vehicle is not in the store
+    """
+    def get(self, vehicle_id, default=None):
+
+        secret = self._seen.get(vehicle_id)
+
+        if secret is not None:
+            return secret
+
+        key = _encode_id(vehicle_id)
+        shard = self._shard(_shard_index(vehicle_id, self.shard_bits)) if key is not None else None
+
+        if shard is None:
+            return default
+
+        low, high = 0, len(shard) // RECORD_SIZE
+
+        while low < high:
+
+            middle = (low + high) // 2
+            offset = middle * RECORD_SIZE
+            record_id = shard[offset:offset + ID_BYTES]
+
+            if record_id < key:
+                low = middle + 1
+
+            elif record_id > key:
+                high = middle
+
+            else:
+                _id, length, raw_secret = struct.unpack_from(RECORD_FORMAT, shard, offset)
+                secret = self._seen[vehicle_id] = raw_secret[:length].decode()
+                return secret
+
+        return default
+
+
+    def __getitem__(self, vehicle_id):
+
+        secret = self.get(vehicle_id)
+
+        if secret is None:
+            raise KeyError(vehicle_id)
+
+        return secret
+
+
+    def __contains__(self, vehicle_id):
+
+        return self.get(vehicle_id) is not None
+
+
+    def __len__(self):
+
+        return self.count
+
+
+if __name__ == "__main__":
+
+    # Simple test for the keystore: build a store for 100k vehicles, reopen it and look a few up
+    import secrets
+    import tempfile
+    import time
+
+    vehicle_secrets = {f"VEH{i:07d}": secrets.token_hex(16) for i in range(100000)}
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        start = time.perf_counter()
+        build_keystore(directory, vehicle_secrets.items()).close()
+        print(f"[KeyStore] Built {len(vehicle_secrets)} records in {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        keystore = KeyStore(directory)
+        print(f"[KeyStore] Opened in {(time.perf_counter() - start) * 1000:.3f}ms")
+
+        lookups = ["VEH0000000", "VEH0054321", "VEH0099999", "UNKNOWN"]
+        print(f"[KeyStore] Lookups match: {[keystore.get(v) == vehicle_secrets.get(v) for v in lookups]}")
+        print(f"[KeyStore] Shards mapped: {len(keystore._shards)} of {1 << keystore.shard_bits}")
+
+        keystore.close()
@@ -0,0 +1,826 @@
+"""
+ledger.py
+
+Requires: clock.py, event_store.py, segment_log.py
+
+In-process ledger that batches authentication events into Merkle-rooted blocks, one chain per RSU
+
+- Each authentication event is a fixed-width record (vehicle hash, OTP timestamp, time recorded, result and
+  proof digest); its Merkle leaf is the SHA-256 of that record
+- Events wait in a per-RSU pending batch; the batch is committed as one block, holding only the Merkle root of its
+  events on chain, once it reaches block_size events or its oldest event has waited max_block_delay seconds
+- A batch is only checked for its delay when its RSU records another event, so owners of an idle ledger call
+  commit_due() (LedgerWriter does when its queue is idle, LedgerActor at next_due() on virtual time) or flush()
+- Blocks are chained per RSU through the hash of the previous block
+- Committed blocks keep only their header and their events' positions in the store; the events and Merkle tree
+  levels of recently proven blocks are rebuilt from the store into a bounded LRU (TreeCache), so an O(log n)
+  inclusion proof of any event (looked up by vehicle hash and timestamp) is read off cached levels while memory
+  stays at the compact store; verify_inclusion_proof() checks a proof without the ledger
+- Every recorded event is also appended to an indexed EventStore (event_store.py), so the log can be queried by
+  vehicle hash, time range and authentication status
+- stats() reports commit throughput, block sizes and how long events waited for their commit, so block size and
+  delay can be traded off against each other
+- A ledger opened on a directory (Ledger.open) appends every event and every block commit to a memory-mapped
+  segment log (segment_log.py) and snapshots its chains and indexes there, so a crashed run restarts from its
+  snapshots and replays only the records logged after the last one; replayed commit records rebuild the blocks
+  exactly as they were committed, so hashes and inclusion proofs issued before the crash stay valid
+- Snapshots are incremental: each holds only the store columns and blocks added since the previous snapshot, the
+  chain heads (checked on recovery) and the counters, so a snapshot costs O(events since the last one) and
+  snapshot_every stays linear over a run; recovery applies every snapshot in order
+- Each snapshot compacts the log, dropping segments that lie before the previous snapshot
+- The process-wide ledger that blockchain.py records into can be replaced with set_ledger()
+- Every Ledger method that touches its state holds the ledger's lock, so one ledger can be shared between threads
+"""
+
+import array
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from clock import now
+from event_store import AuthEvent, EventStore
+from segment_log import BlockCommit, SegmentLog, BLOCK_HASH_PREFIX, DEFAULT_SEGMENT_RECORDS
+
+# Vehicle hash, OTP timestamp, recorded-at time, authenticated flag, proof digest
+EVENT_FORMAT = ">32sqq?32s"
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+GENESIS_HASH = bytes(32)
+
+DEFAULT_BLOCK_SIZE = 256
+DEFAULT_MAX_BLOCK_DELAY = 1.0
+
+# Blocks whose rebuilt events and Merkle tree are kept for further inclusion proofs
+DEFAULT_TREE_CACHE_BLOCKS = 64
+
+# Ledger attributes stored in a snapshot
+SNAPSHOT_COUNTERS = ("events_committed", "blocks_committed", "commit_seconds", "total_commit_latency", "max_commit_latency")
+
+"""
+Digest a proof as submitted to the RSU
+
+Args:
+zkp_proof (str, bytes or dict): Simulated proof string or real ZoKrates proof
+
+Returns:
+bytes: SHA-256 of the proof (real proofs are serialized as sorted JSON first)
+"""
+def proof_digest(zkp_proof):
+
+    if isinstance(zkp_proof, dict):
+        zkp_proof = json.dumps(zkp_proof, sort_keys=True)
+
+    if isinstance(zkp_proof, str):
+        zkp_proof = zkp_proof.encode()
+
+    return hashlib.sha256(zkp_proof).digest()
+
+
+"""Merkle leaf of an event: the hash of its fixed-width record"""
+def event_leaf(event):
+
+    record = struct.pack(EVENT_FORMAT, event.vehicle_hash, event.timestamp, event.recorded_at, event.authenticated, event.proof_digest)
+
+    return hashlib.sha256(LEAF_PREFIX + record).digest()
+
+
+"""
+Build every level of a Merkle tree
+- Pairs are hashed with a node prefix distinct from the leaf prefix, so a leaf can never pass for an inner node
+- An odd node at the end of a level is carried up unchanged
+
+Args:
+leaves (list of bytes): Leaf hashes
+
+Returns:
+list of list of bytes: Levels from the leaves up to the single root (empty for no leaves)
+"""
+def merkle_levels(leaves):
+
+    if not leaves:
+        return []
+
+    levels = [list(leaves)]
+    sha256 = hashlib.sha256
+
+    while len(levels[-1]) > 1:
+
+        level = levels[-1]
+        parents = [sha256(NODE_PREFIX + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+
+        if len(level) % 2:
+            parents.append(level[-1])
+
+        levels.append(parents)
+
+    return levels
+
+
+"""
+Compute a Merkle root
+
+Args:
+leaves (list of bytes): Leaf hashes
+
+Returns:
+bytes: The root (EMPTY_ROOT for no leaves)
+"""
+def merkle_root(leaves):
+
+    levels = merkle_levels(leaves)
+
+    return levels[-1][0] if levels else EMPTY_ROOT
+
+
+"""Hash of a block header"""
+def block_hash(rsu_id, height, previous_hash, merkle_root, size, committed_at):
+
+    header = struct.pack(">32s32sQQd", previous_hash, merkle_root, height, size, committed_at)
+
+    return hashlib.sha256(header + rsu_id.encode()).digest()
+
+
+"""
+Merkle inclusion proof of one event, with the header fields of its block
+
+Fields:
+event (AuthEvent): The proven event
+index (int): Position of the event in its block
+path (tuple of tuple): (sibling hash (bytes), sibling is on the left (bool)) from the leaf level upwards
+rsu_id, height, previous_hash, merkle_root, size, committed_at: Header of the block holding the event
+"""
+InclusionProof = namedtuple(
+    "InclusionProof",
+    ("event", "index", "path", "rsu_id", "height", "previous_hash", "merkle_root", "size", "committed_at")
+)
+
+
+"""
+Verify a Merkle inclusion proof without access to the ledger
+- Recomputes the event's leaf and folds the path up to the root
+- The root or block hash must come from the auditor (e.g. a light client's header chain), never from the proof
+  itself, which anyone can build for any event
+- With a trusted block hash, the block header in the proof is checked too
+
+Args:
+proof (InclusionProof): Proof returned by Ledger.inclusion_proof
+trusted_root (bytes, optional): Merkle root the auditor trusts
+trusted_block_hash (bytes, optional): Hash of the block the auditor trusts
+
+Returns:
+bool: True if the event is included under the trusted root (and block hash)
+
+Raises:
+ValueError: If neither a trusted root nor a trusted block hash is given
+"""
+def verify_inclusion_proof(proof, trusted_root=None, trusted_block_hash=None):
+
+    if trusted_root is None and trusted_block_hash is None:
+        raise ValueError("A trusted Merkle root or block hash is required to verify an inclusion proof")
+
+    node = event_leaf(proof.event)
+
+    for sibling, sibling_is_left in proof.path:
+        node = hashlib.sha256(NODE_PREFIX + (sibling + node if sibling_is_left else node + sibling)).digest()
+
+    if node != proof.merkle_root or (trusted_root is not None and node != trusted_root):
+        return False
+
+    if trusted_block_hash is not None:
+
+        header_hash = block_hash(proof.rsu_id, proof.height, proof.previous_hash, proof.merkle_root, proof.size, proof.committed_at)
+
+        return header_hash == trusted_block_hash
+
+    return True
+
+
+"""
+Block Class
+
+One committed batch of an RSU's authentication events
+- A block that knows its events' positions in the ledger's EventStore drops its events and Merkle tree once its root
+  is computed; both are rebuilt from the store when a proof needs them (see TreeCache), so committed blocks cost a
+  header and eight bytes per event
+- A block without a store keeps its events and tree
+
+Args:
+rsu_id (str): RSU whose chain the block belongs to
+height (int): Position of the block in the RSU's chain
+previous_hash (bytes): Hash of the previous block (GENESIS_HASH for the first)
+events (list of AuthEvent): Events of the block, in commit order
+committed_at (float): Time the block was committed
+store (EventStore, optional): Store holding the events
+positions (list of int, optional): Positions of the events in the store
+"""
+class Block:
+
+    def __init__(self, rsu_id, height, previous_hash, events, committed_at, store=None, positions=None):
+
+        self.rsu_id = rsu_id
+        self.height = height
+        self.previous_hash = previous_hash
+        self.committed_at = committed_at
+        self.size = len(events)
+        self.store = store
+        self.positions = array.array("q", positions) if positions is not None else None
+        levels = merkle_levels([event_leaf(event) for event in events])
+        self.merkle_root = levels[-1][0] if levels else EMPTY_ROOT
+        self.block_hash = block_hash(rsu_id, height, previous_hash, self.merkle_root, self.size, committed_at)
+
+        # Store-backed blocks rebuild these on demand
+        self._events, self._levels = (None, None) if self.positions is not None else (events, levels)
+
+
+    def __len__(self):
+
+        return self.size
+
+
+    """Snapshot state: a store-backed block is saved without its store, which the ledger snapshots separately"""
+    def __getstate__(self):
+
+        state = dict(self.__dict__)
+        state["store"] = None
+
+        return state
+
+
+    """
+    Events and Merkle tree levels of the block, rebuilt from the store for store-backed blocks (not kept)
+
+    Returns:
+    tuple: (list of AuthEvent, list of levels as returned by merkle_levels)
+    """
+    def tree(self):
+
+        if self._levels is not None:
+            return self._events, self._levels
+
+        events = self.store.events(self.positions)
+
+        return events, merkle_levels([event_leaf(event) for event in events])
+
+
+    """
+    Build the inclusion proof of one of the block's events
+
+    Args:
+    index (int): Position of the event in the block
+    tree (tuple, optional): (events, levels) from tree(), e.g. as cached by a TreeCache (rebuilt if not given)
+
+    Returns:
+    InclusionProof: The proof, with one sibling hash per tree level that has one (O(log n))
+    """
+    def inclusion_proof(self, index, tree=None):
+
+        events, levels = self.tree() if tree is None else tree
+        path = []
+        position = index
+
+        for level in levels[:-1]:
+
+            sibling = position ^ 1
+
+            # An odd last node has no sibling; it was carried up unchanged
+            if sibling < len(level):
+                path.append((level[sibling], sibling < position))
+
+            position //= 2
+
+        return InclusionProof(
+            events[index], index, tuple(path), self.rsu_id, self.height, self.previous_hash,
+            self.merkle_root, self.size, self.committed_at
+        )
+
+
+"""
+TreeCache Class
+
+Bounded LRU of rebuilt block trees, so repeated inclusion proofs from the same blocks do not rebuild them every time
+
+Args:
+capacity (int): Number of blocks whose events and tree levels are kept
+"""
+class TreeCache:
+
+    def __init__(self, capacity=DEFAULT_TREE_CACHE_BLOCKS):
+
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._trees = OrderedDict()
+
+
+    def __len__(self):
+
+        return len(self._trees)
+
+
+    """
+    Get a block's events and tree levels, rebuilding them (and evicting the least recently used block) on a miss
+
+    Args:
+    block (Block): The block
+
+    Returns:
+    tuple: (events, levels) as returned by Block.tree()
+    """
+    def get(self, block):
+
+        key = (block.rsu_id, block.height)
+        tree = self._trees.get(key)
+
+        if tree is not None:
+            self.hits += 1
+            self._trees.move_to_end(key)
+            return tree
+
+        self.misses += 1
+        tree = self._trees[key] = block.tree()
+
+        if len(self._trees) > self.capacity:
+            self._trees.popitem(last=False)
+
+        return tree
+
+
+"""
+Ledger Class
+
+Per-RSU chains of Merkle-batched blocks
+
+Usage:
+ledger = Ledger(block_size=256, max_block_delay=1.0)
+ledger.record(event)
+ledger.flush()
+print(ledger.stats())
+
+Persistent usage:
+ledger = Ledger.open("ledger_data", snapshot_every=100000)
+
+Args:
+block_size (int): Events per block; a full batch is committed right away
+max_block_delay (float): Seconds an event may wait before its batch is committed even if not full
+clock (optional): Clock commit times are read from (defaults to the process-wide clock from clock.py)
+"""
+class Ledger:
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, max_block_delay=DEFAULT_MAX_BLOCK_DELAY, clock=None):
+
+        if block_size < 1:
+            raise ValueError("Block size must be at least 1")
+
+        self.block_size = block_size
+        self.max_block_delay = max_block_delay
+        self.clock = clock
+        self.chains = {}
+
+        # Held by every method that changes or reads the chains, the store or the pending batches, so the ledger can
+        # be shared between threads (e.g. a LedgerWriter's worker and callers querying it); reentrant because
+        # record() commits and snapshots
+        self.lock = threading.RLock()
+
+        # Rebuilt events and trees of recently proven blocks
+        self.trees = TreeCache()
+
+        # Segment log every event and commit is appended to, the number of events between automatic snapshots, the
+        # store size and chain lengths at the last snapshot (where the next delta starts) and the log positions of the
+        # last two snapshots (for compaction)
+        self.log = None
+        self.snapshot_every = None
+        self._last_snapshot = 0
+        self._snapshot_heights = {}
+        self._snapshot_positions = (0, 0)
+
+        # Every recorded event, indexed for queries and inclusion proof lookups
+        self.store = EventStore()
+
+        # rsu_id -> pending events, the times they were recorded at and their positions in the store
+        self._pending = {}
+        self._pending_times = {}
+        self._pending_positions = {}
+
+        self.events_committed = 0
+        self.blocks_committed = 0
+        self.commit_seconds = 0.0
+        self.total_commit_latency = 0.0
+        self.max_commit_latency = 0.0
+
+
+    """
+    Open a persistent ledger, recovering it from the snapshots in its directory
+    - Every snapshot delta is applied in order, then only the records logged after the last one are replayed: events
+      become pending again, and each commit record commits its RSU's pending events as the same block (same commit
+      time, so the same root and hash)
+    - Events logged after their RSU's last commit record stay pending and are batched as usual
+
+    Args:
+    directory (str): Directory of the ledger's segment log (created if missing)
+    block_size (int): Events per block
+    max_block_delay (float): Seconds an event may wait before its batch is committed
+    clock (optional): Clock commit times are read from
+    snapshot_every (int, optional): Take a snapshot after this many new events
+    segment_records (int): Records per segment file
+
+    Returns:
+    Ledger: The recovered ledger, appending to the log from now on
+
+    Raises:
+    ValueError: If a snapshot does not extend the ledger rebuilt so far, or a replayed commit record does not match
+                the block rebuilt from the logged events
+    """
+    @classmethod
+    def open(cls, directory, block_size=DEFAULT_BLOCK_SIZE, max_block_delay=DEFAULT_MAX_BLOCK_DELAY, clock=None,
+             snapshot_every=None, segment_records=DEFAULT_SEGMENT_RECORDS):
+
+        log = SegmentLog(directory, segment_records)
+        ledger = cls(block_size, max_block_delay, clock)
+        position = 0
+
+        for position, state in log.snapshots():
+            ledger._apply_snapshot(state)
+
+        for entry in log.entries(position):
+
+            if isinstance(entry, BlockCommit):
+                ledger._replay_commit(entry)
+
+            else:
+                ledger._add(entry)
+
+        ledger.log = log
+        ledger.snapshot_every = snapshot_every
+        ledger._snapshot_positions = (position, position)
+
+        return ledger
+
+
+    """Extend the store and chains with a snapshot delta, checking the chain heads it recorded"""
+    def _apply_snapshot(self, state):
+
+        self.store.extend(state["store"])
+
+        for rsu_id, blocks in state["blocks"].items():
+
+            chain = self.chains.setdefault(rsu_id, [])
+
+            for block in blocks:
+
+                if block.height != len(chain) or block.previous_hash != (chain[-1].block_hash if chain else GENESIS_HASH):
+                    raise ValueError(f"Snapshot block {block.height} of {rsu_id} does not extend its chain")
+
+                block.store = self.store
+                chain.append(block)
+
+        for rsu_id, (height, head_hash) in state["heads"].items():
+
+            chain = self.chains.get(rsu_id, [])
+
+            if len(chain) != height or chain[-1].block_hash != head_hash:
+                raise ValueError(f"Chain of {rsu_id} does not end at the head recorded by its snapshot")
+
+        for field in SNAPSHOT_COUNTERS:
+            setattr(self, field, state["counters"][field])
+
+        self._last_snapshot = len(self.store)
+        self._snapshot_heights = {rsu_id: len(chain) for rsu_id, chain in self.chains.items()}
+
+
+    """Rebuild a logged block from its RSU's pending events, checking it against the commit record"""
+    def _replay_commit(self, commit):
+
+        pending = len(self._pending.get(commit.rsu_id, ()))
+        block = self.commit(commit.rsu_id, commit.committed_at) if pending == commit.size else None
+
+        if block is None or (block.height, block.merkle_root, block.block_hash[:BLOCK_HASH_PREFIX]) != (commit.height, commit.merkle_root, commit.block_hash):
+            raise ValueError(f"Logged commit of block {commit.height} of {commit.rsu_id} does not match its logged events")
+
+
+    """
+    Commit every pending batch and snapshot what changed since the previous snapshot into the ledger's log
+    - The snapshot holds the store columns and blocks added since the previous snapshot, the chain heads and the
+      counters, so its cost is proportional to the events since the last snapshot, not to the whole history
+    - The log is compacted afterwards: segments before the previous snapshot are dropped, so the last two snapshots
+      can still be recovered from, and small segments are merged
+
+    Returns:
+    int: The log position the snapshot covers
+    """
+    def snapshot(self):
+
+        with self.lock:
+
+            if self.log is None:
+                raise ValueError("Ledger has no log to snapshot into; open it with Ledger.open()")
+
+            self.flush()
+
+            # Nothing was logged since the last snapshot, whose file an empty delta at the same position would replace
+            if len(self.log) == self._snapshot_positions[1]:
+                return self._snapshot_positions[1]
+
+            state = {
+                "store": self.store.delta(self._last_snapshot),
+                "blocks": {rsu_id: chain[self._snapshot_heights.get(rsu_id, 0):] for rsu_id, chain in self.chains.items()},
+                "heads": {rsu_id: (len(chain), chain[-1].block_hash) for rsu_id, chain in self.chains.items()},
+                "counters": {field: getattr(self, field) for field in SNAPSHOT_COUNTERS}
+            }
+
+            position = self.log.snapshot(state)
+            self._last_snapshot = len(self.store)
+            self._snapshot_heights = {rsu_id: len(chain) for rsu_id, chain in self.chains.items()}
+            self._snapshot_positions = (self._snapshot_positions[1], position)
+            self.log.compact(before=self._snapshot_positions[0])
+
+            return position
+
+
+    """Flush the log and close it (pending events are in the log and are re-batched on the next open)"""
+    def close(self):
+
+        with self.lock:
+
+            if self.log is not None:
+                self.log.close()
+                self.log = None
+
+
+    """Current time from the ledger's clock"""
+    def _now(self):
+
+        return self.clock.time() if self.clock is not None else now()
+
+
+    """
+    Add an event to its RSU's pending batch, committing the batch if it is full or has waited long enough
+
+    Args:
+    event (AuthEvent): The event to record
+
+    Returns:
+    Block or None: The block committed as a result, if any
+    """
+    def record(self, event):
+
+        with self.lock:
+
+            if self.log is not None:
+                self.log.append(event)
+
+            current = self._now()
+            pending, times = self._add(event, current)
+            block = None
+
+            if len(pending) >= self.block_size or current - times[0] >= self.max_block_delay:
+                block = self.commit(event.rsu_id)
+
+            if self.snapshot_every and len(self.store) - self._last_snapshot >= self.snapshot_every:
+                self.snapshot()
+
+            return block
+
+
+    """
+    Add an event to the store and its RSU's pending batch, without committing anything
+
+    Args:
+    event (AuthEvent): The event
+    recorded (float, optional): Time the event entered the batch (defaults to its recorded-at time, as on replay)
+
+    Returns:
+    tuple: (the RSU's pending events, the times they entered the batch)
+    """
+    def _add(self, event, recorded=None):
+
+        pending = self._pending.setdefault(event.rsu_id, [])
+        times = self._pending_times.setdefault(event.rsu_id, [])
+        pending.append(event)
+        times.append(event.recorded_at if recorded is None else recorded)
+        self._pending_positions.setdefault(event.rsu_id, []).append(self.store.append(event))
+
+        return pending, times
+
+
+    """
+    Time at which the next pending batch becomes due for commit by commit_due()
+
+    Returns:
+    float or None: Time the oldest pending event will have waited max_block_delay seconds, or None if nothing is pending
+    """
+    def next_due(self):
+
+        with self.lock:
+
+            oldest = [times[0] for times in self._pending_times.values() if times]
+
+            return min(oldest) + self.max_block_delay if oldest else None
+
+
+    """
+    Commit the pending batch of every RSU whose oldest event has waited max_block_delay seconds
+
+    Args:
+    until (float, optional): Commit the batches due by this time, e.g. a time returned by next_due() (defaults to now)
+
+    Returns:
+    list of Block: The committed blocks
+    """
+    def commit_due(self, until=None):
+
+        with self.lock:
+
+            current = self._now() if until is None else until
+            due = [rsu_id for rsu_id, times in self._pending_times.items() if times and times[0] + self.max_block_delay <= current]
+
+            return [self.commit(rsu_id) for rsu_id in due]
+
+
+    """
+    Commit an RSU's pending batch as a block
+    - With a log, a commit record is appended after the block's events, so recovery rebuilds the same block
+
+    Args:
+    rsu_id (str): The RSU
+    committed_at (float, optional): Commit time (defaults to now; recovery passes the logged one)
+
+    Returns:
+    Block or None: The new block, or None if nothing was pending
+    """
+    def commit(self, rsu_id, committed_at=None):
+
+        with self.lock:
+
+            events = self._pending.pop(rsu_id, None)
+            times = self._pending_times.pop(rsu_id, None)
+            positions = self._pending_positions.pop(rsu_id, None)
+
+            if not events:
+                return None
+
+            start = time.perf_counter()
+            chain = self.chains.setdefault(rsu_id, [])
+            previous_hash = chain[-1].block_hash if chain else GENESIS_HASH
+            committed_at = self._now() if committed_at is None else committed_at
+            block = Block(rsu_id, len(chain), previous_hash, events, committed_at, self.store, positions)
+            chain.append(block)
+
+            if self.log is not None:
+                self.log.append_commit(BlockCommit(rsu_id, block.height, block.size, committed_at, block.merkle_root, block.block_hash))
+
+            for index, position in enumerate(positions):
+                self.store.set_location(position, block.height, index)
+
+            self.commit_seconds += time.perf_counter() - start
+
+            self.events_committed += len(events)
+            self.blocks_committed += 1
+            self.total_commit_latency += sum(committed_at - recorded for recorded in times)
+            self.max_commit_latency = max(self.max_commit_latency, committed_at - times[0])
+
+            return block
+
+
+    """
+    Commit every pending batch
+
+    Returns:
+    list of Block: The committed blocks
+    """
+    def flush(self):
+
+        with self.lock:
+
+            return [self.commit(rsu_id) for rsu_id in list(self._pending)]
+
+
+    """Committed blocks of an RSU, oldest first"""
+    def blocks(self, rsu_id):
+
+        return self.chains.get(rsu_id, [])
+
+
+    """
+    Build the Merkle inclusion proof of a committed event
+
+    Args:
+    vehicle_hash (bytes): SHA-256 of the vehicle ID
+    timestamp (int): OTP timestamp of the event
+
+    Returns:
+    InclusionProof or None: Proof of the most recently committed matching event, or None if none is committed yet
+    """
+    def inclusion_proof(self, vehicle_hash, timestamp):
+
+        with self.lock:
+
+            for position in reversed(self.store.vehicle_history(vehicle_hash)):
+
+                location = self.store.location(position) if self.store.timestamp(position) == timestamp else None
+
+                if location is not None:
+                    rsu_id, height, index = location
+                    block = self.chains[rsu_id][height]
+                    return block.inclusion_proof(index, self.trees.get(block))
+
+            return None
+
+
+    """
+    Summarize commits
+
+    Returns:
+    dict: Committed events and blocks, events still pending, mean block size, mean and max time events waited for
+          their commit, time spent hashing and committing, and commit throughput in events and blocks per second
+    """
+    def stats(self):
+
+        with self.lock:
+
+            return {
+                "events": self.events_committed,
+                "blocks": self.blocks_committed,
+                "pending": sum(len(events) for events in self._pending.values()),
+                "mean_block_size": self.events_committed / self.blocks_committed if self.blocks_committed else 0.0,
+                "mean_commit_latency": self.total_commit_latency / self.events_committed if self.events_committed else 0.0,
+                "max_commit_latency": self.max_commit_latency,
+                "commit_seconds": self.commit_seconds,
+                "events_per_s": self.events_committed / self.commit_seconds if self.commit_seconds else 0.0,
+                "blocks_per_s": self.blocks_committed / self.commit_seconds if self.commit_seconds else 0.0
+            }
+
+
+_ledger = Ledger()
+
+
+"""Get the process-wide ledger"""
+def get_ledger():
+
+    return _ledger
+
+
+"""
+Install a process-wide ledger
+
+Args:
+ledger (Ledger): The ledger blockchain.py records events into
+
+Returns:
+Ledger: The previously installed ledger, so callers can restore it
+"""
+def set_ledger(ledger):
+    global _ledger
+
+    previous = _ledger
+    _ledger = ledger
+
+    return previous
+
+
+if __name__ == "__main__":
+
+    # Simple test for the ledger: commit throughput and event latency for several block sizes, on virtual time
+    import os
+
+    from clock import VirtualClock
+
+    events = [
+        AuthEvent(f"RSU{i % 4}", hashlib.sha256(f"VEH{i}".encode()).digest(), 1700000000 + i // 1000, 1700000000 + i // 1000, True, os.urandom(32))
+        for i in range(100000)
+    ]
+
+    for block_size in (1, 16, 256, 4096):
+
+        clock = VirtualClock(start=1700000000)
+        ledger = Ledger(block_size=block_size, max_block_delay=5.0, clock=clock)
+
+        # 1000 events per second of virtual time
+        for event in events:
+            ledger.record(event)
+            clock.advance(0.001)
+
+        ledger.flush()
+        stats = ledger.stats()
+
+        print(f"[Ledger] Block size {block_size:5d}: {stats['blocks']:6d} blocks, {stats['events_per_s']:9.0f} events/s committed, "
+              f"mean wait {stats['mean_commit_latency'] * 1000:7.1f}ms, max wait {stats['max_commit_latency'] * 1000:7.1f}ms")
+
+    # Inclusion proof of one event, checked against the root and block hash only
+    event = events[12345]
+    block = ledger.blocks(event.rsu_id)[0]
+    proof = ledger.inclusion_proof(event.vehicle_hash, event.timestamp)
+
+    start = time.perf_counter()
+
+    for _ in range(10000):
+        ledger.inclusion_proof(event.vehicle_hash, event.timestamp)
+
+    print(f"[Ledger] Inclusion proof: {len(proof.path)} hashes for a block of {proof.size} events, "
+          f"{(time.perf_counter() - start) / 10000 * 1e6:.1f}us per proof")
+    trusted_hash = ledger.blocks(event.rsu_id)[proof.height].block_hash
+    print(f"[Ledger] Proof verifies: {verify_inclusion_proof(proof, trusted_block_hash=trusted_hash)}")
+    print(f"[Ledger] Tampered proof verifies: {verify_inclusion_proof(proof._replace(event=event._replace(authenticated=False)), trusted_block_hash=trusted_hash)}")
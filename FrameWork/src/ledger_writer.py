@@ -0,0 +1,374 @@
+"""
+ledger_writer.py
+
+Requires: ledger.py
+
+Write-behind queue that records authentication events into the ledger off the authentication critical path
+
+- RSUs submit events into a bounded queue and return at once; a background worker thread drains the queue and
+  records the events into the ledger in batches, so authentication latency no longer includes block commits,
+  snapshots or console output
+- The queue bound is the backpressure point: when the ledger falls behind, submitters either wait for room
+  (block=True, optionally up to a timeout) or have the event dropped (block=False), and both are counted
+- stats() exposes the backpressure metrics: queue depth and high-water mark, submissions that had to wait and how
+  long, dropped events, and the sizes and write times of the batches the worker recorded
+- flush() waits until every submitted event is in the ledger, so queries and inclusion proofs see them, and raises
+  the first error the worker hit while recording since the last flush
+- The worker records each batch under the ledger's lock, so the ledger can be queried or written directly from other
+  threads at the same time
+- Whenever the queue stays empty for commit_interval seconds the worker commits the ledger's due batches
+  (Ledger.commit_due), so max_block_delay holds even for RSUs that stop submitting
+"""
+
+import queue
+import threading
+import time
+
+from ledger import get_ledger
+
+DEBUG_MODE = False
+
+DEFAULT_MAX_QUEUE = 8192
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_COMMIT_INTERVAL = 0.25
+
+# Queued in place of an event to stop the worker
+_STOP = object()
+
+"""Enable or disable printing of events the worker failed to record"""
+def set_debug_mode(enabled):
+    global DEBUG_MODE
+    DEBUG_MODE = enabled
+
+
+"""
+LedgerWriter Class
+
+Bounded write-behind queue drained into a ledger by a background thread
+- Events are recorded in submission order; the worker holds the ledger's lock while writing a batch
+- While idle, the worker commits the ledger's due batches every commit_interval seconds
+- An event the ledger fails to record is counted (and printed in debug mode), and flush() raises the first such
+  error, so failures are not lost
+- on_record, if given, is called from the worker after each event is recorded (e.g. to print it), keeping that work
+  off the submitting thread too
+
+Usage:
+writer = LedgerWriter()
+writer.submit(event)
+writer.flush()
+writer.close()
+
+Args:
+ledger (Ledger, optional): Ledger to record into (defaults to the process-wide ledger from ledger.py at write time)
+max_queue (int): Events the queue holds before submitters feel backpressure
+batch_size (int): Most events the worker records per batch
+block (bool): Wait for room when the queue is full (True) or drop the event (False)
+timeout (float, optional): Longest wait for room when blocking, after which the event is dropped (None waits forever)
+on_record (callable, optional): Called with each event once it is recorded
+commit_interval (float): Seconds the queue may stay empty before the worker commits the ledger's due batches
+"""
+class LedgerWriter:
+
+    def __init__(self, ledger=None, max_queue=DEFAULT_MAX_QUEUE, batch_size=DEFAULT_BATCH_SIZE, block=True, timeout=None,
+                 on_record=None, commit_interval=DEFAULT_COMMIT_INTERVAL):
+
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError("Queue size and batch size must be at least 1")
+
+        if commit_interval <= 0:
+            raise ValueError("Commit interval must be positive")
+
+        self.ledger = ledger
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.block = block
+        self.timeout = timeout
+        self.on_record = on_record
+        self.commit_interval = commit_interval
+        self.closed = False
+
+        self._queue = queue.Queue(max_queue)
+        self._stats_lock = threading.Lock()
+
+        # Submission side
+        self.submitted = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.max_queue_depth = 0
+        self.total_enqueue_wait = 0.0
+        self.max_enqueue_wait = 0.0
+
+        # Worker side
+        self.written = 0
+        self.batched = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.write_seconds = 0.0
+        self.errors = 0
+        self.last_error = None
+        self._unreported_error = None
+
+        self._worker = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+        self._worker.start()
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+    """
+    Queue an event for the ledger
+
+    Args:
+    event (AuthEvent): The event to record
+
+    Returns:
+    bool: True if the event was queued, False if it was dropped because the queue stayed full
+    """
+    def submit(self, event):
+
+        if self.closed:
+            raise ValueError("Ledger writer is closed")
+
+        waited = 0.0
+
+        try:
+            self._queue.put_nowait(event)
+
+        except queue.Full:
+
+            if not self.block:
+                return self._count_submission(False, waited)
+
+            start = time.perf_counter()
+
+            try:
+                self._queue.put(event, timeout=self.timeout)
+
+            except queue.Full:
+                return self._count_submission(False, time.perf_counter() - start)
+
+            waited = time.perf_counter() - start
+
+        return self._count_submission(True, waited)
+
+
+    """Update the submission metrics; waited is the time spent waiting for room (0 if there was room)"""
+    def _count_submission(self, queued, waited):
+
+        depth = self._queue.qsize()
+
+        with self._stats_lock:
+
+            self.submitted += 1
+
+            if not queued:
+                self.dropped += 1
+
+            if waited:
+                self.blocked += 1
+                self.total_enqueue_wait += waited
+                self.max_enqueue_wait = max(self.max_enqueue_wait, waited)
+
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+        return queued
+
+
+    """Worker loop: take whatever is queued, up to batch_size events, and record it as one batch; commit due batches when idle"""
+    def _run(self):
+
+        while True:
+
+            try:
+                batch = [self._queue.get(timeout=self.commit_interval)]
+
+            except queue.Empty:
+                self._commit_due()
+                continue
+
+            while len(batch) < self.batch_size:
+
+                try:
+                    batch.append(self._queue.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+
+            if stop:
+                batch.pop()
+
+            if batch:
+                self._write(batch)
+
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+
+            if stop:
+                return
+
+
+    """Record a batch of events into the ledger"""
+    def _write(self, batch):
+
+        ledger = get_ledger() if self.ledger is None else self.ledger
+        start = time.perf_counter()
+
+        with ledger.lock:
+
+            for event in batch:
+
+                try:
+                    ledger.record(event)
+                    self.written += 1
+
+                    if self.on_record is not None:
+                        self.on_record(event)
+
+                except Exception as error:
+                    self._record_error(event, error)
+
+        self.batched += len(batch)
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.write_seconds += time.perf_counter() - start
+
+
+    """Commit the ledger's batches that have waited max_block_delay seconds"""
+    def _commit_due(self):
+
+        ledger = get_ledger() if self.ledger is None else self.ledger
+
+        try:
+            ledger.commit_due()
+
+        except Exception as error:
+            self._record_error(None, error)
+
+
+    """Count an event the worker failed to record (None for a failed commit), keeping the first error since the last flush for flush() to raise"""
+    def _record_error(self, event, error):
+
+        self.errors += 1
+        self.last_error = error
+
+        if self._unreported_error is None:
+            self._unreported_error = error
+
+        if DEBUG_MODE and event is None:
+            print(f"[Ledger Writer] Failed to commit due blocks: {error!r}")
+
+        elif DEBUG_MODE:
+            print(f"[Ledger Writer] Failed to record event from {event.rsu_id}: {error!r}")
+
+
+    """
+    Wait until every event submitted so far has been recorded into the ledger
+
+    Raises:
+    RuntimeError: If the worker failed to record an event or commit since the last flush (chained to the first such error)
+    """
+    def flush(self):
+
+        self._queue.join()
+        error, self._unreported_error = self._unreported_error, None
+
+        if error is not None:
+            raise RuntimeError(f"Ledger writer failed {self.errors} time(s) so far") from error
+
+
+    """Record everything still queued, then stop the worker (further submissions raise ValueError)"""
+    def close(self):
+
+        if self.closed:
+            return
+
+        self.closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
+
+
+    """
+    Summarize the write-behind queue
+
+    Returns:
+    dict: Queue depth and high-water mark, submitted, dropped and written (recorded without error) events,
+          submissions that waited for room with mean and max wait (seconds), batches with mean and max size, time
+          spent writing and failed writes
+    """
+    def stats(self):
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "blocked": self.blocked,
+            "mean_enqueue_wait": self.total_enqueue_wait / self.blocked if self.blocked else 0.0,
+            "max_enqueue_wait": self.max_enqueue_wait,
+            "batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "write_seconds": self.write_seconds,
+            "errors": self.errors
+        }
+
+
+if __name__ == "__main__":
+
+    # Simple test for the write-behind queue: submission latency against direct recording, into a slow ledger
+    import hashlib
+
+    from ledger import AuthEvent, Ledger
+
+    """Ledger whose block commits take a millisecond, like a ledger writing to a slow disk or a real chain"""
+    class SlowLedger(Ledger):
+
+        def commit(self, rsu_id, committed_at=None):
+
+            time.sleep(0.001)
+
+            return super().commit(rsu_id, committed_at)
+
+    vehicles = [hashlib.sha256(f"VEH{i}".encode()).digest() for i in range(1000)]
+    events = [AuthEvent(f"RSU{i % 4}", vehicles[i % len(vehicles)], 1700000000 + i, 1700000000 + i, True, bytes(32)) for i in range(50000)]
+
+    ledger = SlowLedger(block_size=16)
+    latencies = []
+
+    for event in events:
+        start = time.perf_counter()
+        ledger.record(event)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(f"[Ledger Writer] Direct:       mean {sum(latencies) / len(latencies) * 1e6:7.1f}us, p99 {latencies[len(latencies) * 99 // 100] * 1e6:7.1f}us per event")
+
+    for max_queue, block in ((65536, True), (1024, True), (1024, False)):
+
+        ledger = SlowLedger(block_size=16)
+        writer = LedgerWriter(ledger, max_queue=max_queue, block=block)
+        latencies = []
+
+        for event in events:
+            start = time.perf_counter()
+            writer.submit(event)
+            latencies.append(time.perf_counter() - start)
+
+        writer.close()
+        stats = writer.stats()
+        latencies.sort()
+
+        print(f"[Ledger Writer] Queue {max_queue:5d} ({'block' if block else 'drop'}): mean {sum(latencies) / len(latencies) * 1e6:7.1f}us, "
+              f"p99 {latencies[len(latencies) * 99 // 100] * 1e6:7.1f}us per event, max depth {stats['max_queue_depth']}, "
+              f"blocked {stats['blocked']}, dropped {stats['dropped']}, mean batch {stats['mean_batch_size']:.1f}, "
+              f"{len(ledger.store)} events in the ledger")
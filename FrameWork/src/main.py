@@ -28,8 +28,17 @@ def cli_menu_loop():
         print("10. ZoKrates-Integrated Isolated Test: Multiple Vehicles")
         print("11. ZoKrates-Integrated End-to-End Test: Multiple Vehicles")
         print("12. Run all tests and scenarios with Debug Mode enabled")
+        print("13. Real ZoKrates Test: Vehicle to RSU Proof Handover")
+        print("14. Real ZoKrates Test: MiMC OTP Circuit")
+        print("15. Simulated Discrete-Event Test: Many Vehicles")
+        print("16. Simulated Trace Replay Test: SUMO Demand")
+        print("17. Simulated Ledger Recovery Test: Crash and Restart")
+        print("18. Simulated Replay Test: Replays and Retransmissions")
+        print("19. Simulated Junction RSU Test: Vehicles in Radio Range")
         print("d. Enable Debug Mode")
         print("n. Disable Debug Mode")
+        print("v. Enable Virtual Time (instant, deterministic runs)")
+        print("w. Use Wall-Clock Time")
         print("0. Exit")
         
         choice = input("Enter your choice: ").strip()
@@ -73,6 +82,28 @@ def cli_menu_loop():
                 preliminary_tests.testAndScenarioRunner()
                 preliminary_tests.set_debug_mode(False)
                 
+            case "13":
+                preliminary_tests.test_vehicle_rsu_real_zokrates_proof_handover()
+                
+            case "14":
+                preliminary_tests.test_vehicle_rsu_real_zokrates_mimc_otp()
+                
+            case "15":
+                preliminary_tests.test_simulated_discrete_event_many_vehicles()
+                
+            case "16":
+                path = input("SUMO routes/tripinfos file (blank for the 3x3 city block): ").strip()
+                preliminary_tests.test_simulated_trace_replay(path or None)
+                
+            case "17":
+                preliminary_tests.test_simulated_ledger_recovery()
+                
+            case "18":
+                preliminary_tests.test_simulated_replay_and_retransmission()
+                
+            case "19":
+                preliminary_tests.test_simulated_junction_rsus()
+                
             case "d":
                 preliminary_tests.set_debug_mode(True)
                 print("Debug mode enabled.\n")
@@ -81,6 +112,14 @@ def cli_menu_loop():
                 preliminary_tests.set_debug_mode(False)
                 print("Debug mode disabled.\n")
                 
+            case "v":
+                preliminary_tests.set_virtual_time(True)
+                print("Virtual time enabled.\n")
+                
+            case "w":
+                preliminary_tests.set_virtual_time(False)
+                print("Wall-clock time enabled.\n")
+                
             case "0":
                 print("Exiting.")
                 break
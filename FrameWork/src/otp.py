@@ -1,39 +1,294 @@
 """
 otp.py
 
+Requires: clock.py
+
 Provides a function to generate a one-time password (OTP) using a secret and the current timestamp
 Used by vehicle and authentication modules to create time-based OTPs for secure authentication workflows
 
 - Concatenates the provided secret with the current Unix timestamp
 - Hashes the result using SHA-256 to produce a unique OTP for each time interval
 - Returns both the OTP and the timestamp used for generation
+- Reads the time from the pluggable clock in clock.py, so simulations can run on virtual time
+- Groups timestamps into TOTP-style time steps, so an OTP stays valid for a whole step and verifiers can
+  precompute the OTPs of the current and adjacent steps
+- Alternatively uses HMAC-SHA256 over the 8-byte time step counter as in RFC 6238 TOTP ("hmac" mode), keeping
+  the keyed HMAC state of recently used secrets in a bounded LRU so each OTP only hashes the counter
+- Alternatively uses MiMC-7 over BN254 field elements ("mimc" mode), a SNARK-friendly hash that the
+  ZoKrates OTP circuit in zkp.py implements with the exact same round constants
+- Alternatively uses one packed SHA-256 block of 128-bit words ("packed" mode), the OTP the batch circuit in
+  otp_batch.py proves, so vehicles switch to it when their OTPs are proven in batches
 """
 
-import time
 import hashlib
+import hmac
+from collections import OrderedDict
+
+from clock import get_clock
+
+# Supported OTP constructions; the deployment picks one with set_otp_mode()
+OTP_MODES = ("sha256", "hmac", "mimc", "packed")
+OTP_MODE = "sha256"
+
+# Length of one OTP time step in seconds, and how many steps of clock skew a verifier tolerates either way
+OTP_TIME_STEP = 1
+OTP_SKEW_STEPS = 1
+
+# Number of secrets whose keyed HMAC state is kept for the "hmac" mode
+HMAC_CACHE_SIZE = 4096
+_hmac_states = OrderedDict()
+
+# Order of the BN254 scalar field that ZoKrates circuit values live in
+FIELD_MODULUS = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+
+# MiMC-7 parameters: x -> x^7 is a permutation of the field, and 91 rounds give the usual security margin
+MIMC_EXPONENT = 7
+MIMC_ROUNDS = 91
+MIMC_SEED = b"zkp-otp-mimc7"
+
+# Round constants derived from the seed; the ZoKrates circuit is generated from this same list
+MIMC_CONSTANTS = tuple(
+    int.from_bytes(hashlib.sha256(MIMC_SEED + i.to_bytes(4, "big")).digest(), "big") % FIELD_MODULUS
+    for i in range(MIMC_ROUNDS)
+)
+
+"""
+Select the OTP construction used by generate_otp
+
+Args:
+mode (str): One of OTP_MODES
+"""
+def set_otp_mode(mode):
+    global OTP_MODE
+
+    if mode not in OTP_MODES:
+        raise ValueError(f"Unknown OTP mode '{mode}', expected one of {OTP_MODES}")
+
+    OTP_MODE = mode
+
+"""
+Set the OTP time step length
+
+Args:
+seconds (int): Length of one time step in seconds
+"""
+def set_otp_time_step(seconds):
+    global OTP_TIME_STEP
+
+    if seconds < 1:
+        raise ValueError("OTP time step must be at least one second")
+
+    OTP_TIME_STEP = int(seconds)
+
+"""
+Get the OTP settings a worker process needs to generate the same OTPs as this process
+
+Returns:
+tuple: (OTP mode, time step length in seconds), to pass to set_otp_config() in the worker
+"""
+def otp_config():
+
+    return OTP_MODE, OTP_TIME_STEP
+
+"""
+Apply OTP settings taken with otp_config(), e.g. inside a worker process (which may not share this process's globals)
+
+Args:
+config (tuple): (OTP mode, time step length in seconds)
+"""
+def set_otp_config(config):
+
+    mode, seconds = config
+    set_otp_mode(mode)
+    set_otp_time_step(seconds)
 
 """
-Generate a one-time password (OTP) using the provided secret and current timestamp
+Current Unix time in whole seconds
+
+Args:
+clock (optional): Clock to read (defaults to the process-wide clock from clock.py)
+
+Returns:
+int: The current timestamp
+"""
+def current_timestamp(clock=None):
+
+    return int((clock or get_clock()).time())
+
+"""
+Get the time step a timestamp falls into
+
+Args:
+timestamp (int): Unix timestamp
+
+Returns:
+int: Time step counter (timestamp // OTP_TIME_STEP)
+"""
+def time_step(timestamp):
+
+    return timestamp // OTP_TIME_STEP
+
+"""
+Get the timestamp an OTP for a time step is generated with
+
+Args:
+step (int): Time step counter
+
+Returns:
+int: Start of the time step as a Unix timestamp
+"""
+def step_timestamp(step):
+
+    return step * OTP_TIME_STEP
+
+"""
+Map a secret to a BN254 field element for the MiMC OTP mode
 
 Args:
 secret (str): Secret key unique to the vehicle
 
 Returns:
-tuple: (otp (str), timestamp (int))
+int: The secret as a field element
+"""
+def secret_to_field(secret):
+
+    return int.from_bytes(secret.encode(), "big") % FIELD_MODULUS
+
+"""
+MiMC-7 keyed permutation over the BN254 scalar field
+
+Args:
+x (int): Input field element
+k (int): Key field element
+
+Returns:
+int: h + k, where h is x after MIMC_ROUNDS rounds of h = (h + k + c_i)^7
 """
-def generate_otp(secret):
+def mimc7(x, k):
+
+    h = x % FIELD_MODULUS
+
+    for constant in MIMC_CONSTANTS:
+        h = pow(h + k + constant, MIMC_EXPONENT, FIELD_MODULUS)
+
+    return (h + k) % FIELD_MODULUS
+
+"""
+Derive the 256-bit key of the "packed" OTP mode from a secret
+
+Args:
+secret (str): Secret key unique to the vehicle
+
+Returns:
+bytes: SHA-256 of the secret, which the batch circuit takes as two 128-bit field words
+"""
+def packed_key(secret):
+
+    return hashlib.sha256(secret.encode()).digest()
+
+"""
+Packed SHA-256 OTP: the 512-bit block of 128-bit words (key high, key low, 0, timestamp) that ZoKrates'
+sha256packed hashes, so the batch circuit in otp_batch.py proves exactly this OTP
+
+Args:
+secret (str): Secret key unique to the vehicle
+timestamp (int): Start of the time step the OTP is generated for
+
+Returns:
+bytes: The raw 32-byte digest
+"""
+def packed_otp_digest(secret, timestamp):
+
+    return hashlib.sha256(packed_key(secret) + bytes(16) + timestamp.to_bytes(16, "big")).digest()
+
+"""
+Get the keyed HMAC-SHA256 state of a secret, from the LRU cache when possible
+
+Args:
+secret (str): Secret key unique to the vehicle
+
+Returns:
+hmac.HMAC: State with the inner and outer key pads already hashed; callers must copy it before use
+"""
+def _hmac_state(secret):
+
+    state = _hmac_states.get(secret)
+
+    if state is None:
+
+        state = _hmac_states[secret] = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+        if len(_hmac_states) > HMAC_CACHE_SIZE:
+            _hmac_states.popitem(last=False)
+
+    else:
+        _hmac_states.move_to_end(secret)
+
+    return state
+
+"""
+Generate the one-time password (OTP) for a given timestamp
+
+Args:
+secret (str): Secret key unique to the vehicle
+timestamp (int): Start of the time step the OTP is generated for
+
+Returns:
+str: The OTP
+"""
+def generate_otp_at(secret, timestamp):
+
+    if OTP_MODE == "mimc":
+        return format(mimc7(timestamp, secret_to_field(secret)), "064x")
+
+    if OTP_MODE == "hmac":
+        state = _hmac_state(secret).copy()
+        state.update(time_step(timestamp).to_bytes(8, "big"))
+        return state.hexdigest()
+
+    if OTP_MODE == "packed":
+        return packed_otp_digest(secret, timestamp).hex()
 
-    timestamp = int(time.time())
     otp_input = f"{secret}{timestamp}".encode()
-    otp = hashlib.sha256(otp_input).hexdigest()
-    
+
+    return hashlib.sha256(otp_input).hexdigest()
+
+"""
+Generate a one-time password (OTP) using the provided secret and current time step
+
+Args:
+secret (str): Secret key unique to the vehicle
+clock (optional): Clock to read (defaults to the process-wide clock from clock.py)
+
+Returns:
+tuple: (otp (str), timestamp (int)), where timestamp is the start of the current time step
+"""
+def generate_otp(secret, clock=None):
+
+    timestamp = step_timestamp(time_step(current_timestamp(clock)))
+    otp = generate_otp_at(secret, timestamp)
+
     return otp, timestamp
 
 if __name__ == "__main__":
-    
+
     # Simple test for OTP generation
     secret = "mysecret"
     otp, timestamp = generate_otp(secret)
-    
+
     print(f"[OTP] Generated OTP: {otp}\nTimestamp: {timestamp}")
 
+    set_otp_mode("hmac")
+    otp, timestamp = generate_otp(secret)
+
+    print(f"[OTP] Generated HMAC OTP: {otp}\nTimestamp: {timestamp}")
+
+    set_otp_mode("mimc")
+    otp, timestamp = generate_otp(secret)
+
+    print(f"[OTP] Generated MiMC OTP: {otp}\nTimestamp: {timestamp}")
+
+    set_otp_mode("packed")
+    otp, timestamp = generate_otp(secret)
+
+    print(f"[OTP] Generated packed OTP: {otp}\nTimestamp: {timestamp}")
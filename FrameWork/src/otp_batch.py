@@ -0,0 +1,400 @@
+"""
+otp_batch.py
+
+Requires: otp.py, zokrates_cache.py, zokrates_jobs.py, zkp.py
+
+Proves the OTP relation for a batch of N vehicles (or N time steps of one vehicle) in a single ZoKrates proof
+Fixed proving overhead is shared by the whole batch, and an RSU can accept one proof for a whole platoon
+
+- Generates a family of circuits, one per batch size N, proving the packed SHA-256 OTP of every item: the hash of
+  the secret's 256-bit key and the timestamp as four 128-bit field words in, two out
+- The circuit's OTP is otp.py's "packed" mode: a deployment that proves OTPs in batches selects that mode with
+  otp.set_otp_mode("packed") up front, so the proofs cover the same OTPs its vehicles send; OtpBatchProver refuses
+  to prove under any other mode rather than switching the process-wide setting itself
+- Picks the batch size from a latency budget using measured proving times and reports amortized per-item cost
+"""
+
+import os
+import time
+
+from otp import packed_key, packed_otp_digest
+import otp
+from zokrates_cache import get_circuit_artifacts
+from zokrates_jobs import ProvingJob
+from zkp import verify_zkp_proof_real, proof_public_inputs, CIRCUIT_DIR
+import zokrates_interface
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32)
+
+CIRCUIT_TEMPLATE = """import "hashes/sha256/512bitPacked" as sha256packed;
+
+// Generated by otp_batch.py: proves the packed SHA-256 OTP relation for {n} items
+def main(private field[{n}][2] secrets, field[{n}] timestamps, field[{n}][2] otps) {{
+    for u32 i in 0..{n} {{
+        field[2] digest = sha256packed([secrets[i][0], secrets[i][1], 0, timestamps[i]]);
+        assert(digest[0] == otps[i][0]);
+        assert(digest[1] == otps[i][1]);
+    }}
+    return;
+}}
+"""
+
+
+"""
+Split a secret's packed OTP key into the two 128-bit field words used by the batch circuit
+
+Args:
+secret (str): Secret key unique to the vehicle
+
+Returns:
+tuple: (high word (int), low word (int)) of otp.packed_key(secret)
+"""
+def secret_to_words(secret):
+
+    value = int.from_bytes(packed_key(secret), "big")
+
+    return value >> 128, value & ((1 << 128) - 1)
+
+
+"""
+Split a packed OTP into the two 128-bit field words the batch circuit outputs
+
+Args:
+otp (str): OTP generated in otp.py's "packed" mode, as a vehicle sends it
+
+Returns:
+tuple: (high digest word (int), low digest word (int))
+"""
+def otp_to_words(otp):
+
+    value = int(otp, 16)
+
+    return value >> 128, value & ((1 << 128) - 1)
+
+
+"""
+Compute the packed SHA-256 OTP exactly as the batch circuit does (otp.py's "packed" mode)
+
+Args:
+secret (str): Secret key unique to the vehicle
+timestamp (int): The timestamp the OTP is generated for
+
+Returns:
+tuple: (high digest word (int), low digest word (int))
+"""
+def packed_otp(secret, timestamp):
+
+    return otp_to_words(packed_otp_digest(secret, timestamp).hex())
+
+
+"""
+Write the batch circuit for batch size n (only rewritten when its source changes)
+
+Args:
+n (int): Number of items proved by the circuit
+
+Returns:
+str: Path to the generated .zok file
+"""
+def write_batch_circuit(n):
+
+    os.makedirs(CIRCUIT_DIR, exist_ok=True)
+    path = os.path.join(CIRCUIT_DIR, f"otp_batch_{n}.zok")
+    source = CIRCUIT_TEMPLATE.format(n=n)
+
+    if not os.path.exists(path) or open(path).read() != source:
+
+        with open(path, "w") as circuit_file:
+            circuit_file.write(source)
+
+    return path
+
+
+"""
+Build the compute-witness arguments for a batch
+
+Args:
+items (list of tuple): (secret, timestamp) pairs, exactly as many as the circuit size
+
+Returns:
+list of str: Flattened circuit arguments (secrets, then timestamps, then OTPs)
+"""
+def batch_witness_args(items):
+
+    secret_words = [word for secret, _timestamp in items for word in secret_to_words(secret)]
+    timestamps = [timestamp for _secret, timestamp in items]
+    otp_words = [word for secret, timestamp in items for word in packed_otp(secret, timestamp)]
+
+    return [str(value) for value in secret_words + timestamps + otp_words]
+
+
+"""
+Build the public inputs a valid batch proof must carry
+
+Args:
+items (list of tuple): (secret, timestamp) pairs, exactly as many as the circuit size
+
+Returns:
+list of int: Timestamps followed by the packed OTP words
+"""
+def expected_public_inputs(items):
+
+    timestamps = [timestamp for _secret, timestamp in items]
+    otp_words = [word for secret, timestamp in items for word in packed_otp(secret, timestamp)]
+
+    return timestamps + otp_words
+
+
+"""Pad a batch to the circuit size by repeating its last item"""
+def _pad(items, n):
+
+    return list(items) + [items[-1]] * (n - len(items))
+
+
+"""
+Verify a batch proof against the secrets and timestamps it should cover
+
+Args:
+proof (dict): Parsed proof.json object of a batch proof
+items (list of tuple): (secret, timestamp) pairs the proof should cover
+n (int, optional): Circuit size the proof was generated with (defaults to the smallest size fitting the items)
+
+Returns:
+bool: True if the proof is valid and covers exactly these items, False otherwise
+"""
+def verify_otp_batch(proof, items, n=None):
+
+    if not items:
+        return False
+
+    n = n or next((size for size in BATCH_SIZES if size >= len(items)), len(items))
+
+    if len(items) > n:
+        return False
+
+    if proof_public_inputs(proof) != expected_public_inputs(_pad(items, n)):
+        return False
+
+    return verify_zkp_proof_real(write_batch_circuit(n), proof)
+
+
+"""
+Check that vehicles generate the OTPs the batch circuit proves
+
+Raises:
+ValueError: If otp.py is not in the "packed" mode
+"""
+def _require_packed_mode():
+
+    if otp.OTP_MODE != "packed":
+        raise ValueError(f"Batch proofs cover packed OTPs, but the OTP mode is '{otp.OTP_MODE}'; call set_otp_mode(\"packed\") first")
+
+
+"""
+OtpBatchProver Class
+
+Proves OTP batches with the largest circuit size that fits a proving latency budget
+- Measured proving times per batch size drive the choice; unmeasured sizes are estimated
+  with a fixed-plus-per-item cost model fitted to the sizes measured so far
+- Every proof records its total and amortized per-item proving time
+- Requires otp.py's "packed" mode, so the OTPs vehicles generate are the ones it proves
+
+Usage:
+set_otp_mode("packed")
+prover = OtpBatchProver(latency_budget=2.0)
+results = prover.prove([(secret, timestamp), ...])
+print(prover.report())
+
+Args:
+latency_budget (float): Maximum acceptable proving time for one batch, in seconds
+batch_sizes (tuple of int): Circuit sizes to choose from
+
+Raises:
+ValueError: If otp.py is not in the "packed" mode
+"""
+class OtpBatchProver:
+
+    def __init__(self, latency_budget, batch_sizes=BATCH_SIZES):
+
+        self.latency_budget = latency_budget
+        self.batch_sizes = tuple(sorted(batch_sizes))
+        self.timings = {}
+
+        _require_packed_mode()
+
+
+    """
+    Estimate the proving time of a batch size
+
+    Returns:
+    float or None: Estimated seconds, or None if there is nothing to base an estimate on
+    """
+    def estimate(self, n):
+
+        if n in self.timings:
+            return sum(self.timings[n]) / len(self.timings[n])
+
+        points = [(size, sum(times) / len(times)) for size, times in self.timings.items()]
+
+        if not points:
+            return None
+
+        if len(points) == 1:
+            size, seconds = points[0]
+            return seconds * n / size
+
+        # Least-squares fit of seconds = fixed + per_item * n
+        mean_n = sum(size for size, _seconds in points) / len(points)
+        mean_t = sum(seconds for _size, seconds in points) / len(points)
+        variance = sum((size - mean_n) ** 2 for size, _seconds in points)
+        per_item = sum((size - mean_n) * (seconds - mean_t) for size, seconds in points) / variance
+        fixed = mean_t - per_item * mean_n
+
+        return max(fixed + per_item * n, 0.0)
+
+
+    """
+    Choose the circuit size for the next batch
+
+    Args:
+    pending (int): Number of items waiting to be proved
+
+    Returns:
+    int: Largest size within the latency budget, no larger than needed for the pending items
+    """
+    def choose_batch_size(self, pending):
+
+        chosen = self.batch_sizes[0]
+
+        for n in self.batch_sizes:
+
+            estimate = self.estimate(n)
+
+            # Without measurements, start small and let the first runs calibrate the model
+            if estimate is None or estimate > self.latency_budget:
+                break
+
+            chosen = n
+
+            if n >= pending:
+                break
+
+        return chosen
+
+
+    """
+    Prove one batch with a circuit of size n
+
+    Args:
+    items (list of tuple): (secret, timestamp) pairs, at most n of them
+    n (int): Circuit size
+
+    Returns:
+    dict: Proof object (None if proving failed), circuit size, item count, total and amortized proving time
+    """
+    def prove_batch(self, items, n):
+
+        artifacts = get_circuit_artifacts(write_batch_circuit(n))
+        proof = None
+        start = time.perf_counter()
+
+        if artifacts is not None:
+
+            with ProvingJob(artifacts) as job:
+                proof = job.generate_proof(batch_witness_args(_pad(items, n)))
+
+        elapsed = time.perf_counter() - start
+
+        if proof is not None:
+            self.timings.setdefault(n, []).append(elapsed)
+
+        if zokrates_interface.DEBUG_MODE:
+            print(f"Batch of {len(items)} proved with N={n} in {elapsed:.3f}s ({elapsed / len(items):.3f}s per item)")
+
+        return {
+            "proof": proof,
+            "size": n,
+            "items": len(items),
+            "proving_time": elapsed,
+            "amortized_time": elapsed / len(items)
+        }
+
+
+    """
+    Prove any number of items, splitting them into batches sized by the latency budget
+
+    Args:
+    items (list of tuple): (secret, timestamp) pairs
+
+    Returns:
+    list of dict: One prove_batch result per batch, in input order
+
+    Raises:
+    ValueError: If otp.py is not in the "packed" mode
+    """
+    def prove(self, items):
+
+        _require_packed_mode()
+        results = []
+        index = 0
+
+        while index < len(items):
+
+            n = self.choose_batch_size(len(items) - index)
+            results.append(self.prove_batch(items[index:index + n], n))
+            index += n
+
+        return results
+
+
+    """
+    Summarize measured proving times per batch size
+
+    Returns:
+    dict: Batch size -> runs, mean proving time and amortized per-item time
+    """
+    def report(self):
+
+        summary = {}
+
+        for n, times in sorted(self.timings.items()):
+
+            mean = sum(times) / len(times)
+            summary[n] = {"runs": len(times), "mean_time": mean, "amortized_time": mean / n}
+
+        return summary
+
+
+if __name__ == "__main__":
+
+    # Simple test for batch proving: eight vehicles within a two second budget
+    import secrets
+
+    from otp import set_otp_mode
+    from vehicle import Vehicle
+
+    # The deployment proves its vehicles' OTPs in batches, so it runs in the packed OTP mode
+    set_otp_mode("packed")
+    prover = OtpBatchProver(latency_budget=2.0)
+    vehicles = [Vehicle(f"VEH{i}", secrets.token_hex(32)) for i in range(8)]
+    sent = [vehicle.generate_otp() for vehicle in vehicles]
+    items = [(vehicle.secret, timestamp) for vehicle, (_otp, timestamp) in zip(vehicles, sent)]
+
+    print(f"[OTP Batch] Packed OTP of first item: {packed_otp(*items[0])}")
+    print(f"[OTP Batch] Matches the OTP the vehicle sends: {packed_otp(*items[0]) == otp_to_words(sent[0][0])}")
+
+    results = prover.prove(items)
+
+    for result in results:
+
+        if result["proof"] is None:
+            print(f"[OTP Batch] Proving a batch of {result['items']} failed.")
+            continue
+
+        covered = items[:result["items"]]
+        items = items[result["items"]:]
+
+        print(f"[OTP Batch] N={result['size']}: {result['amortized_time']:.3f}s per item, "
+              f"valid: {verify_otp_batch(result['proof'], covered, result['size'])}")
+
+    print(f"[OTP Batch] Report: {prover.report()}")
@@ -0,0 +1,354 @@
+"""
+otp_bulk.py
+
+Requires: otp.py, zkp.py
+
+Generates the OTPs and simulated proofs of a whole fleet for one time step, writing raw digests into
+preallocated buffers instead of returning one hex string per vehicle
+
+- Takes the fleet's secrets as one contiguous buffer (SECRET_BYTES per vehicle, as stored by fleet.py)
+- Hashes each secret once into a SHA-256 prefix state; every time step only copies the state and feeds it
+  the timestamp, instead of formatting, encoding and hashing the whole OTP input again
+- Large fleets are split into chunks proved by worker processes that read the secrets from, and write the
+  digests to, shared memory; each chunk is bound to one worker, which keeps the prefix states of that chunk only
+- Produces byte-for-byte the same digests as otp.generate_otp_at and zkp.generate_zkp_proof_simulated
+"""
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+from otp import generate_otp_at, otp_config, set_otp_config
+import otp
+
+SECRET_BYTES = 32
+DIGEST_BYTES = 32
+
+# Fleets smaller than this are hashed in the calling process; worker start-up would cost more than it saves
+PARALLEL_THRESHOLD = 50000
+
+# Per-process cache of attached shared memory blocks and of the prefix states of the chunk the worker is bound to,
+# keyed by block name and chunk
+_attached = {}
+_chunk_states = {}
+
+
+"""
+Hash each secret of a buffer slice into a SHA-256 state holding the OTP input prefix
+
+Args:
+secrets (bytes-like): Raw secrets, SECRET_BYTES each
+start (int): First vehicle index
+end (int): One past the last vehicle index
+
+Returns:
+list: One hashlib state per vehicle, fed with the vehicle's secret string
+"""
+def prefix_states(secrets, start, end):
+
+    sha256 = hashlib.sha256
+
+    return [sha256(bytes(secrets[i * SECRET_BYTES:(i + 1) * SECRET_BYTES]).hex().encode()) for i in range(start, end)]
+
+
+"""
+Fill OTP and proof digests for a range of vehicles
+
+Args:
+secrets (bytes-like): Raw secrets, SECRET_BYTES each
+states (list or None): Prefix states for the range (only used in the sha256 OTP mode)
+start (int): First vehicle index
+end (int): One past the last vehicle index
+timestamp (int): Start of the time step
+otps_out (writable buffer): Receives the raw OTP of vehicle i at i * DIGEST_BYTES
+proofs_out (writable buffer or None): Receives the raw simulated proof of vehicle i at i * DIGEST_BYTES
+"""
+def _fill(secrets, states, start, end, timestamp, otps_out, proofs_out):
+
+    suffix = str(timestamp).encode()
+    offset = start * DIGEST_BYTES
+
+    if otp.OTP_MODE != "sha256":
+
+        digests = (
+            bytes.fromhex(generate_otp_at(bytes(secrets[i * SECRET_BYTES:(i + 1) * SECRET_BYTES]).hex(), timestamp))
+            for i in range(start, end)
+        )
+
+    else:
+        digests = (_copy_update(state, suffix) for state in states)
+
+    for digest in digests:
+
+        otps_out[offset:offset + DIGEST_BYTES] = digest
+
+        if proofs_out is not None:
+            proofs_out[offset:offset + DIGEST_BYTES] = _proof(digest, suffix)
+
+        offset += DIGEST_BYTES
+
+
+"""Simulated proof of a raw OTP: the hex OTP followed by the timestamp, as generate_zkp_proof_simulated hashes it"""
+def _proof(digest, suffix):
+
+    return hashlib.sha256(digest.hex().encode() + suffix).digest()
+
+
+"""
+Fill the simulated proofs of OTPs generated earlier
+
+Args:
+otps (bytes-like): Raw OTPs, DIGEST_BYTES each, as written by BulkOtpGenerator.generate
+timestamp (int): The timestamp the OTPs were generated for
+proofs_out (writable buffer): Receives the raw simulated proof of vehicle i at i * DIGEST_BYTES
+"""
+def fill_proofs(otps, timestamp, proofs_out):
+
+    suffix = str(timestamp).encode()
+
+    for offset in range(0, len(otps), DIGEST_BYTES):
+        proofs_out[offset:offset + DIGEST_BYTES] = _proof(bytes(otps[offset:offset + DIGEST_BYTES]), suffix)
+
+
+"""Finish a copy of a prefix state with the timestamp suffix"""
+def _copy_update(state, suffix):
+
+    state = state.copy()
+    state.update(suffix)
+
+    return state.digest()
+
+
+"""Attach to a shared memory block once per process"""
+def _attach(name):
+
+    if name not in _attached:
+        _attached[name] = shared_memory.SharedMemory(name=name)
+
+    return _attached[name]
+
+
+"""
+Fill one chunk from shared memory (runs inside a pool worker)
+
+Args:
+secrets_name (str): Shared memory block holding the secrets
+output_name (str): Shared memory block holding the OTP digests, followed by the proof digests
+count (int): Number of vehicles in the fleet
+start (int): First vehicle index of the chunk
+end (int): One past the last vehicle index of the chunk
+timestamp (int): Start of the time step
+with_proofs (bool): Whether to write proof digests as well
+config (tuple): OTP mode and time step of the parent process, from otp.otp_config()
+"""
+def _fill_chunk(secrets_name, output_name, count, start, end, timestamp, with_proofs, config):
+
+    set_otp_config(config)
+    secrets = _attach(secrets_name).buf[:count * SECRET_BYTES]
+    output = _attach(output_name).buf
+    otps_out = output[:count * DIGEST_BYTES]
+    proofs_out = output[count * DIGEST_BYTES:2 * count * DIGEST_BYTES] if with_proofs else None
+    states = None
+
+    if otp.OTP_MODE == "sha256":
+
+        key = (secrets_name, start, end)
+
+        # A worker serves one chunk of one fleet, so states of any other chunk are stale
+        if key not in _chunk_states:
+            _chunk_states.clear()
+            _chunk_states[key] = prefix_states(secrets, start, end)
+
+        states = _chunk_states[key]
+
+    _fill(secrets, states, start, end, timestamp, otps_out, proofs_out)
+
+    # Views into shared memory must be released before the block can be closed
+    for view in (secrets, otps_out, proofs_out):
+
+        if view is not None:
+            view.release()
+
+
+"""
+BulkOtpGenerator Class
+
+Generates the OTPs (and optionally the simulated proofs) of a whole fleet for one time step
+- Prefix states are built once per secret and reused for every time step
+- Fleets of at least parallel_threshold vehicles are split into one chunk per worker process over shared memory;
+  each chunk is bound to its own worker, so every worker builds and keeps the prefix states of its chunk only
+- The workers and shared memory blocks persist between calls until close()
+
+Usage:
+with BulkOtpGenerator(fleet.secrets) as generator:
+    otps, proofs = generator.generate(timestamp)
+
+Args:
+secrets (bytes-like): Raw secrets, SECRET_BYTES per vehicle
+max_workers (int, optional): Number of worker processes (defaults to the number of cores)
+parallel_threshold (int): Smallest fleet split across worker processes
+"""
+class BulkOtpGenerator:
+
+    def __init__(self, secrets, max_workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+
+        if len(secrets) % SECRET_BYTES:
+            raise ValueError(f"Secrets buffer must hold {SECRET_BYTES} bytes per vehicle")
+
+        self.secrets = bytes(secrets)
+        self.count = len(secrets) // SECRET_BYTES
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel = self.count >= parallel_threshold and self.max_workers > 1
+        self._states = None
+        self._pools = []
+        self._secrets_memory = None
+        self._output_memory = None
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+    """Shut down the workers and free the shared memory blocks"""
+    def close(self):
+
+        for pool in self._pools:
+            pool.shutdown()
+
+        self._pools = []
+
+        for memory in (self._secrets_memory, self._output_memory):
+
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+        self._secrets_memory = self._output_memory = None
+
+
+    """Allocate or check an output buffer with one digest per vehicle"""
+    def _output_buffer(self, out):
+
+        if out is None:
+            return bytearray(self.count * DIGEST_BYTES)
+
+        if len(out) != self.count * DIGEST_BYTES:
+            raise ValueError(f"Output buffer must hold {self.count} digests of {DIGEST_BYTES} bytes")
+
+        return out
+
+
+    """
+    Generate the OTPs, and optionally the simulated proofs, of every vehicle
+
+    Args:
+    timestamp (int): Start of the time step
+    otps_out (writable buffer, optional): Preallocated buffer of count * DIGEST_BYTES bytes for the OTPs
+    proofs_out (writable buffer, optional): Preallocated buffer of count * DIGEST_BYTES bytes for the proofs
+    with_proofs (bool): Whether to create proofs as well
+
+    Returns:
+    tuple: (otps, proofs) buffers with the digest of vehicle i at i * DIGEST_BYTES (proofs is None without proofs)
+    """
+    def generate(self, timestamp, otps_out=None, proofs_out=None, with_proofs=True):
+
+        otps_out = self._output_buffer(otps_out)
+        proofs_out = self._output_buffer(proofs_out) if with_proofs else None
+
+        if self.parallel:
+            self._generate_parallel(timestamp, otps_out, proofs_out)
+
+        else:
+
+            if self._states is None and otp.OTP_MODE == "sha256":
+                self._states = prefix_states(self.secrets, 0, self.count)
+
+            _fill(self.secrets, self._states if otp.OTP_MODE == "sha256" else None, 0, self.count, timestamp, otps_out, proofs_out)
+
+        return otps_out, proofs_out
+
+
+    """Split the fleet into one chunk per worker and gather the digests from shared memory"""
+    def _generate_parallel(self, timestamp, otps_out, proofs_out):
+
+        size = self.count * DIGEST_BYTES
+        chunk_size = -(-self.count // self.max_workers)
+        starts = range(0, self.count, chunk_size)
+
+        if not self._pools:
+
+            self._secrets_memory = shared_memory.SharedMemory(create=True, size=len(self.secrets))
+            self._secrets_memory.buf[:len(self.secrets)] = self.secrets
+            self._output_memory = shared_memory.SharedMemory(create=True, size=2 * size)
+
+            # One single-process pool per chunk binds the chunk to the same worker on every call
+            self._pools = [ProcessPoolExecutor(max_workers=1) for _ in starts]
+
+        futures = [
+            pool.submit(
+                _fill_chunk,
+                self._secrets_memory.name,
+                self._output_memory.name,
+                self.count,
+                start,
+                min(start + chunk_size, self.count),
+                timestamp,
+                proofs_out is not None,
+                otp_config()
+            )
+            for pool, start in zip(self._pools, starts)
+        ]
+
+        for future in futures:
+            future.result()
+
+        otps_out[:] = self._output_memory.buf[:size]
+
+        if proofs_out is not None:
+            proofs_out[:] = self._output_memory.buf[size:2 * size]
+
+
+if __name__ == "__main__":
+
+    # Benchmark: per-call OTP and proof functions against the bulk path, in-process and across workers
+    import time
+    from zkp import generate_zkp_proof
+
+    count = 200000
+    timestamp = int(time.time())
+    secrets = os.urandom(count * SECRET_BYTES)
+
+    start = time.perf_counter()
+    expected = []
+
+    for i in range(count):
+        otp_value = generate_otp_at(secrets[i * SECRET_BYTES:(i + 1) * SECRET_BYTES].hex(), timestamp)
+        expected.append((otp_value, generate_zkp_proof(otp_value, timestamp)))
+
+    per_call = time.perf_counter() - start
+    print(f"[OTP Bulk] Per-call functions: {per_call:.3f}s for {count} vehicles")
+
+    for label, workers in (("in-process", 1), (f"{os.cpu_count()} workers", None)):
+
+        with BulkOtpGenerator(secrets, max_workers=workers, parallel_threshold=1) as generator:
+
+            # The first call also builds the prefix states; steady state is every later time step
+            generator.generate(timestamp)
+            start = time.perf_counter()
+            otps, proofs = generator.generate(timestamp)
+            elapsed = time.perf_counter() - start
+
+        matches = all(
+            otps[i * DIGEST_BYTES:(i + 1) * DIGEST_BYTES].hex() == expected[i][0] and
+            proofs[i * DIGEST_BYTES:(i + 1) * DIGEST_BYTES].hex() == expected[i][1]
+            for i in range(0, count, 997)
+        )
+
+        print(f"[OTP Bulk] Bulk {label}: {elapsed:.3f}s ({per_call / elapsed:.2f}x), digests match: {matches}")
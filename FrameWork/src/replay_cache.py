@@ -0,0 +1,251 @@
+"""
+replay_cache.py
+
+Remembers which (vehicle_id, proof, timestamp) requests an RSU has already verified, so retransmitted or replayed
+proofs are answered without verifying them again and never grant access a second time
+
+- Requests are bucketed by the OTP time step of their timestamp, and whole buckets are dropped once that step
+  leaves the RSU's skew window, so memory is bounded by the window rather than by uptime
+- By default every step of the window is kept as an exact dict holding each request's verification result, so any
+  repeat copy accepted by the window is a DUPLICATE answered with the original result; a copy is byte-for-byte the
+  same whether it is a retransmission or a replay, so the caller must not treat a duplicate as a fresh grant
+- With fewer exact_steps, older steps are folded into fixed-size Bloom filters that only remember that a request was
+  seen: a copy arriving that late is reported as a REPLAY. This trades a small false-positive rate (a fresh request
+  wrongly treated as a replay) for flat memory at very high request rates
+"""
+
+import hashlib
+import json
+import math
+
+DEFAULT_BLOOM_CAPACITY = 65536
+DEFAULT_ERROR_RATE = 1e-4
+
+# Kinds of repeat copies lookup() reports
+DUPLICATE = "duplicate"
+REPLAY = "replay"
+
+
+"""
+Compute the cache key of a verification request
+
+Args:
+vehicle_id (str): The vehicle's unique identifier
+zkp_proof (str or dict): The simulated ZKP proof, or a parsed ZoKrates proof object
+timestamp (int): The timestamp used in OTP generation
+
+Returns:
+bytes: 16-byte digest identifying the request
+"""
+def request_key(vehicle_id, zkp_proof, timestamp):
+
+    if isinstance(zkp_proof, dict):
+        zkp_proof = json.dumps(zkp_proof, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.blake2b(f"{vehicle_id}\0{zkp_proof}\0{timestamp}".encode(), digest_size=16).digest()
+
+
+"""
+BloomFilter Class
+
+Fixed-size Bloom filter over 16-byte request keys
+- Sized for a target capacity and false-positive rate; memory never grows past that
+- Bit positions come from double hashing the two 64-bit halves of the key, which is already a uniform digest
+
+Args:
+capacity (int): Number of keys the filter is sized for
+error_rate (float): False-positive rate at full capacity
+"""
+class BloomFilter:
+
+    def __init__(self, capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+
+    """Bit positions of a key"""
+    def _positions(self, key):
+
+        first = int.from_bytes(key[:8], "little")
+        second = int.from_bytes(key[8:16], "little") | 1
+
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+
+    """Add a key to the filter"""
+    def add(self, key):
+
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+
+    """Check whether a key may have been added (never a false negative)"""
+    def __contains__(self, key):
+
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+"""
+ReplayCache Class
+
+Time-bucketed cache of verification requests and their results
+- lookup() answers a request that was seen before; add() records a new request's result once it is verified
+- Buckets of the exact_steps newest steps are dicts of key -> result; older buckets are Bloom filters
+- advance() drops buckets that left the window and folds aging exact buckets into Bloom filters
+
+Usage:
+cache = ReplayCache(window_steps=3)
+cache.advance(current_step)
+seen = cache.lookup(key, step)
+if seen is None:
+    result = verify(...)
+    cache.add(key, step, result)
+
+Args:
+window_steps (int): Number of steps either side of the current step that requests are accepted for
+exact_steps (int, optional): Number of newest steps tracked exactly (defaults to the whole window,
+                             2 * window_steps + 1, so no repeat inside the window is mistaken for a replay)
+bloom_capacity (int): Number of requests each Bloom filter bucket is sized for
+error_rate (float): False-positive rate of a full Bloom filter bucket
+"""
+class ReplayCache:
+
+    def __init__(self, window_steps, exact_steps=None, bloom_capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+
+        self.window_steps = window_steps
+        self.exact_steps = 2 * window_steps + 1 if exact_steps is None else exact_steps
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self.current_step = None
+        self.duplicates = 0
+        self.replays = 0
+
+        # step -> dict of key -> result (newest steps) or BloomFilter (older steps still inside the window)
+        self._buckets = {}
+
+
+    """
+    Move the window to a new current step
+
+    Args:
+    current_step (int): The RSU's current time step
+    """
+    def advance(self, current_step):
+
+        if current_step == self.current_step:
+            return
+
+        self.current_step = current_step
+        newest_exact = current_step + self.window_steps - self.exact_steps
+
+        for step in list(self._buckets):
+
+            bucket = self._buckets[step]
+
+            if step < current_step - self.window_steps:
+                del self._buckets[step]
+
+            elif step <= newest_exact and isinstance(bucket, dict):
+                self._buckets[step] = self._to_bloom(bucket)
+
+
+    """Fold an exact bucket into a Bloom filter"""
+    def _to_bloom(self, keys):
+
+        bloom = BloomFilter(self.bloom_capacity, self.error_rate)
+
+        for key in keys:
+            bloom.add(key)
+
+        return bloom
+
+
+    """
+    Answer a request that was seen before
+
+    Args:
+    key (bytes): Request key from request_key()
+    step (int): Time step of the request's timestamp
+
+    Returns:
+    tuple or None: (DUPLICATE, original result) for a copy whose step is tracked exactly, (REPLAY, None) for a copy
+                   whose step was folded into a Bloom filter, or None for a new request, which the caller
+                   verifies and add()s
+    """
+    def lookup(self, key, step):
+
+        bucket = self._buckets.get(step)
+
+        if bucket is None or key not in bucket:
+            return None
+
+        if isinstance(bucket, dict):
+            self.duplicates += 1
+            return DUPLICATE, bucket[key]
+
+        self.replays += 1
+
+        return REPLAY, None
+
+
+    """
+    Record a verified request and its result
+
+    Args:
+    key (bytes): Request key from request_key()
+    step (int): Time step of the request's timestamp
+    result (bool): Verification result, reported with duplicates of the request
+    """
+    def add(self, key, step, result):
+
+        bucket = self._buckets.get(step)
+
+        if bucket is None:
+
+            # Steps that are already old when first seen go straight into a Bloom filter
+            if self.current_step is not None and step <= self.current_step + self.window_steps - self.exact_steps:
+                bucket = self._buckets[step] = BloomFilter(self.bloom_capacity, self.error_rate)
+
+            else:
+                bucket = self._buckets[step] = {}
+
+        if isinstance(bucket, dict):
+            bucket[key] = result
+
+        else:
+            bucket.add(key)
+
+
+    """Number of requests recorded in the current window"""
+    def __len__(self):
+
+        return sum(len(bucket) if isinstance(bucket, dict) else bucket.count for bucket in self._buckets.values())
+
+
+if __name__ == "__main__":
+
+    # Simple test for the replay cache: copies inside the window are duplicates, a Bloom-tracked copy is a replay
+    cache = ReplayCache(window_steps=1)
+    cache.advance(100)
+    key = request_key("VEH1", "proof", 100)
+
+    print(f"[Replay Cache] First copy new: {cache.lookup(key, 100) is None}")
+    cache.add(key, 100, True)
+    print(f"[Replay Cache] Copy in the same step: {cache.lookup(key, 100)}")
+
+    cache.advance(101)
+    print(f"[Replay Cache] Copy one step later: {cache.lookup(key, 100)}")
+
+    small = ReplayCache(window_steps=1, exact_steps=1)
+    small.advance(100)
+    small.add(key, 100, True)
+    small.advance(101)
+    print(f"[Replay Cache] Same copy with one exact step, from the Bloom filter: {small.lookup(key, 100)}")
+
+    cache.advance(105)
+    print(f"[Replay Cache] Requests in window after advancing: {len(cache)}")
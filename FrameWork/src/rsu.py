@@ -1,17 +1,55 @@
 """
 rsu.py
 
-Requires: otp.py, zkp.py
+Requires: otp.py, zkp.py, otp_batch.py, replay_cache.py, blockchain.py
 
 Defines the RSU (Roadside Unit) class, which verifies zero-knowledge proofs (ZKPs) submitted by vehicles for authentication
 
-- The RSU is initialized with a mapping of vehicle IDs to their secrets
+- The RSU is initialized with a mapping of vehicle IDs to their secrets (a dict, or a memory-mapped KeyStore)
 - Upon receiving a ZKP, the RSU reconstructs the expected OTP and ZKP using the stored secret and provided timestamp
 - The RSU compares the received ZKP to the expected value to determine authentication success
+- Timestamps are accepted if their OTP time step is within a configurable skew window around the RSU's own step;
+  expected proofs for the window are cached per vehicle, so verifying a repeat visitor is a dict lookup
+- Real ZoKrates proofs are checked in-process against the circuit's preloaded verification key, and their public
+  inputs against the expected OTP and timestamp, so the RSU never compiles, sets up, or proves anything itself
+- Every request is recorded in a replay cache with its result, so a repeat copy of a request (a retransmission
+  or a replay, which look the same) is answered without verifying it again and never grants access a second time:
+  check_zkp() reports it as DUPLICATE (or REPLAY once only a Bloom filter remembers it), and verify_zkp() as False
+- Batches of requests are verified together: grouped by time step, with each expected value derived once,
+  and large batches spread across a process pool the RSU keeps for its lifetime (close() shuts it down); the
+  thresholds for using the pool come from the benchmark in this module's __main__
+- Given a ledger writer, the RSU submits every verification result to the blockchain log through its write-behind
+  queue (see ledger_writer.py), so the access decision never waits for the ledger
 """
 
-from otp import generate_otp
-from zkp import generate_zkp_proof
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from otp import generate_otp_at, otp_config, set_otp_config, current_timestamp, time_step, step_timestamp, OTP_SKEW_STEPS
+from zkp import (
+    generate_zkp_proof,
+    verify_zkp_proof_real,
+    verify_zkp_proofs_real_batch,
+    proof_public_inputs,
+    expected_public_inputs
+)
+from otp_batch import verify_otp_batch
+from replay_cache import ReplayCache, request_key, DUPLICATE, REPLAY
+from blockchain import submit_blockchain_verification, DEFAULT_RSU_ID
+
+# Batches needing at least this many expected proofs (or real proof verifications) are fanned out to the RSU's
+# process pool. The benchmark below puts the break-even for four workers on a warm pool at 300-600 expected proofs,
+# so hashing waits for about twice that; a proof check costs far more than a round trip, so proofs only wait until
+# every worker gets one
+PARALLEL_HASH_THRESHOLD = 1024
+PARALLEL_PROOF_THRESHOLD = 4
+
+# Worker count the thresholds are derived for by the benchmark
+BENCHMARK_WORKERS = 4
+
+# Outcomes of check_zkp() besides replay_cache's DUPLICATE and REPLAY; only GRANTED lets the vehicle in
+GRANTED = "granted"
+DENIED = "denied"
 
 
 """
@@ -21,13 +59,28 @@ Represents a roadside infrastructure unit responsible for authenticating vehicle
 - Initialized with a mapping of vehicle IDs to their corresponding secrets
 - Upon receiving a ZKP proof, reconstructs the expected OTP and ZKP using the stored secret and provided timestamp
 - Compares the received ZKP to the expected value to determine authentication success
+- Only timestamps within skew_steps OTP time steps of the RSU's clock are accepted
+- Keeps the expected proofs of each vehicle's window cached, dropping steps as the window advances
+- Verifies each (vehicle_id, proof, timestamp) request once; a repeat copy of an accepted request is a DUPLICATE,
+  not a second grant (see replay_cache.py)
+- Logs each verification result through ledger_writer, if given, without waiting for it to be recorded; duplicates
+  are not logged again, since the original decision already is
+- Starts its worker processes on the first large batch and keeps them until close()
     
 Usage:
-rsu = RSU(vehicle_secrets)
+rsu = RSU(vehicle_secrets, rsu_id="RSU1", ledger_writer=get_ledger_writer())
 is_valid = rsu.verify_zkp(vehicle_id, zkp_proof, timestamp)
+status = rsu.check_zkp(vehicle_id, zkp_proof, timestamp)
+rsu.close()
     
 Args:
-vehicle_secrets (dict): Mapping from vehicle_id (str) to secret (str)
+vehicle_secrets (dict or KeyStore): Mapping from vehicle_id (str) to secret (str); only .get() is used
+circuit_path (str, optional): ZoKrates circuit that real proofs are verified against
+skew_steps (int): Number of time steps a vehicle's clock may be ahead of or behind the RSU's clock
+clock (optional): Clock the RSU reads the time from (defaults to the process-wide clock from clock.py)
+rsu_id (str): Identifier the RSU's results are logged under
+ledger_writer (LedgerWriter, optional): Write-behind queue results are logged through (no logging if None)
+max_workers (int, optional): Number of worker processes for large batches (defaults to the number of cores)
 """
 class RSU:
     
@@ -35,11 +88,50 @@ class RSU:
     Initialize an RSU instance
     
     Args:
-    vehicle_secrets (dict): Mapping from vehicle_id to secret
+    vehicle_secrets (dict or KeyStore): Mapping from vehicle_id to secret (see keystore.py for large fleets)
+    circuit_path (str, optional): ZoKrates circuit that real proofs are verified against
+    skew_steps (int): Number of time steps a vehicle's clock may be ahead of or behind the RSU's clock
+    clock (optional): Clock the RSU reads the time from
+    rsu_id (str): Identifier the RSU's results are logged under
+    ledger_writer (LedgerWriter, optional): Write-behind queue results are logged through
+    max_workers (int, optional): Number of worker processes for large batches
     """
-    def __init__(self, vehicle_secrets):
+    def __init__(self, vehicle_secrets, circuit_path=None, skew_steps=OTP_SKEW_STEPS, clock=None, rsu_id=DEFAULT_RSU_ID, ledger_writer=None,
+                 max_workers=None):
 
         self.vehicle_secrets = vehicle_secrets
+        self.circuit_path = circuit_path
+        self.skew_steps = skew_steps
+        self.clock = clock
+        self.rsu_id = rsu_id
+        self.ledger_writer = ledger_writer
+
+        # vehicle_id -> {timestamp: expected simulated proof} for the steps of the current window
+        self._expected_proofs = {}
+        self._window_step = None
+        self.replay_cache = ReplayCache(skew_steps)
+
+        # Worker processes for large batches, started on first use
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+    """Shut down the RSU's worker processes, if any were started (a later large batch starts them again)"""
+    def close(self):
+
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
 
     """
@@ -47,23 +139,399 @@ class RSU:
 
     Args:
     vehicle_id (str): The vehicle's unique identifier
-    zkp_proof (str): The ZKP proof to verify
+    zkp_proof (str or dict): The simulated ZKP proof, or a parsed ZoKrates proof object
     timestamp (int): The timestamp used in OTP generation
     
     Returns:
-    bool: True if the proof is valid, False otherwise
+    bool: True if the proof is valid and grants access now, False otherwise (including repeat copies)
     """
     def verify_zkp(self, vehicle_id, zkp_proof, timestamp):
         
+        return self.check_zkp(vehicle_id, zkp_proof, timestamp) == GRANTED
+
+
+    """
+    Verify the ZKP proof from a vehicle and report how the request was decided
+
+    Args:
+    vehicle_id (str): The vehicle's unique identifier
+    zkp_proof (str or dict): The simulated ZKP proof, or a parsed ZoKrates proof object
+    timestamp (int): The timestamp used in OTP generation
+    
+    Returns:
+    str: GRANTED for a new valid proof, DENIED for an invalid one (or a copy of one), DUPLICATE for a copy of a
+         granted request and REPLAY for a copy only a Bloom filter remembers
+    """
+    def check_zkp(self, vehicle_id, zkp_proof, timestamp):
+        
+        status = self._check(vehicle_id, zkp_proof, timestamp)
+        
+        if self.ledger_writer is not None and status != DUPLICATE:
+            submit_blockchain_verification(vehicle_id, zkp_proof, timestamp, status == GRANTED, self.rsu_id, self.ledger_writer)
+            
+        return status
+
+
+    """Decide one request without logging it (see check_zkp)"""
+    def _check(self, vehicle_id, zkp_proof, timestamp):
+        
         secret = self.vehicle_secrets.get(vehicle_id)
         
         if not secret:
+            return DENIED
+        
+        current_step = time_step(current_timestamp(self.clock))
+        
+        self._sync_window(current_step)
+        
+        if not self._in_window(timestamp, current_step):
+            return DENIED
+        
+        # Repeat copies are answered from the cache without verifying them again, and never grant access twice
+        key = request_key(vehicle_id, zkp_proof, timestamp)
+        seen = self.replay_cache.lookup(key, time_step(timestamp))
+        
+        if seen is not None:
+            return _repeat_status(*seen)
+        
+        if isinstance(zkp_proof, dict):
+            result = self._verify_real_zkp(zkp_proof, generate_otp_at(secret, timestamp), timestamp)
+            
+        else:
+            result = zkp_proof == self._window_proofs(vehicle_id, secret, current_step).get(timestamp)
+            
+        self.replay_cache.add(key, time_step(timestamp), result)
+        
+        return GRANTED if result else DENIED
+
+
+    """
+    Verify many ZKP proofs at once
+
+    Args:
+    requests (list of tuple): (vehicle_id, zkp_proof, timestamp) requests, as passed to verify_zkp
+    
+    Returns:
+    list of bool: Whether each request grants access now, in input order (repeat copies never do)
+    """
+    def verify_batch(self, requests):
+        
+        return [status == GRANTED for status in self.check_batch(requests)]
+
+
+    """
+    Verify many ZKP proofs at once and report how each request was decided
+
+    Args:
+    requests (list of tuple): (vehicle_id, zkp_proof, timestamp) requests, as passed to check_zkp
+    
+    Returns:
+    list of str: check_zkp() status of each request, in input order; later copies of a request in the same batch
+                 are duplicates of the first
+    """
+    def check_batch(self, requests):
+        
+        results = [False] * len(requests)
+        statuses = [DENIED] * len(requests)
+        current_step = time_step(current_timestamp(self.clock))
+        self._sync_window(current_step)
+        
+        # Group by timestamp so the window check and the OTP of a vehicle are derived once per step
+        groups = {}
+        
+        for index, (vehicle_id, zkp_proof, timestamp) in enumerate(requests):
+            groups.setdefault(timestamp, []).append(index)
+        
+        simulated = []
+        real = []
+        missing = {}
+        
+        # key -> (step, index of its first copy) for new requests; later copies in the batch share that result
+        fresh = {}
+        copies = []
+        
+        for timestamp, indices in groups.items():
+            
+            if not self._in_window(timestamp, current_step):
+                continue
+            
+            for index in indices:
+                
+                vehicle_id, zkp_proof = requests[index][0], requests[index][1]
+                secret = self.vehicle_secrets.get(vehicle_id)
+                
+                if not secret:
+                    continue
+                
+                key = request_key(vehicle_id, zkp_proof, timestamp)
+                
+                if key in fresh:
+                    copies.append((index, fresh[key][1]))
+                    continue
+                
+                seen = self.replay_cache.lookup(key, time_step(timestamp))
+                
+                if seen is not None:
+                    statuses[index] = _repeat_status(*seen)
+                    continue
+                
+                fresh[key] = (time_step(timestamp), index)
+                
+                if isinstance(zkp_proof, dict):
+                    real.append((index, secret, timestamp))
+                    continue
+                
+                simulated.append((index, vehicle_id, timestamp))
+                
+                if timestamp not in self._expected_proofs.get(vehicle_id, ()):
+                    missing[(vehicle_id, timestamp)] = secret
+        
+        if missing:
+            
+            keys = list(missing)
+            proofs = self._map_chunks(
+                _expected_proofs_chunk,
+                [(missing[key], key[1]) for key in keys],
+                PARALLEL_HASH_THRESHOLD
+            )
+            
+            for (vehicle_id, timestamp), proof in zip(keys, proofs):
+                self._expected_proofs.setdefault(vehicle_id, {})[timestamp] = proof
+        
+        for index, vehicle_id, timestamp in simulated:
+            results[index] = requests[index][1] == self._expected_proofs[vehicle_id][timestamp]
+        
+        if real and self.circuit_path:
+            
+            otps = {}
+            bound = []
+            
+            for index, secret, timestamp in real:
+                
+                key = (secret, timestamp)
+                
+                if key not in otps:
+                    otps[key] = expected_public_inputs(self.circuit_path, generate_otp_at(secret, timestamp), timestamp)
+                
+                expected_inputs = otps[key]
+                
+                # Only proofs bound to the expected OTP and timestamp are worth a pairing check
+                if proof_public_inputs(requests[index][1])[:len(expected_inputs)] == expected_inputs:
+                    bound.append(index)
+            
+            verified = self._map_chunks(
+                _verify_real_chunk,
+                [(self.circuit_path, requests[index][1]) for index in bound],
+                PARALLEL_PROOF_THRESHOLD
+            )
+            
+            for index, is_valid in zip(bound, verified):
+                results[index] = is_valid
+        
+        for key, (step, index) in fresh.items():
+            self.replay_cache.add(key, step, results[index])
+            statuses[index] = GRANTED if results[index] else DENIED
+            
+        for index, first in copies:
+            statuses[index] = _repeat_status(DUPLICATE, results[first])
+        
+        if self.ledger_writer is not None:
+            
+            for (vehicle_id, zkp_proof, timestamp), status in zip(requests, statuses):
+                
+                if status != DUPLICATE:
+                    submit_blockchain_verification(vehicle_id, zkp_proof, timestamp, status == GRANTED, self.rsu_id, self.ledger_writer)
+        
+        return statuses
+
+
+    """
+    Apply a chunk function to a list of items, spreading the chunks over the RSU's process pool once there are enough
+
+    Args:
+    function (callable): Takes (chunk, OTP config from otp.otp_config()) and returns one result per item of the chunk
+    items (list): Work items
+    threshold (int): Smallest number of items worth handing to the worker processes
+
+    Returns:
+    list: Results for all items, in input order
+    """
+    def _map_chunks(self, function, items, threshold):
+
+        if not items:
+            return []
+
+        if len(items) < threshold or self.max_workers == 1:
+            return function(items, otp_config())
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        chunk_size = -(-len(items) // self.max_workers)
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+        return [result for chunk_results in self._pool.map(function, chunks, [otp_config()] * len(chunks)) for result in chunk_results]
+
+
+    """
+    Check that a timestamp is the start of a time step inside the skew window
+
+    Args:
+    timestamp (int): The timestamp used in OTP generation
+    current_step (int): The RSU's current time step
+    
+    Returns:
+    bool: True if an OTP for this timestamp may be accepted now, False otherwise
+    """
+    def _in_window(self, timestamp, current_step):
+        
+        step = time_step(timestamp)
+        
+        return timestamp == step_timestamp(step) and abs(step - current_step) <= self.skew_steps
+
+
+    """Evict cached proofs and replay cache buckets that have left the window once the RSU's clock enters a new step"""
+    def _sync_window(self, current_step):
+        
+        if current_step != self._window_step:
+            self._advance_window(current_step - self.skew_steps)
+            self.replay_cache.advance(current_step)
+            self._window_step = current_step
+
+
+    """
+    Get the expected simulated proofs of a vehicle for every step of the current window
+
+    Args:
+    vehicle_id (str): The vehicle's unique identifier
+    secret (str): The vehicle's secret
+    current_step (int): The RSU's current time step
+    
+    Returns:
+    dict: Mapping from step timestamp to expected proof
+    """
+    def _window_proofs(self, vehicle_id, secret, current_step):
+        
+        first_step = current_step - self.skew_steps
+        
+        proofs = self._expected_proofs.setdefault(vehicle_id, {})
+        
+        # Only steps that entered the window since the vehicle was last seen are hashed
+        for step in range(first_step, current_step + self.skew_steps + 1):
+            
+            timestamp = step_timestamp(step)
+            
+            if timestamp not in proofs:
+                proofs[timestamp] = generate_zkp_proof(generate_otp_at(secret, timestamp), timestamp)
+        
+        return proofs
+
+
+    """
+    Drop cached proofs for steps that have left the window, and vehicles with nothing left cached
+
+    Args:
+    first_step (int): Oldest time step of the new window
+    """
+    def _advance_window(self, first_step):
+        
+        oldest = step_timestamp(first_step)
+        
+        for vehicle_id in list(self._expected_proofs):
+            
+            proofs = self._expected_proofs[vehicle_id]
+            
+            for timestamp in [timestamp for timestamp in proofs if timestamp < oldest]:
+                del proofs[timestamp]
+            
+            if not proofs:
+                del self._expected_proofs[vehicle_id]
+
+
+    """
+    Verify a real ZoKrates proof and check that it was made for the expected OTP and timestamp
+
+    Args:
+    zkp_proof (dict): Parsed ZoKrates proof object
+    otp (str): The OTP expected from the vehicle
+    timestamp (int): The timestamp used in OTP generation
+    
+    Returns:
+    bool: True if the proof is valid and bound to the expected OTP and timestamp, False otherwise
+    """
+    def _verify_real_zkp(self, zkp_proof, otp, timestamp):
+        
+        if not self.circuit_path:
             return False
         
-        otp, _unused_timestamp = generate_otp(secret)
-        expected_zkp = generate_zkp_proof(otp, timestamp)
+        # The proof must be bound to the expected OTP and timestamp through its public inputs
+        expected_inputs = expected_public_inputs(self.circuit_path, otp, timestamp)
+        
+        if proof_public_inputs(zkp_proof)[:len(expected_inputs)] != expected_inputs:
+            return False
+        
+        return verify_zkp_proof_real(self.circuit_path, zkp_proof)
+
+
+    """
+    Verify a single batch proof covering a whole platoon (see otp_batch.py)
+
+    Args:
+    vehicle_ids (list of str): Vehicles covered by the proof, in proof order
+    zkp_proof (dict): Parsed ZoKrates batch proof object
+    timestamps (list of int): Timestamp each vehicle's OTP was generated for
+    batch_size (int, optional): Circuit size the proof was generated with
+    
+    Returns:
+    bool: True if the proof is valid for every listed vehicle, False otherwise
+    """
+    def verify_platoon_zkp(self, vehicle_ids, zkp_proof, timestamps, batch_size=None):
+        
+        secrets = [self.vehicle_secrets.get(vehicle_id) for vehicle_id in vehicle_ids]
+        
+        if not secrets or not all(secrets) or len(secrets) != len(timestamps):
+            return False
         
-        return zkp_proof == expected_zkp
+        return verify_otp_batch(zkp_proof, list(zip(secrets, timestamps)), batch_size)
+
+
+"""
+Status of a repeat copy of a request, from ReplayCache.lookup()
+
+Args:
+kind (str): DUPLICATE or REPLAY
+result (bool or None): Result of the original request (None for a replay)
+
+Returns:
+str: DUPLICATE for a copy of a granted request, DENIED for a copy of a denied one, REPLAY otherwise
+"""
+def _repeat_status(kind, result):
+
+    if kind == REPLAY:
+        return REPLAY
+
+    return DUPLICATE if result else DENIED
+
+
+"""Compute the expected simulated proofs for (secret, timestamp) pairs (runs inside a pool worker)"""
+def _expected_proofs_chunk(items, config):
+
+    set_otp_config(config)
+
+    return [generate_zkp_proof(generate_otp_at(secret, timestamp), timestamp) for secret, timestamp in items]
+
+
+"""Return nothing but one placeholder per item, to time the pool's own cost (runs inside a pool worker)"""
+def _empty_chunk(items, _config):
+
+    return [None] * len(items)
+
+
+"""Verify (circuit_path, proof) pairs of one circuit together (runs inside a pool worker)"""
+def _verify_real_chunk(items, _config):
+
+    return verify_zkp_proofs_real_batch(items[0][0], [proof for _circuit_path, proof in items])
+
 
 if __name__ == "__main__":
     
@@ -81,3 +549,51 @@ if __name__ == "__main__":
     
     print(f"[RSU] Verification result: {result}")
 
+    # Benchmark: the batch size from which the process pool pays off, for the thresholds at the top of the module.
+    # A chunked batch of n items costs overhead + n * (cost / workers + transfer) on a warm pool, against n * cost
+    # in-process, so the pool wins from n = overhead / (cost * (1 - 1 / workers) - transfer)
+    import time
+    import secrets as random_secrets
+
+    from groth16 import G1_GENERATOR, G2_GENERATOR, pairing
+
+    def break_even(cost, overhead, transfer, workers):
+
+        gain = cost * (1 - 1 / workers) - transfer
+
+        return overhead / gain if gain > 0 else float("inf")
+
+    items = [(random_secrets.token_hex(32), timestamp) for _ in range(20000)]
+    start = time.perf_counter()
+    _expected_proofs_chunk(items, otp_config())
+    hash_cost = (time.perf_counter() - start) / len(items)
+
+    # One pairing is about the cost of checking one Groth16 proof in-process
+    start = time.perf_counter()
+    pairing(G1_GENERATOR, G2_GENERATOR)
+    proof_cost = time.perf_counter() - start
+
+    with RSU({}, max_workers=2) as benchmark_rsu:
+
+        # Start the workers, then time round trips of a warm pool: empty chunks, then chunks carrying the items
+        benchmark_rsu._map_chunks(_empty_chunk, items[:2], 1)
+        start = time.perf_counter()
+
+        for _ in range(50):
+            benchmark_rsu._map_chunks(_empty_chunk, items[:2], 1)
+
+        overhead = (time.perf_counter() - start) / 50
+        start = time.perf_counter()
+        benchmark_rsu._map_chunks(_empty_chunk, items, 1)
+        transfer = max(time.perf_counter() - start - overhead, 0.0) / len(items)
+
+    print(f"[RSU] Expected proof: {hash_cost * 1e6:.2f}us, proof check: {proof_cost * 1e3:.1f}ms, "
+          f"pool round trip: {overhead * 1e3:.2f}ms + {transfer * 1e6:.2f}us per item")
+
+    for workers in sorted({BENCHMARK_WORKERS, os.cpu_count() or 1}):
+
+        if workers > 1:
+            print(f"[RSU] Break-even with {workers} workers: {break_even(hash_cost, overhead, transfer, workers):.0f} expected proofs "
+                  f"(threshold {PARALLEL_HASH_THRESHOLD}), {break_even(proof_cost, overhead, transfer, workers):.1f} proof checks "
+                  f"(threshold {PARALLEL_PROOF_THRESHOLD})")
+
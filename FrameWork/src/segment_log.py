@@ -0,0 +1,639 @@
+"""
+segment_log.py
+
+Requires: event_store.py (for AuthEvent)
+
+Persistent, append-only log of authentication events in memory-mapped segment files
+
+- Every event is a fixed-width binary record: 32-byte vehicle hash, 32-byte proof digest, 8-byte OTP timestamp,
+  8-byte recorded-at time, RSU code, status flags and a CRC32 of the record
+- Every block the ledger commits is logged as a commit record of the same width (RSU, height, size, commit time,
+  Merkle root and block hash prefix) after its events, so recovery rebuilds exactly the blocks that were committed
+- Records go into preallocated segment files that are memory-mapped, so appends are writes into the map and reads
+  unpack straight out of it without copying the file
+- A full segment is sealed (its record count written to its header and the file trimmed) and a new one is started;
+  record positions are global and stay the same across rotation and compaction
+- snapshot() stores a caller-provided state (such as the ledger's index and chain deltas) together with the log
+  position it covers, so after a crash only the records written after the last snapshot have to be replayed;
+  snapshots() reads them all back in order, for callers whose snapshots are incremental
+- On open, only unsealed segments are scanned; a torn or unwritten record (bad CRC) marks the end of the log
+- compact() merges small sealed segments and drops sealed segments that lie entirely before a retention position
+"""
+
+import bisect
+import json
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from collections import namedtuple
+
+from event_store import AuthEvent
+
+MAGIC = b"AUTHLOG1"
+HEADER_FORMAT = "<8sqqq"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Vehicle hash, proof digest, OTP timestamp, recorded-at time, RSU code, flags, padding, CRC32 of the rest
+RECORD_FORMAT = "<32s32sqqHBx"
+RECORD_BODY_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_SIZE = RECORD_BODY_SIZE + 4
+
+# Commit records share the width and the RSU code and flags offsets: Merkle root, block hash prefix, commit time,
+# height, size, RSU code, flags, padding
+COMMIT_FORMAT = "<32s24sdqqHBx"
+BLOCK_HASH_PREFIX = 24
+
+FLAG_AUTHENTICATED = 0x01
+FLAG_COMMIT = 0x02
+
+UNSEALED = -1
+DEFAULT_SEGMENT_RECORDS = 1 << 18
+
+RSUS_FILE = "rsus.json"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".seg"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".pkl"
+
+"""
+Block commit as logged after the block's events
+
+Fields:
+rsu_id (str): RSU whose chain the block belongs to
+height (int): Position of the block in the RSU's chain
+size (int): Number of events in the block
+committed_at (float): Time the block was committed
+merkle_root (bytes): Merkle root of the block's events
+block_hash (bytes): First BLOCK_HASH_PREFIX bytes of the block hash
+"""
+BlockCommit = namedtuple("BlockCommit", ("rsu_id", "height", "size", "committed_at", "merkle_root", "block_hash"))
+
+
+"""
+Segment Class
+
+One memory-mapped segment file
+- Header: magic, first global position, capacity in records, and record count (UNSEALED while it is being written)
+
+Args:
+path (str): Segment file
+"""
+class Segment:
+
+    def __init__(self, path):
+
+        self.path = path
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+        magic, self.first_position, self.capacity, count = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an authentication log segment")
+
+        self.sealed = count != UNSEALED
+        self.count = count if self.sealed else self._recover_count()
+
+
+    """
+    Create an empty, preallocated segment
+
+    Args:
+    path (str): Segment file to create
+    first_position (int): Global position of the segment's first record
+    capacity (int): Number of records the segment holds
+
+    Returns:
+    Segment: The open segment
+    """
+    @classmethod
+    def create(cls, path, first_position, capacity):
+
+        with open(path, "wb") as segment_file:
+            segment_file.write(struct.pack(HEADER_FORMAT, MAGIC, first_position, capacity, UNSEALED))
+            segment_file.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+
+        return cls(path)
+
+
+    """Count the valid records of an unsealed segment: the first record with a bad CRC ends the log"""
+    def _recover_count(self):
+
+        for slot in range(self.capacity):
+
+            offset = HEADER_SIZE + slot * RECORD_SIZE
+            (crc,) = struct.unpack_from("<I", self.map, offset + RECORD_BODY_SIZE)
+
+            if zlib.crc32(self.map[offset:offset + RECORD_BODY_SIZE]) != crc:
+
+                # Clear whatever a torn write left behind, so the slot reads as unwritten
+                self.map[offset:offset + RECORD_SIZE] = bytes(RECORD_SIZE)
+                return slot
+
+        return self.capacity
+
+
+    @property
+    def full(self):
+
+        return self.count >= self.capacity
+
+
+    """Write a record body into the next free slot"""
+    def append(self, body):
+
+        offset = HEADER_SIZE + self.count * RECORD_SIZE
+        self.map[offset:offset + RECORD_BODY_SIZE] = body
+        struct.pack_into("<I", self.map, offset + RECORD_BODY_SIZE, zlib.crc32(body))
+        self.count += 1
+
+
+    """Zero-copy view of the record in a slot"""
+    def view(self, slot):
+
+        offset = HEADER_SIZE + slot * RECORD_SIZE
+
+        return memoryview(self.map)[offset:offset + RECORD_SIZE]
+
+
+    """Flush written records to disk"""
+    def flush(self):
+
+        self.map.flush()
+
+
+    """Record the final count in the header and trim the unused preallocated space"""
+    def seal(self):
+
+        struct.pack_into(HEADER_FORMAT, self.map, 0, MAGIC, self.first_position, self.count, self.count)
+        self.map.flush()
+        self.map.close()
+        self.file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+        self.capacity = self.count
+        self.sealed = True
+        self.map = mmap.mmap(self.file.fileno(), 0) if self.count else None
+
+
+    def close(self):
+
+        if self.map is not None:
+            self.map.close()
+
+        self.file.close()
+
+
+"""
+SegmentLog Class
+
+Append-only event log over a directory of segments, with snapshots
+
+Usage:
+log = SegmentLog("ledger_data")
+position = log.append(event)
+log.append_commit(commit)
+log.snapshot(state)
+position, state = log.load_snapshot()
+for entry in log.entries(position): ...
+for position, state in log.snapshots(): ...
+
+Args:
+directory (str): Directory holding the segments, snapshots and RSU table
+segment_records (int): Records per segment before it is sealed and a new one started
+keep_snapshots (int, optional): Number of most recent snapshots kept (all of them by default, as incremental
+                                snapshots each depend on the ones before)
+"""
+class SegmentLog:
+
+    def __init__(self, directory, segment_records=DEFAULT_SEGMENT_RECORDS, keep_snapshots=None):
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.segment_records = segment_records
+        self.keep_snapshots = keep_snapshots
+        self.rsu_ids = []
+        self._rsu_codes = {}
+
+        rsus_path = os.path.join(directory, RSUS_FILE)
+
+        if os.path.exists(rsus_path):
+
+            with open(rsus_path) as rsus_file:
+                self.rsu_ids = json.load(rsus_file)
+
+            self._rsu_codes = {rsu_id: code for code, rsu_id in enumerate(self.rsu_ids)}
+
+        names = sorted(name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+        self.segments = [Segment(os.path.join(directory, name)) for name in names]
+
+        # A crash during rotation can leave an unsealed segment before the last one; seal it now
+        for segment in self.segments[:-1]:
+
+            if not segment.sealed:
+                segment.seal()
+
+        if not self.segments or self.segments[-1].sealed:
+            self._start_segment()
+
+
+    def __len__(self):
+
+        return self.segments[-1].first_position + self.segments[-1].count
+
+
+    """Global position of the oldest record still in the log (older ones were compacted away)"""
+    @property
+    def first_position(self):
+
+        return self.segments[0].first_position
+
+
+    """Path of the segment starting at a position"""
+    def _segment_path(self, first_position):
+
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_position:016d}{SEGMENT_SUFFIX}")
+
+
+    """Open a new active segment at the end of the log"""
+    def _start_segment(self):
+
+        first_position = len(self) if self.segments else 0
+        self.segments.append(Segment.create(self._segment_path(first_position), first_position, self.segment_records))
+
+
+    """Code of an RSU in the records, registering (and persisting) new RSUs"""
+    def _rsu_code(self, rsu_id):
+
+        code = self._rsu_codes.get(rsu_id)
+
+        if code is None:
+
+            code = self._rsu_codes[rsu_id] = len(self.rsu_ids)
+            self.rsu_ids.append(rsu_id)
+            temp_path = os.path.join(self.directory, RSUS_FILE + ".tmp")
+
+            with open(temp_path, "w") as rsus_file:
+                json.dump(self.rsu_ids, rsus_file)
+
+            os.replace(temp_path, os.path.join(self.directory, RSUS_FILE))
+
+        return code
+
+
+    """
+    Append an event
+
+    Args:
+    event (AuthEvent): The event
+
+    Returns:
+    int: Global position of the record
+    """
+    def append(self, event):
+
+        flags = FLAG_AUTHENTICATED if event.authenticated else 0
+        body = struct.pack(
+            RECORD_FORMAT, event.vehicle_hash, event.proof_digest, int(event.timestamp), int(event.recorded_at),
+            self._rsu_code(event.rsu_id), flags
+        )
+
+        return self._append_body(body)
+
+
+    """
+    Append a block commit record
+
+    Args:
+    commit (BlockCommit): The commit (only the first BLOCK_HASH_PREFIX bytes of its block hash are stored)
+
+    Returns:
+    int: Global position of the record
+    """
+    def append_commit(self, commit):
+
+        body = struct.pack(
+            COMMIT_FORMAT, commit.merkle_root, commit.block_hash[:BLOCK_HASH_PREFIX], float(commit.committed_at),
+            commit.height, commit.size, self._rsu_code(commit.rsu_id), FLAG_COMMIT
+        )
+
+        return self._append_body(body)
+
+
+    """Write a record body at the end of the log, rotating first if the active segment is full"""
+    def _append_body(self, body):
+
+        if self.segments[-1].full:
+            self.rotate()
+
+        position = len(self)
+        self.segments[-1].append(body)
+
+        return position
+
+
+    """Seal the active segment and start a new one"""
+    def rotate(self):
+
+        if self.segments[-1].count:
+            self.segments[-1].seal()
+            self._start_segment()
+
+
+    """Flush the active segment to disk"""
+    def flush(self):
+
+        self.segments[-1].flush()
+
+
+    """
+    Zero-copy view of a record
+
+    Args:
+    position (int): Global record position
+
+    Returns:
+    memoryview: The RECORD_SIZE bytes of the record, backed by the segment's memory map
+    """
+    def record(self, position):
+
+        if not self.first_position <= position < len(self):
+            raise IndexError(f"Log position {position} is not in the log")
+
+        index = bisect.bisect_right([segment.first_position for segment in self.segments], position) - 1
+        segment = self.segments[index]
+
+        return segment.view(position - segment.first_position)
+
+
+    """Decode the record at a position (an AuthEvent or a BlockCommit)"""
+    def read(self, position):
+
+        return self._decode(self.record(position))
+
+
+    """Turn a record into an AuthEvent, or a BlockCommit for commit records"""
+    def _decode(self, record):
+
+        if record[RECORD_BODY_SIZE - 2] & FLAG_COMMIT:
+
+            merkle_root, block_hash, committed_at, height, size, rsu_code, _flags = struct.unpack_from(COMMIT_FORMAT, record)
+
+            return BlockCommit(self.rsu_ids[rsu_code], height, size, committed_at, merkle_root, block_hash)
+
+        vehicle_hash, proof_digest, timestamp, recorded_at, rsu_code, flags = struct.unpack_from(RECORD_FORMAT, record)
+
+        return AuthEvent(self.rsu_ids[rsu_code], vehicle_hash, timestamp, recorded_at, bool(flags & FLAG_AUTHENTICATED), proof_digest)
+
+
+    """
+    Iterate over the records from a position to the end of the log
+
+    Args:
+    start (int): First global position
+
+    Yields:
+    AuthEvent or BlockCommit: Records in log order
+    """
+    def entries(self, start=0):
+
+        start = max(start, self.first_position)
+
+        for segment in self.segments:
+
+            if segment.first_position + segment.count <= start:
+                continue
+
+            for slot in range(max(start - segment.first_position, 0), segment.count):
+                yield self._decode(segment.view(slot))
+
+
+    """Iterate over the events from a position to the end of the log, skipping commit records (see entries)"""
+    def events(self, start=0):
+
+        return (entry for entry in self.entries(start) if isinstance(entry, AuthEvent))
+
+
+    """
+    Store a snapshot of the caller's state, covering every record written so far
+    - The active segment is sealed first, so the records after a snapshot always start a new segment
+
+    Args:
+    state: Picklable state rebuilt from the log up to the current position
+
+    Returns:
+    int: The log position the snapshot covers
+    """
+    def snapshot(self, state):
+
+        self.rotate()
+        self.flush()
+
+        position = len(self)
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{position:016d}{SNAPSHOT_SUFFIX}")
+        temp_path = path + ".tmp"
+
+        with open(temp_path, "wb") as snapshot_file:
+            pickle.dump({"position": position, "state": state}, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+
+        os.replace(temp_path, path)
+
+        if self.keep_snapshots:
+
+            for old in self._snapshot_names()[:-self.keep_snapshots]:
+                os.remove(os.path.join(self.directory, old))
+
+        return position
+
+
+    """Names of the snapshot files, oldest first"""
+    def _snapshot_names(self):
+
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX))
+
+
+    """
+    Load the most recent snapshot (snapshots are trusted local files written by snapshot())
+
+    Returns:
+    tuple: (position the snapshot covers, state), or (0, None) if there is no snapshot
+    """
+    def load_snapshot(self):
+
+        names = self._snapshot_names()
+
+        if not names:
+            return 0, None
+
+        with open(os.path.join(self.directory, names[-1]), "rb") as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+
+        return snapshot["position"], snapshot["state"]
+
+
+    """
+    Load every snapshot, oldest first (for incremental snapshots, each extending the ones before)
+
+    Yields:
+    tuple: (position the snapshot covers, state)
+    """
+    def snapshots(self):
+
+        for name in self._snapshot_names():
+
+            with open(os.path.join(self.directory, name), "rb") as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+
+            yield snapshot["position"], snapshot["state"]
+
+
+    """
+    Compact the sealed segments
+    - Adjacent sealed segments smaller than segment_records (left by snapshots) are merged into one file
+    - With a retention position, sealed segments that lie entirely before it (and before the latest snapshot) are
+      deleted
+
+    Args:
+    before (int, optional): Records before this global position may be dropped
+
+    Returns:
+    int: Number of segment files removed
+    """
+    def compact(self, before=None):
+
+        sealed, active = self.segments[:-1], self.segments[-1]
+        removed = 0
+
+        # Records not covered by a snapshot are still needed to recover, so they are never dropped
+        if before is not None:
+
+            names = self._snapshot_names()
+            before = min(before, int(names[-1][len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]) if names else 0)
+
+            while sealed and sealed[0].first_position + sealed[0].count <= before:
+
+                segment = sealed.pop(0)
+                segment.close()
+                os.remove(segment.path)
+                removed += 1
+
+        merged = []
+        group = []
+
+        for segment in sealed + [None]:
+
+            if segment is not None and sum(member.count for member in group) + segment.count <= self.segment_records:
+                group.append(segment)
+                continue
+
+            if len(group) > 1:
+                merged.append(self._merge(group))
+                removed += len(group) - 1
+
+            elif group:
+                merged.append(group[0])
+
+            group = [segment] if segment is not None else []
+
+        # Keep the log readable even if everything before the active segment was dropped
+        self.segments = merged + [active]
+
+        return removed
+
+
+    """Merge adjacent sealed segments into one sealed segment"""
+    def _merge(self, group):
+
+        count = sum(segment.count for segment in group)
+        first_position = group[0].first_position
+        temp_path = self._segment_path(first_position) + ".tmp"
+
+        with open(temp_path, "wb") as merged_file:
+
+            merged_file.write(struct.pack(HEADER_FORMAT, MAGIC, first_position, count, count))
+
+            for segment in group:
+
+                if segment.count:
+                    merged_file.write(segment.map[HEADER_SIZE:HEADER_SIZE + segment.count * RECORD_SIZE])
+
+            merged_file.flush()
+            os.fsync(merged_file.fileno())
+
+        for segment in group:
+            segment.close()
+
+        os.replace(temp_path, self._segment_path(first_position))
+
+        for segment in group[1:]:
+            os.remove(segment.path)
+
+        return Segment(self._segment_path(first_position))
+
+
+    def close(self):
+
+        self.flush()
+
+        for segment in self.segments:
+            segment.close()
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+if __name__ == "__main__":
+
+    # Simple test for the segment log: append, snapshot, crash mid-write, recover and compact
+    import hashlib
+    import shutil
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp()
+    digest = hashlib.sha256(b"proof").digest()
+    events = [AuthEvent(f"RSU{i % 4}", hashlib.sha256(f"VEH{i}".encode()).digest(), 1700000000 + i, 1700000000 + i, i % 50 != 0, digest) for i in range(190000)]
+
+    log = SegmentLog(directory, segment_records=50000)
+    start = time.perf_counter()
+
+    for event in events[:150000]:
+        log.append(event)
+
+    print(f"[Segment Log] Appended 150000 records in {time.perf_counter() - start:.2f}s across {len(log.segments)} segments")
+
+    log.snapshot({"events_seen": len(log)})
+
+    for event in events[150000:]:
+        log.append(event)
+
+    # Simulate a crash: a torn record after the last complete one, and no clean close
+    log.flush()
+    segment = log.segments[-1]
+    offset = HEADER_SIZE + segment.count * RECORD_SIZE
+    segment.map[offset:offset + 10] = b"\xff" * 10
+    segment.flush()
+
+    start = time.perf_counter()
+    recovered = SegmentLog(directory, segment_records=50000)
+    position, state = recovered.load_snapshot()
+    tail = sum(1 for _event in recovered.events(position))
+
+    print(f"[Segment Log] Recovered {len(recovered)} records in {(time.perf_counter() - start) * 1000:.1f}ms: snapshot at {position}, {tail} records replayed")
+    print(f"[Segment Log] Records intact: {recovered.read(123456) == events[123456] and recovered.read(len(recovered) - 1) == events[-1]}")
+
+    removed = recovered.compact(before=100000)
+    print(f"[Segment Log] Compaction removed {removed} segment files; log now starts at {recovered.first_position}")
+
+    recovered.close()
+    shutil.rmtree(directory)
@@ -0,0 +1,686 @@
+"""
+simulation.py
+
+Requires: clock.py, fleet.py, vehicle.py, rsu.py, blockchain.py, ledger.py, sumo_stream.py, spatial_index.py and
+trace_cache.py (both optional, with numpy)
+
+Discrete-event simulation of vehicles authenticating at RSUs and the results being committed to the ledger
+
+- A heap-ordered event queue drives a VirtualClock, so tens of thousands of vehicles can be simulated
+  without real time passing; the clock is installed process-wide while the simulation runs, so OTPs,
+  RSU time windows and ledger timestamps all see simulated time
+- Vehicles, RSUs and the ledger are actors that schedule each other's events: arrival at an RSU, OTP generation,
+  proving delay, transmission, verification and ledger commit
+- RSUs serve requests with a fixed number of servers and a service time, and report queueing delay and utilization
+- Arrivals can be streamed from SUMO traces (see sumo_stream.py) with feed_arrivals(), which keeps only the next
+  arrival of the trace in the event queue
+- replay_trace() pushes the demand of a SUMO scenario through the Vehicle -> RSU -> ledger pipeline, creating
+  vehicles and RSUs only when they are first needed, and reports sustained auth/s and backlog per RSU; given the
+  scenario's network, vehicles of a full-output or FCD trace authenticate at the junction RSU they first come into
+  range of (spatial_index.py)
+- Where numpy is installed, replay_trace() reads the departures of tripinfos and route files through the columnar
+  trace cache (trace_cache.py), so repeated replays of a scenario skip XML parsing
+"""
+
+import heapq
+import itertools
+import random
+import zlib
+from collections import deque
+
+from clock import VirtualClock, set_clock
+from fleet import Fleet
+from vehicle import Vehicle
+from rsu import RSU
+from blockchain import simulate_blockchain_verification
+from ledger import Ledger
+from sumo_stream import vehicle_arrivals, root_tag, DEFAULT_MAX_TRIP_DURATION
+
+# The trace cache needs numpy; without it, traces are streamed from their XML every time
+try:
+    from trace_cache import cached_departures, DEPARTURE_KINDS
+
+except ImportError:
+    cached_departures = None
+
+# Root tags of the traces that carry vehicle positions, which RSUs placed on a network need
+POSITION_TRACE_TAGS = ("full-export", "fcd-export")
+
+
+"""
+Build a delay sampler drawing from an exponential distribution
+
+Args:
+mean (float): Mean delay in seconds
+
+Returns:
+callable: Takes a random.Random and returns a delay in seconds
+"""
+def exponential(mean):
+
+    return lambda rng: rng.expovariate(1.0 / mean)
+
+
+"""Draw a delay that is either a constant or a sampler built by e.g. exponential()"""
+def _sample(delay, rng):
+
+    return delay(rng) if callable(delay) else delay
+
+
+"""
+Simulator Class
+
+Heap-based discrete-event scheduler on a virtual clock
+- Events are (time, sequence, action, args) entries; ties run in scheduling order, so runs are deterministic
+
+Usage:
+simulator = Simulator(start=1700000000)
+simulator.schedule(1.5, print, "hello")
+simulator.run()
+
+Args:
+start (float): Virtual Unix time the simulation starts at
+seed (int): Seed of the random generator shared by all actors
+"""
+class Simulator:
+
+    def __init__(self, start=0.0, seed=0):
+
+        self.clock = VirtualClock(start)
+        self.start = float(start)
+        self.rng = random.Random(seed)
+        self.events_processed = 0
+        self._queue = []
+        self._sequence = itertools.count()
+
+
+    @property
+    def now(self):
+
+        return self.clock.time()
+
+
+    """Number of events still waiting in the queue"""
+    @property
+    def pending(self):
+
+        return len(self._queue)
+
+
+    """
+    Schedule an action after a delay
+
+    Args:
+    delay (float): Seconds from now
+    action (callable): Called with args when the event fires
+    """
+    def schedule(self, delay, action, *args):
+
+        heapq.heappush(self._queue, (self.now + delay, next(self._sequence), action, args))
+
+
+    """
+    Run events in time order until the queue is empty or the time limit is reached
+
+    Args:
+    until (float, optional): Virtual time to stop at
+    """
+    def run(self, until=None):
+
+        previous = set_clock(self.clock)
+
+        try:
+
+            while self._queue and (until is None or self._queue[0][0] <= until):
+
+                timestamp, _sequence, action, args = heapq.heappop(self._queue)
+                self.clock.set(timestamp)
+                action(*args)
+                self.events_processed += 1
+
+            if until is not None and until > self.now:
+                self.clock.set(until)
+
+        finally:
+            set_clock(previous)
+
+
+"""
+VehicleActor Class
+
+Vehicle that arrives at an RSU, generates its OTP, proves it and transmits the proof
+
+Args:
+simulator (Simulator): The simulation the vehicle runs in
+vehicle (Vehicle or FleetVehicle): Vehicle generating OTPs and proofs
+rsu (RSUActor): RSU the vehicle authenticates at
+proving_delay (float or callable): Time to create the proof
+transmission_delay (float or callable): Time for the proof to reach the RSU
+"""
+class VehicleActor:
+
+    def __init__(self, simulator, vehicle, rsu, proving_delay=0.05, transmission_delay=0.005):
+
+        self.simulator = simulator
+        self.vehicle = vehicle
+        self.rsu = rsu
+        self.proving_delay = proving_delay
+        self.transmission_delay = transmission_delay
+
+
+    """Arrival at the RSU: the vehicle starts authenticating right away"""
+    def arrive(self):
+
+        self.simulator.schedule(0.0, self.generate_otp, self.simulator.now)
+
+
+    """OTP generation for the current time step, then proving"""
+    def generate_otp(self, arrived_at):
+
+        otp, timestamp = self.vehicle.generate_otp()
+        self.simulator.schedule(_sample(self.proving_delay, self.simulator.rng), self.proved, otp, timestamp, arrived_at)
+
+
+    """Proof finished: transmit it to the RSU"""
+    def proved(self, otp, timestamp, arrived_at):
+
+        request = {
+            "vehicle_id": self.vehicle.vehicle_id,
+            "proof": self.vehicle.create_zkp(otp, timestamp),
+            "timestamp": timestamp,
+            "arrived_at": arrived_at
+        }
+
+        self.simulator.schedule(_sample(self.transmission_delay, self.simulator.rng), self.rsu.receive, request)
+
+
+"""
+RSUActor Class
+
+RSU with a request queue served by a fixed number of verification servers
+- Requests wait in FIFO order while all servers are busy; the wait is recorded as queueing delay
+- Verified requests are forwarded to the ledger
+- The backlog (requests waiting or being verified) is integrated over time on every change, so its mean is
+  time-weighted and its max is exact
+
+Args:
+simulator (Simulator): The simulation the RSU runs in
+rsu (RSU): RSU verifying the proofs
+service_time (float or callable): Time one server needs to verify a request
+servers (int): Number of requests verified in parallel
+ledger (LedgerActor, optional): Ledger the results are committed to
+rsu_id (str): Identifier of the RSU, whose ledger chain its results are committed to
+on_verified (callable, optional): Called with each request and its result once it has been verified
+"""
+class RSUActor:
+
+    def __init__(self, simulator, rsu, service_time=0.002, servers=1, ledger=None, rsu_id="RSU", on_verified=None):
+
+        self.simulator = simulator
+        self.rsu = rsu
+        self.rsu_id = rsu_id
+        self.service_time = service_time
+        self.servers = servers
+        self.ledger = ledger
+        self.on_verified = on_verified
+        self.queue = deque()
+        self.busy = 0
+        self.busy_time = 0.0
+        self.processed = 0
+        self.accepted = 0
+        self.total_queueing_delay = 0.0
+        self.max_queueing_delay = 0.0
+        self.max_queue_length = 0
+        self.max_backlog = 0
+        self.backlog_area = 0.0
+        self._backlog_since = simulator.now
+
+
+    """Requests waiting or being verified"""
+    @property
+    def backlog(self):
+
+        return len(self.queue) + self.busy
+
+
+    """Add the current backlog's time to the backlog integral; called before every change of the backlog"""
+    def _integrate_backlog(self):
+
+        now = self.simulator.now
+        self.backlog_area += self.backlog * (now - self._backlog_since)
+        self._backlog_since = now
+
+
+    """Transmission received: serve it now or queue it"""
+    def receive(self, request):
+
+        request["received_at"] = self.simulator.now
+        request["rsu_id"] = self.rsu_id
+        self._integrate_backlog()
+
+        if self.busy < self.servers:
+            self._start(request)
+
+        else:
+            self.queue.append(request)
+            self.max_queue_length = max(self.max_queue_length, len(self.queue))
+
+        self.max_backlog = max(self.max_backlog, self.backlog)
+
+
+    """Start verifying a request on a free server"""
+    def _start(self, request):
+
+        delay = self.simulator.now - request["received_at"]
+        self.total_queueing_delay += delay
+        self.max_queueing_delay = max(self.max_queueing_delay, delay)
+        self.busy += 1
+        self.simulator.schedule(_sample(self.service_time, self.simulator.rng), self.verified, request, self.simulator.now)
+
+
+    """Verification finished: record the result, hand it to the ledger and serve the next request"""
+    def verified(self, request, started_at):
+
+        result = self.rsu.verify_zkp(request["vehicle_id"], request["proof"], request["timestamp"])
+        self._integrate_backlog()
+        self.busy -= 1
+        self.busy_time += self.simulator.now - started_at
+        self.processed += 1
+        self.accepted += result
+
+        if self.ledger is not None:
+            self.ledger.submit(request, result)
+
+        if self.on_verified is not None:
+            self.on_verified(request, result)
+
+        if self.queue:
+            self._start(self.queue.popleft())
+
+
+    """
+    Summarize the RSU's load
+
+    Returns:
+    dict: Processed and accepted requests, auth/s over the run, mean and max queueing delay, max queue length,
+          time-weighted mean and max backlog, and utilization
+    """
+    def stats(self):
+
+        elapsed = self.simulator.now - self.simulator.start
+        backlog_area = self.backlog_area + self.backlog * (self.simulator.now - self._backlog_since)
+
+        return {
+            "processed": self.processed,
+            "accepted": self.accepted,
+            "auth_per_s": self.processed / elapsed if elapsed > 0 else 0.0,
+            "mean_queueing_delay": self.total_queueing_delay / self.processed if self.processed else 0.0,
+            "max_queueing_delay": self.max_queueing_delay,
+            "max_queue_length": self.max_queue_length,
+            "mean_backlog": backlog_area / elapsed if elapsed > 0 else 0.0,
+            "max_backlog": self.max_backlog,
+            "utilization": self.busy_time / (self.servers * elapsed) if elapsed > 0 else 0.0
+        }
+
+
+"""
+LedgerActor Class
+
+Blockchain ledger that commits authentication results after a commit delay
+- Results are logged through blockchain.simulate_blockchain_verification into a Merkle-batched Ledger
+  running on the simulation's clock, one chain per RSU
+
+Args:
+simulator (Simulator): The simulation the ledger runs in
+commit_delay (float or callable): Time from submission to commit
+ledger (Ledger, optional): Ledger the results are recorded into (a new one on the simulation's clock by default)
+"""
+class LedgerActor:
+
+    def __init__(self, simulator, commit_delay=0.5, ledger=None):
+
+        self.simulator = simulator
+        self.commit_delay = commit_delay
+        self.ledger = Ledger(clock=simulator.clock) if ledger is None else ledger
+        self.committed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        # Virtual time of the scheduled commit_due() check, if any
+        self._due_at = None
+
+
+    """Accept an authentication result for commit"""
+    def submit(self, request, result):
+
+        self.simulator.schedule(_sample(self.commit_delay, self.simulator.rng), self.commit, request, result)
+
+
+    """Commit a result and record its end-to-end latency from vehicle arrival"""
+    def commit(self, request, result):
+
+        simulate_blockchain_verification(request["vehicle_id"], request["proof"], request["timestamp"], result, request["rsu_id"], self.ledger)
+
+        latency = self.simulator.now - request["arrived_at"]
+        self.committed += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        self._schedule_commit_due()
+
+
+    """Schedule a commit_due() check for when the ledger's oldest pending batch becomes due, unless one comes sooner"""
+    def _schedule_commit_due(self):
+
+        due = self.ledger.next_due()
+
+        if due is not None and (self._due_at is None or due < self._due_at):
+            self._due_at = due
+            self.simulator.schedule(max(due - self.simulator.now, 0.0), self._commit_due, due)
+
+
+    """Commit the ledger's due batches, so an RSU that stops submitting still has its batch committed on time"""
+    def _commit_due(self, due):
+
+        # Superseded by a sooner check
+        if due != self._due_at:
+            return
+
+        self._due_at = None
+        self.ledger.commit_due(due)
+        self._schedule_commit_due()
+
+
+    """
+    Summarize committed results
+
+    Returns:
+    dict: Committed results, mean and max latency from vehicle arrival to commit, and the ledger's block stats
+          under "chain"
+    """
+    def stats(self):
+
+        return {
+            "committed": self.committed,
+            "mean_latency": self.total_latency / self.committed if self.committed else 0.0,
+            "max_latency": self.max_latency,
+            "chain": self.ledger.stats()
+        }
+
+
+"""
+Open the persistent ledger of a simulation on its clock, recovering it from the last snapshot in the directory
+
+Args:
+simulator (Simulator): The simulation the ledger runs in
+ledger_dir (str, optional): Directory of the ledger's segment log
+snapshot_every (int, optional): Events between automatic snapshots
+
+Returns:
+Ledger or None: The ledger, or None without a directory (LedgerActor then uses an in-memory ledger)
+"""
+def open_ledger(simulator, ledger_dir, snapshot_every=None):
+
+    if ledger_dir is None:
+        return None
+
+    return Ledger.open(ledger_dir, clock=simulator.clock, snapshot_every=snapshot_every)
+
+
+"""Commit what is pending at the end of a run; a persistent ledger is also snapshotted (and compacted) and closed"""
+def close_ledger(ledger):
+
+    ledger.flush()
+
+    if ledger.log is not None:
+        ledger.snapshot()
+        ledger.close()
+
+
+"""
+Schedule a time-ordered stream of arrivals lazily, pulling the next arrival only when the previous one fires
+
+Args:
+simulator (Simulator): The simulation to feed
+arrivals (iterable of tuple): (time, vehicle_id, ...) tuples, with times in seconds from the simulation start
+on_arrival (callable): Called with the vehicle ID (and any further fields of its arrival) when the vehicle arrives
+"""
+def feed_arrivals(simulator, arrivals, on_arrival):
+
+    arrivals = iter(arrivals)
+
+    def schedule_next():
+
+        arrival = next(arrivals, None)
+
+        if arrival is not None:
+
+            # Out-of-order arrivals are delivered immediately rather than in the past
+            time, *details = arrival
+            simulator.schedule(max(simulator.start + time - simulator.now, 0.0), arrive, *details)
+
+    def arrive(*details):
+
+        on_arrival(*details)
+        schedule_next()
+
+    schedule_next()
+
+
+"""
+Simulate a fleet arriving at a group of RSUs as a Poisson process
+
+Args:
+num_vehicles (int): Number of vehicles, each authenticating once
+num_rsus (int): Number of RSUs; each vehicle picks one at random
+arrival_rate (float): Mean vehicle arrivals per second across all RSUs
+proving_delay (float or callable): Time for a vehicle to create its proof
+transmission_delay (float or callable): Time for a proof to reach the RSU
+service_time (float or callable): Time for an RSU server to verify a proof
+servers (int): Verification servers per RSU
+commit_delay (float or callable): Time for the ledger to commit a result
+seed (int): Random seed, so runs are reproducible
+start (float): Virtual Unix time the simulation starts at
+ledger_dir (str, optional): Directory of a persistent ledger (see Ledger.open); a run that crashed restarts its
+                            ledger from the last snapshot there, and every run ends with a snapshot
+snapshot_every (int, optional): Events between automatic snapshots of a persistent ledger
+
+Returns:
+dict: Per-RSU stats under "rsus", ledger stats under "ledger", and the simulated duration and event count
+"""
+def run_simulation(num_vehicles, num_rsus=1, arrival_rate=100.0, proving_delay=0.05, transmission_delay=0.005,
+                   service_time=0.002, servers=1, commit_delay=0.5, seed=0, start=1700000000.0, ledger_dir=None,
+                   snapshot_every=None):
+
+    simulator = Simulator(start=start, seed=seed)
+    fleet = Fleet.generate(num_vehicles)
+    ledger = LedgerActor(simulator, commit_delay, open_ledger(simulator, ledger_dir, snapshot_every))
+    rsus = [RSUActor(simulator, RSU(fleet), service_time, servers, ledger, f"RSU{index}") for index in range(num_rsus)]
+
+    arrival = 0.0
+
+    for vehicle in fleet:
+
+        arrival += simulator.rng.expovariate(arrival_rate)
+        actor = VehicleActor(simulator, vehicle, simulator.rng.choice(rsus), proving_delay, transmission_delay)
+        simulator.schedule(arrival, actor.arrive)
+
+    simulator.run()
+    close_ledger(ledger.ledger)
+
+    return {
+        "rsus": [rsu.stats() for rsu in rsus],
+        "ledger": ledger.stats(),
+        "duration": simulator.now - simulator.start,
+        "events": simulator.events_processed
+    }
+
+
+"""
+Replay the traffic demand of a SUMO scenario through vehicles, RSUs and the ledger
+- Every vehicle of the trace authenticates once, when it enters the network
+- Vehicles (with a random secret) and RSUs are created on demand, on the first arrival that needs them;
+  a vehicle is assigned to one of num_rsus RSUs by a hash of its ID
+- With net_path, there is instead one RSU per junction of the network (spatial_index.RSUGrid) and a vehicle of a
+  full-output or FCD trace authenticates at the first timestep it is within radio_range of one, at the nearest
+- Tripinfos and route files are read through the trace cache where numpy is installed (trace_cache.py); otherwise
+  tripinfos are read in departure order through sumo_stream's bounded reorder buffer
+- A vehicle's secret is dropped once its request has been verified, so memory follows the vehicles in flight
+  rather than the trace
+- Every report_interval seconds the throughput of each RSU is sampled, so the stats show the sustained rate the
+  RSU kept up with, not just an average over idle periods; backlog mean and max come from RSUActor's
+  time-weighted backlog
+
+Args:
+path (str): Route file, tripinfos, full-output, FCD output or netstate dump of the scenario
+num_rsus (int): Number of RSUs the scenario's vehicles are spread over (without net_path)
+demand_scale (float): Factor the trace's arrival rate is multiplied with (2.0 replays the demand twice as fast)
+limit (int, optional): Replay only the first limit arrivals
+report_interval (float): Seconds of virtual time between throughput samples
+proving_delay, transmission_delay, service_time, servers, commit_delay: As in run_simulation
+seed (int): Random seed for secrets and delays, so runs are reproducible
+start (float): Virtual Unix time the trace's time 0 is mapped to
+ledger_dir, snapshot_every: As in run_simulation
+max_trip_duration (float): Longest trip expected in tripinfos (see sumo_stream.tripinfo_departures)
+net_path (str, optional): SUMO .net.xml of the scenario, to place an RSU at each junction (needs numpy and a
+                          full-output or FCD trace)
+radio_range (float): Radio range of the junction RSUs in meters, with net_path
+use_trace_cache (bool): Read tripinfos and route files through trace_cache.py when numpy is installed
+
+Returns:
+dict: Per-RSU stats under "rsus" (keyed by RSU index, only RSUs that were used), ledger stats under "ledger",
+      the number of vehicles, the simulated duration and the event count; each RSU's stats add sustained
+      (mean of busy intervals) and peak auth/s
+
+Raises:
+ValueError: If net_path is given with a trace that has no vehicle positions
+"""
+def replay_trace(path, num_rsus=4, demand_scale=1.0, limit=None, report_interval=60.0, proving_delay=0.05,
+                 transmission_delay=0.005, service_time=0.002, servers=1, commit_delay=0.5, seed=0,
+                 start=1700000000.0, ledger_dir=None, snapshot_every=None, max_trip_duration=DEFAULT_MAX_TRIP_DURATION,
+                 net_path=None, radio_range=150.0, use_trace_cache=True):
+
+    simulator = Simulator(start=start, seed=seed)
+    ledger = LedgerActor(simulator, commit_delay, open_ledger(simulator, ledger_dir, snapshot_every))
+    vehicle_secrets = {}
+    rsus = {}
+    samples = {}
+    vehicles = 0
+
+    if net_path is not None:
+
+        if root_tag(path) not in POSITION_TRACE_TAGS:
+            raise ValueError("RSUs placed on a network need a full-output or FCD trace with vehicle positions")
+
+        # Imported here, so replays without a network do not need numpy
+        from spatial_index import RSUGrid, rsu_arrivals
+
+        grid = RSUGrid.from_net(net_path, radio_range)
+        arrivals = rsu_arrivals(path, grid)
+
+    elif use_trace_cache and cached_departures is not None and root_tag(path) in DEPARTURE_KINDS:
+        arrivals = cached_departures(path)
+
+    else:
+        arrivals = vehicle_arrivals(path, max_trip_duration)
+
+    arrivals = ((time / demand_scale, *details) for time, *details in itertools.islice(arrivals, limit))
+
+    # Every vehicle authenticates once, so its secret is no longer needed after its request is verified
+    def release_secret(request, _result):
+
+        vehicle_secrets.pop(request["vehicle_id"], None)
+
+    def rsu_for(vehicle_id, index=None):
+
+        if index is None:
+            index = zlib.crc32(vehicle_id.encode()) % num_rsus
+
+        if index not in rsus:
+            rsu_id = f"RSU{index}" if net_path is None else f"RSU-{grid.ids[index]}"
+            rsus[index] = RSUActor(simulator, RSU(vehicle_secrets), service_time, servers, ledger, rsu_id, release_secret)
+            samples[index] = []
+
+        return rsus[index]
+
+    def on_arrival(vehicle_id, index=None):
+        nonlocal vehicles
+
+        vehicles += 1
+        secret = f"{simulator.rng.getrandbits(256):064x}"
+        vehicle_secrets[vehicle_id] = secret
+        VehicleActor(simulator, Vehicle(vehicle_id, secret), rsu_for(vehicle_id, index), proving_delay, transmission_delay).arrive()
+
+    last_processed = {}
+
+    def sample():
+
+        for index, rsu in rsus.items():
+
+            samples[index].append((rsu.processed - last_processed.get(index, 0)) / report_interval)
+            last_processed[index] = rsu.processed
+
+        # Keep sampling while anything else is still scheduled
+        if simulator.pending:
+            simulator.schedule(report_interval, sample)
+
+    feed_arrivals(simulator, arrivals, on_arrival)
+    simulator.schedule(report_interval, sample)
+    simulator.run()
+    close_ledger(ledger.ledger)
+
+    results = {}
+
+    for index, rsu in sorted(rsus.items()):
+
+        rates = [rate for rate in samples[index] if rate > 0]
+        stats = rsu.stats()
+        stats["sustained_auth_per_s"] = sum(rates) / len(rates) if rates else 0.0
+        stats["peak_auth_per_s"] = max(rates, default=0.0)
+        results[index] = stats
+
+    return {
+        "rsus": results,
+        "ledger": ledger.stats(),
+        "vehicles": vehicles,
+        "duration": simulator.now - simulator.start,
+        "events": simulator.events_processed
+    }
+
+
+if __name__ == "__main__":
+
+    # Simple test for the simulator: 20000 vehicles at four RSUs, with exponential proving and service times
+    import time
+
+    wall_start = time.perf_counter()
+    results = run_simulation(
+        20000,
+        num_rsus=4,
+        arrival_rate=1500.0,
+        proving_delay=exponential(0.05),
+        service_time=exponential(0.002)
+    )
+    wall_time = time.perf_counter() - wall_start
+
+    print(f"[Simulation] {results['events']} events covering {results['duration']:.1f}s of virtual time in {wall_time:.2f}s")
+
+    for index, stats in enumerate(results["rsus"]):
+        print(f"[Simulation] RSU {index}: {stats}")
+
+    print(f"[Simulation] Ledger: {results['ledger']}")
+
+    # Replay of the Bologna Pasubio scenario's demand, ten times faster than recorded
+    import os
+
+    sumo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "SUMO")
+    tripinfos = os.path.join(sumo_dir, "Existing Sims with Focus on Realistic Demands", "Bologna_small-0.29.0", "pasubio", "tripinfos.xml")
+
+    wall_start = time.perf_counter()
+    results = replay_trace(tripinfos, num_rsus=4, demand_scale=10.0)
+    wall_time = time.perf_counter() - wall_start
+
+    print(f"[Simulation] Replayed {results['vehicles']} vehicles over {results['duration']:.1f}s of virtual time in {wall_time:.2f}s")
+
+    for index, stats in results["rsus"].items():
+        print(f"[Simulation] RSU {index}: {stats['sustained_auth_per_s']:.2f} auth/s sustained, {stats['peak_auth_per_s']:.2f} peak, max backlog {stats['max_backlog']}")
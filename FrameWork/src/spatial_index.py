@@ -0,0 +1,312 @@
+"""
+spatial_index.py
+
+Requires: sumo_stream.py, numpy
+
+Places RSUs at the junctions of a SUMO network and assigns vehicles to the RSUs within radio range
+
+- RSU positions come from the <junction> elements of a .net.xml file (internal junctions and dead ends are skipped)
+- RSUGrid is a uniform grid index with cells as wide as the radio range, so every RSU in range of a point lies in
+  the point's cell or one of its eight neighbours
+- Queries take whole arrays of positions (millions per simulated minute) and run as a handful of vectorized NumPy
+  passes, one per neighbouring cell and RSU slot, instead of a Python loop per vehicle
+- assign_timestep() maps one timestep of a full-output or FCD trace (see sumo_stream.iter_timesteps) to RSUs, and
+  rsu_arrivals() streams the moments vehicles first come into range of an RSU, for simulation.replay_trace()
+"""
+
+import numpy as np
+
+from sumo_stream import iter_top_level, iter_timesteps
+
+# Junction types that do not get an RSU
+SKIPPED_JUNCTION_TYPES = ("internal", "dead_end")
+
+# Points processed per vectorized pass, which bounds the size of temporary arrays
+QUERY_CHUNK = 1 << 20
+
+NEIGHBOUR_OFFSETS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+"""
+Read RSU sites from the junctions of a SUMO network
+
+Args:
+path (str): SUMO .net.xml file
+skip_types (tuple of str): Junction types that are left out
+
+Returns:
+tuple: (junction IDs (list of str), positions (numpy array of shape (n, 2)))
+"""
+def read_junctions(path, skip_types=SKIPPED_JUNCTION_TYPES):
+
+    ids = []
+    coordinates = []
+
+    for _root_tag, element in iter_top_level(path):
+
+        if element.tag != "junction" or element.get("type") in skip_types:
+            continue
+
+        ids.append(element.get("id"))
+        coordinates.append((float(element.get("x")), float(element.get("y"))))
+
+    return ids, np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+
+
+"""
+RSUGrid Class
+
+Uniform grid index over RSU positions for radio-range queries
+- RSUs are sorted by grid cell, so each occupied cell is a contiguous run of RSUs found by binary search
+- Results refer to RSUs by their index in the positions passed in (and ids, when given)
+
+Usage:
+grid = RSUGrid.from_net("threebythreecityblock.net.xml", radio_range=150.0)
+rsu, distance = grid.nearest(positions)
+points, rsus, distances = grid.within_range(positions)
+
+Args:
+positions (array-like): RSU positions, shape (n, 2)
+radio_range (float): Radio range in network units (meters)
+ids (list of str, optional): RSU identifiers, such as junction IDs
+"""
+class RSUGrid:
+
+    def __init__(self, positions, radio_range, ids=None):
+
+        if radio_range <= 0:
+            raise ValueError("Radio range must be positive")
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+
+        self.positions = positions
+        self.radio_range = float(radio_range)
+        self.ids = ids
+        self.origin = positions.min(axis=0) if len(positions) else np.zeros(2)
+
+        cells = self._cells(positions)
+        self.shape = cells.max(axis=0) + 1 if len(positions) else np.ones(2, dtype=np.int64)
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+
+        # RSUs sorted by cell; each occupied cell is a (key, start, count) run in that order
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_positions = positions[self.order]
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+
+    """
+    Build the index with one RSU per junction of a SUMO network
+
+    Args:
+    path (str): SUMO .net.xml file
+    radio_range (float): Radio range in meters
+    skip_types (tuple of str): Junction types that get no RSU
+
+    Returns:
+    RSUGrid: The index, with the junction IDs as RSU IDs
+    """
+    @classmethod
+    def from_net(cls, path, radio_range, skip_types=SKIPPED_JUNCTION_TYPES):
+
+        ids, positions = read_junctions(path, skip_types)
+
+        return cls(positions, radio_range, ids)
+
+
+    def __len__(self):
+
+        return len(self.positions)
+
+
+    """Grid cell (column, row) of each position"""
+    def _cells(self, positions):
+
+        return np.floor((positions - self.origin) / self.radio_range).astype(np.int64)
+
+
+    """
+    Yield the candidate RSUs of a chunk of points, one vectorized pass per neighbouring cell and RSU slot
+
+    Yields:
+    tuple: (indices of the points with a candidate in this pass, candidate RSU index in sorted order, squared distance)
+    """
+    def _candidates(self, points):
+
+        cells = self._cells(points)
+
+        for dx, dy in NEIGHBOUR_OFFSETS:
+
+            columns = cells[:, 0] + dx
+            rows = cells[:, 1] + dy
+            inside = np.flatnonzero((columns >= 0) & (columns < self.shape[0]) & (rows >= 0) & (rows < self.shape[1]))
+            keys = columns[inside] * self.shape[1] + rows[inside]
+
+            slots = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+            found = self.cell_keys[slots] == keys
+            indices = inside[found]
+            starts = self.cell_starts[slots[found]]
+            counts = self.cell_counts[slots[found]]
+
+            for slot in range(int(counts.max(initial=0))):
+
+                if slot:
+                    present = counts > slot
+                    indices, starts, counts = indices[present], starts[present], counts[present]
+
+                candidates = starts + slot
+                offsets = self.sorted_positions[candidates] - points[indices]
+
+                yield indices, candidates, np.einsum("ij,ij->i", offsets, offsets)
+
+
+    """
+    Find the nearest RSU within radio range of every point
+
+    Args:
+    points (array-like): Vehicle positions, shape (m, 2)
+
+    Returns:
+    tuple: (RSU index per point (numpy int64 array, -1 if none is in range), distance per point (inf if none))
+    """
+    def nearest(self, points):
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        nearest = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+
+        if not len(self):
+            return nearest, distances
+
+        limit = self.radio_range ** 2
+
+        for first in range(0, len(points), QUERY_CHUNK):
+
+            chunk = points[first:first + QUERY_CHUNK]
+            best = np.full(len(chunk), limit)
+            best_rsu = np.full(len(chunk), -1, dtype=np.int64)
+
+            # Within one pass every point appears at most once, so scattered updates cannot collide
+            for indices, candidates, squared in self._candidates(chunk):
+
+                better = squared <= best[indices]
+                best[indices[better]] = squared[better]
+                best_rsu[indices[better]] = candidates[better]
+
+            hit = best_rsu >= 0
+            nearest[first:first + QUERY_CHUNK][hit] = self.order[best_rsu[hit]]
+            distances[first:first + QUERY_CHUNK][hit] = np.sqrt(best[hit])
+
+        return nearest, distances
+
+
+    """
+    Find every RSU within radio range of every point
+
+    Args:
+    points (array-like): Vehicle positions, shape (m, 2)
+
+    Returns:
+    tuple: (point indices, RSU indices, distances) as parallel numpy arrays, sorted by point and then distance
+    """
+    def within_range(self, points):
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        point_parts, rsu_parts, squared_parts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)], [np.empty(0)]
+        limit = self.radio_range ** 2
+
+        for first in range(0, len(points) if len(self) else 0, QUERY_CHUNK):
+
+            chunk = points[first:first + QUERY_CHUNK]
+
+            for indices, candidates, squared in self._candidates(chunk):
+
+                hits = squared <= limit
+                point_parts.append(indices[hits] + first)
+                rsu_parts.append(self.order[candidates[hits]])
+                squared_parts.append(squared[hits])
+
+        point_indices = np.concatenate(point_parts)
+        rsu_indices = np.concatenate(rsu_parts)
+        squared = np.concatenate(squared_parts)
+        order = np.lexsort((squared, point_indices))
+
+        return point_indices[order], rsu_indices[order], np.sqrt(squared[order])
+
+
+    """
+    Assign the vehicles of one trace timestep to their nearest RSU in range
+
+    Args:
+    states (list of dict): Vehicle states of one timestep from sumo_stream.iter_timesteps (with x and y)
+
+    Returns:
+    dict: vehicle_id -> RSU index, for vehicles with an RSU in range
+    """
+    def assign_timestep(self, states):
+
+        positions = np.array([(state["x"], state["y"]) for state in states if state["x"] is not None], dtype=np.float64)
+        vehicle_ids = [state["id"] for state in states if state["x"] is not None]
+        nearest, _distances = self.nearest(positions)
+
+        return {vehicle_ids[i]: int(nearest[i]) for i in np.flatnonzero(nearest >= 0)}
+
+
+"""
+Stream the moments vehicles of a timestep trace come into range of an RSU
+- A vehicle arrives at the first timestep it is in range of any RSU, at the nearest one; like
+  sumo_stream.vehicle_arrivals(), only the vehicles of the previous timestep are remembered, so a vehicle that
+  leaves the network and comes back arrives again
+
+Args:
+path (str): Full-output or FCD trace (netstate dumps have no positions)
+grid (RSUGrid): RSU index
+
+Yields:
+tuple: (time (float), vehicle_id (str), RSU index (int)), in time order
+"""
+def rsu_arrivals(path, grid):
+
+    present = set()
+
+    for time, states in iter_timesteps(path):
+
+        assignments = grid.assign_timestep(states)
+
+        for vehicle_id, rsu in assignments.items():
+
+            if vehicle_id not in present:
+                yield time, vehicle_id, rsu
+
+        # Vehicles out of range stay unauthenticated until they reach an RSU
+        present = {state["id"] for state in states if state["id"] in present or state["id"] in assignments}
+
+
+if __name__ == "__main__":
+
+    # Simple test for the grid index: a million vehicle positions against the 3x3 city block's junctions
+    import os
+    import time
+
+    net = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "SUMO", "NetMap Starting Places", "threebythreecityblock.net.xml")
+    grid = RSUGrid.from_net(net, radio_range=100.0)
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-50.0, 800.0, size=(1000000, 2))
+
+    start = time.perf_counter()
+    nearest, distances = grid.nearest(points)
+    elapsed = time.perf_counter() - start
+
+    print(f"[Spatial Index] {len(grid)} RSUs, {len(points)} positions: nearest RSU in {elapsed:.3f}s, {np.mean(nearest >= 0) * 100:.1f}% in range")
+
+    # Brute force over a sample, to check the grid against every RSU
+    sample = points[:2000]
+    squared = ((sample[:, None, :] - grid.positions[None, :, :]) ** 2).sum(axis=2)
+    expected = np.where(squared.min(axis=1) <= grid.radio_range ** 2, squared.argmin(axis=1), -1)
+
+    print(f"[Spatial Index] Matches brute force: {bool(np.all(expected == nearest[:2000]))}")
+
+    start = time.perf_counter()
+    point_indices, rsu_indices, _distances = grid.within_range(points)
+
+    print(f"[Spatial Index] {len(point_indices)} (vehicle, RSU) pairs in range in {time.perf_counter() - start:.3f}s")
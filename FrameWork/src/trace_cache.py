@@ -0,0 +1,458 @@
+"""
+trace_cache.py
+
+Requires: sumo_stream.py, numpy
+
+Converts SUMO traces into a columnar binary cache, so repeated experiments skip XML parsing entirely
+
+- Parses a tripinfos, route, E1 detector, full-output, FCD or netstate file once with the streaming readers in
+  sumo_stream.py and writes one NumPy .npy file per column
+- Keys each cache entry by the SHA-256 of the source file; a source whose size or modification time changes is
+  rehashed, and an entry whose source content changed is rebuilt and the stale entry removed
+- Loads columns lazily as read-only memory maps, so a run only touches the columns it uses, without copying
+- String columns (vehicle IDs, lanes, types) are dictionary-encoded: an int32 code column plus a table of values
+- cached_departures() reads the departures of a tripinfos or route file from the cache in departure order, which
+  simulation.replay_trace() uses instead of parsing the XML again when numpy is installed
+"""
+
+import array
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from sumo_stream import read_tripinfos, read_routes, read_e1, iter_timesteps, root_tag
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".trace_cache")
+SOURCES_FILE = "sources.json"
+META_FILE = "meta.json"
+SCHEMA_VERSION = 1
+
+# Rows buffered in memory per column before they are appended to disk
+CHUNK_ROWS = 1 << 16
+
+# Trace kinds whose rows are vehicle departures
+DEPARTURE_KINDS = ("tripinfos", "routes")
+
+# Column name and type of each trace kind; "str" columns are dictionary-encoded
+SCHEMAS = {
+    "tripinfos": (
+        ("id", "str"), ("vtype", "str"), ("depart", "f8"), ("arrival", "f8"), ("duration", "f8"),
+        ("route_length", "f8"), ("waiting_time", "f8"), ("time_loss", "f8")
+    ),
+    "routes": (("id", "str"), ("vtype", "str"), ("depart", "f8")),
+    "e1": (
+        ("id", "str"), ("begin", "f8"), ("end", "f8"), ("vehicles", "i4"), ("flow", "f8"),
+        ("occupancy", "f8"), ("speed", "f8")
+    ),
+    "timesteps": (
+        ("time", "f8"), ("id", "str"), ("x", "f8"), ("y", "f8"), ("speed", "f8"), ("angle", "f8"),
+        ("lane", "str"), ("pos", "f8")
+    )
+}
+
+ROOT_KINDS = {
+    "tripinfos": "tripinfos",
+    "routes": "routes",
+    "detector": "e1",
+    "full-export": "timesteps",
+    "fcd-export": "timesteps",
+    "netstate": "timesteps",
+    "sumo-netstate": "timesteps"
+}
+
+
+"""
+Detect which kind of SUMO trace a file holds
+
+Args:
+path (str): Path to the SUMO XML file
+
+Returns:
+str: One of the SCHEMAS keys
+"""
+def trace_kind(path):
+
+    tag = root_tag(path)
+
+    if tag not in ROOT_KINDS:
+        raise ValueError(f"Unsupported SUMO file {path} with root element <{tag}>")
+
+    return ROOT_KINDS[tag]
+
+
+"""Stream the rows of a trace as dicts keyed by column name"""
+def _rows(path, kind):
+
+    if kind == "tripinfos":
+        return read_tripinfos(path)
+
+    if kind == "routes":
+        return read_routes(path)
+
+    if kind == "e1":
+        return read_e1(path)
+
+    return (dict(state, time=time) for time, states in iter_timesteps(path) for state in states)
+
+
+"""
+ColumnWriter Class
+
+Appends the values of one column to a raw file in chunks and turns it into a .npy file at the end
+
+Args:
+directory (str): Entry directory being built
+name (str): Column name
+kind (str): Column type from SCHEMAS ("f8", "i4" or "str")
+"""
+class ColumnWriter:
+
+    def __init__(self, directory, name, kind):
+
+        self.directory = directory
+        self.name = name
+        self.kind = kind
+        self.dtype = np.dtype("i4" if kind == "str" else kind)
+        self.rows = 0
+        self.codes = {} if kind == "str" else None
+        self.raw_path = os.path.join(directory, f"{name}.raw")
+        self.raw_file = open(self.raw_path, "wb")
+        self.buffer = self._new_buffer()
+
+
+    """Empty chunk buffer of the column's item type"""
+    def _new_buffer(self):
+
+        return array.array("d" if self.kind == "f8" else "i")
+
+
+    """Append one value (None becomes NaN, 0 or code -1 depending on the type)"""
+    def append(self, value):
+
+        if self.codes is not None:
+            value = -1 if value is None else self.codes.setdefault(value, len(self.codes))
+
+        elif value is None:
+            value = float("nan") if self.kind == "f8" else 0
+
+        self.buffer.append(value)
+        self.rows += 1
+
+        if len(self.buffer) >= CHUNK_ROWS:
+            self.flush()
+
+
+    """Write buffered values to the raw file"""
+    def flush(self):
+
+        self.buffer.tofile(self.raw_file)
+        self.buffer = self._new_buffer()
+
+
+    """Convert the raw file into <name>.npy (and <name>.values.npy for string columns)"""
+    def close(self):
+
+        self.flush()
+        self.raw_file.close()
+        path = os.path.join(self.directory, f"{self.name}.npy")
+
+        if self.rows:
+            np.save(path, np.memmap(self.raw_path, dtype=self.dtype, mode="r", shape=(self.rows,)))
+
+        else:
+            np.save(path, np.empty(0, dtype=self.dtype))
+
+        os.remove(self.raw_path)
+
+        if self.codes is not None:
+            values = np.array(list(self.codes), dtype=str) if self.codes else np.empty(0, dtype="U1")
+            np.save(os.path.join(self.directory, f"{self.name}.values.npy"), values)
+
+
+"""
+TraceTable Class
+
+Columnar view of one cached trace
+- table[name] returns the column as a read-only memory map (the int32 codes for string columns)
+- table.values(name) returns the decoded string table of a string column, and table.strings(name) the decoded column
+
+Args:
+directory (str): Cache entry directory
+"""
+class TraceTable:
+
+    def __init__(self, directory):
+
+        with open(os.path.join(directory, META_FILE)) as meta_file:
+            meta = json.load(meta_file)
+
+        self.directory = directory
+        self.kind = meta["kind"]
+        self.rows = meta["rows"]
+        self.columns = dict(meta["columns"])
+        self._loaded = {}
+
+
+    def __getitem__(self, name):
+
+        if name not in self.columns:
+            raise KeyError(name)
+
+        if name not in self._loaded:
+            self._loaded[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+        return self._loaded[name]
+
+
+    def __len__(self):
+
+        return self.rows
+
+
+    """String table of a dictionary-encoded column"""
+    def values(self, name):
+
+        key = f"{name}.values"
+
+        if key not in self._loaded:
+            self._loaded[key] = np.load(os.path.join(self.directory, f"{key}.npy"))
+
+        return self._loaded[key]
+
+
+    """Decoded string column (missing values become empty strings); this materializes a copy"""
+    def strings(self, name):
+
+        codes = self[name]
+        values = np.append(self.values(name), "")
+
+        return values[codes]
+
+
+"""
+TraceCache Class
+
+On-disk columnar cache of parsed SUMO traces, keyed by source content
+- A source is only rehashed when its size or modification time changed since it was last seen
+- Entries are built in a temporary directory and moved into place atomically
+
+Usage:
+cache = TraceCache()
+trips = cache.load("tripinfos.xml")
+departures = trips["depart"]
+
+Args:
+cache_dir (str): Directory holding the cache entries
+"""
+class TraceCache:
+
+    def __init__(self, cache_dir=CACHE_DIR):
+
+        self.cache_dir = cache_dir
+
+
+    """Read the source index (path -> size, mtime and content key)"""
+    def _read_sources(self):
+
+        try:
+
+            with open(os.path.join(self.cache_dir, SOURCES_FILE)) as sources_file:
+                return json.load(sources_file)
+
+        except (OSError, ValueError):
+            return {}
+
+
+    """Write the source index atomically"""
+    def _write_sources(self, sources):
+
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+
+        with os.fdopen(handle, "w") as sources_file:
+            json.dump(sources, sources_file)
+
+        os.replace(temp_path, os.path.join(self.cache_dir, SOURCES_FILE))
+
+
+    """
+    Compute the cache key of a source file, reusing the stored hash while the file is unchanged
+
+    Args:
+    path (str): Path to the SUMO XML file
+    sources (dict): Source index, updated in place
+
+    Returns:
+    str: Hex digest of the file content and the cache schema version
+    """
+    def _key(self, path, sources):
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        known = sources.get(path)
+
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["key"]
+
+        digest = hashlib.sha256(f"trace-cache-v{SCHEMA_VERSION}\0".encode())
+
+        with open(path, "rb") as source_file:
+
+            for chunk in iter(lambda: source_file.read(1 << 20), b""):
+                digest.update(chunk)
+
+        key = digest.hexdigest()
+        previous = known["key"] if known else None
+        sources[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "key": key}
+
+        # The source changed: drop its old entry unless another source still uses it
+        if previous and previous != key and not any(entry["key"] == previous for entry in sources.values()):
+            shutil.rmtree(os.path.join(self.cache_dir, previous), ignore_errors=True)
+
+        return key
+
+
+    """
+    Load a trace from the cache, converting it first if needed
+
+    Args:
+    path (str): Path to the SUMO XML file
+
+    Returns:
+    TraceTable: Columnar view of the trace
+    """
+    def load(self, path):
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        sources = self._read_sources()
+        key = self._key(path, sources)
+        self._write_sources(sources)
+        directory = os.path.join(self.cache_dir, key)
+
+        if not os.path.exists(os.path.join(directory, META_FILE)):
+            self._build(path, directory)
+
+        return TraceTable(directory)
+
+
+    """Convert a trace into a new cache entry"""
+    def _build(self, path, directory):
+
+        kind = trace_kind(path)
+        schema = SCHEMAS[kind]
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+
+        try:
+
+            writers = [ColumnWriter(temp_dir, name, column_kind) for name, column_kind in schema]
+
+            for row in _rows(path, kind):
+
+                for writer in writers:
+                    writer.append(row.get(writer.name))
+
+            for writer in writers:
+                writer.close()
+
+            meta = {
+                "kind": kind,
+                "source": os.path.abspath(path),
+                "rows": writers[0].rows if writers else 0,
+                "columns": {name: column_kind for name, column_kind in schema},
+                "schema_version": SCHEMA_VERSION
+            }
+
+            with open(os.path.join(temp_dir, META_FILE), "w") as meta_file:
+                json.dump(meta, meta_file)
+
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(temp_dir, directory)
+
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+
+_default_cache = None
+
+
+"""
+Load a SUMO trace through the default cache
+
+Args:
+path (str): Path to the SUMO XML file
+
+Returns:
+TraceTable: Columnar view of the trace
+"""
+def load_trace(path):
+    global _default_cache
+
+    if _default_cache is None:
+        _default_cache = TraceCache()
+
+    return _default_cache.load(path)
+
+
+"""
+Stream the departures of a tripinfos or route file from the cache, in departure order
+- The departure column is argsorted as a memory-mapped array, so tripinfos (written in order of arrival) need no
+  reorder buffer; vehicle IDs are decoded one row at a time
+
+Args:
+path (str): tripinfos or route file
+
+Yields:
+tuple: (depart (float), vehicle_id (str)), like sumo_stream.vehicle_arrivals()
+
+Raises:
+ValueError: If the file holds no departures (detector or timestep output)
+"""
+def cached_departures(path):
+
+    table = load_trace(path)
+
+    if table.kind not in DEPARTURE_KINDS:
+        raise ValueError(f"{path} holds {table.kind}, not departures")
+
+    departures = table["depart"]
+    codes = table["id"]
+    ids = np.append(table.values("id"), "")
+
+    for row in np.argsort(departures, kind="stable"):
+        yield float(departures[row]), str(ids[codes[row]])
+
+
+if __name__ == "__main__":
+
+    # Simple test for the trace cache: the second load of a tripinfos file skips parsing entirely
+    import time
+
+    sumo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "SUMO")
+    tripinfos = os.path.join(sumo_dir, "Existing Sims with Focus on Realistic Demands", "Bologna_small-0.29.0", "pasubio", "tripinfos.xml")
+
+    for attempt in ("First", "Second"):
+
+        start = time.perf_counter()
+        trips = load_trace(tripinfos)
+        departures = trips["depart"]
+        elapsed = time.perf_counter() - start
+
+        print(f"[Trace Cache] {attempt} load: {len(trips)} trips in {elapsed * 1000:.1f}ms, mean depart {departures.mean():.1f}s")
+
+    print(f"[Trace Cache] First vehicle: {trips.strings('id')[0]}")
+
+    from sumo_stream import vehicle_arrivals
+
+    start = time.perf_counter()
+    departures = list(cached_departures(tripinfos))
+    elapsed = time.perf_counter() - start
+    streamed = list(vehicle_arrivals(tripinfos))
+
+    # Departures at the same time may come in a different order
+    print(f"[Trace Cache] {len(departures)} cached departures in {elapsed * 1000:.1f}ms, in order: "
+          f"{[depart for depart, _vehicle_id in departures] == [depart for depart, _vehicle_id in streamed]}, "
+          f"same as streamed: {sorted(departures) == streamed}")
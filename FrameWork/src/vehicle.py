@@ -7,11 +7,11 @@ Defines the Vehicle class, which is responsible for generating one-time password
 
 - Each Vehicle instance is initialized with a unique ID and secret
 - The vehicle generates an OTP by hashing its secret with the current timestamp
-- The vehicle creates a ZKP for the OTP and timestamp using a ZoKrates interface (currently simulated)
+- The vehicle creates a ZKP for the OTP and timestamp using a ZoKrates interface (simulated unless a circuit is given)
 """
 
 from otp import generate_otp
-from zkp import generate_zkp_proof
+from zkp import generate_zkp_proof, generate_zkp_proof_real
 
 
 """
@@ -31,6 +31,8 @@ zkp_proof = vehicle.create_zkp(otp, timestamp)
 Args:
 vehicle_id (str): Unique identifier for the vehicle
 secret (str): Secret key unique to the vehicle
+circuit_path (str, optional): ZoKrates circuit to prove with; the simulated proof is used when omitted
+clock (optional): Clock the OTP timestamp is read from (defaults to the process-wide clock from clock.py)
 """
 class Vehicle:
 
@@ -40,11 +42,15 @@ class Vehicle:
     Args:
     vehicle_id (str): Unique identifier for the vehicle
     secret (str): Secret key unique to the vehicle
+    circuit_path (str, optional): ZoKrates circuit to prove with
+    clock (optional): Clock the OTP timestamp is read from
     """
-    def __init__(self, vehicle_id, secret):
+    def __init__(self, vehicle_id, secret, circuit_path=None, clock=None):
         
         self.vehicle_id = vehicle_id
         self.secret = secret
+        self.circuit_path = circuit_path
+        self.clock = clock
 
 
     """
@@ -55,7 +61,7 @@ class Vehicle:
     """
     def generate_otp(self):
         
-        return generate_otp(self.secret)
+        return generate_otp(self.secret, self.clock)
 
 
     """
@@ -66,10 +72,13 @@ class Vehicle:
     timestamp (int): The timestamp used for OTP
         
     Returns:
-    str: Simulated ZKP proof
+    str or dict: Simulated ZKP proof, or the parsed ZoKrates proof object (None if proving failed) when a circuit is set
     """
     def create_zkp(self, otp, timestamp):
         
+        if self.circuit_path:
+            return generate_zkp_proof_real(self.circuit_path, otp, timestamp, self.secret)
+        
         return generate_zkp_proof(otp, timestamp)
 
 
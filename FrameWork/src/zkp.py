@@ -1,25 +1,60 @@
 """
 zkp.py
 
-Requires: zokrates_interface.py
+Requires: otp.py, zokrates_cache.py, zokrates_jobs.py, groth16.py
 
 Provides functions for generating zero-knowledge proofs (ZKPs) for authentication workflows
 Supports both simulated (hash-based) and real (ZoKrates CLI) ZKP generation and verification
 
 - Simulates ZKP generation by hashing OTP and timestamp for rapid prototyping and testing
 - Provides wrapper functions to interact with ZoKrates CLI for real ZKP workflows
+- Real proofs are returned as parsed proof.json objects, so the vehicle proves and the RSU verifies separately
+- Real g16 proofs are verified in-process against a preloaded verification key instead of spawning 'zokrates verify';
+  each circuit's artifacts and key are resolved once per process (a circuit edited mid-run needs forget_circuit())
+- Generates a MiMC OTP circuit that proves knowledge of the secret behind an OTP produced in otp.py's "mimc" mode
 - Designed to be used by Vehicle and RSU classes for proof generation and verification
 """
 
 import hashlib
+import os
 
-from zokrates_interface import (
-    run_zokrates_compile,
-    run_zokrates_setup,
-    run_zokrates_compute_witness,
-    run_zokrates_generate_proof,
-    run_zokrates_verify
-)
+from otp import FIELD_MODULUS, MIMC_CONSTANTS, MIMC_ROUNDS, secret_to_field
+from zokrates_cache import get_circuit_artifacts
+from zokrates_jobs import ProvingJob
+from groth16 import Groth16Verifier
+import zokrates_interface
+
+# Directory for circuits generated from Python parameters
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".zokrates_circuits")
+OTP_CIRCUIT_FILE = "otp_mimc.zok"
+
+MIMC_OTP_TEMPLATE = """// Generated by zkp.py from otp.MIMC_CONSTANTS: must stay identical to otp.mimc7()
+const field[{rounds}] MIMC_CONSTANTS = [
+{constants}
+];
+
+def mimc7(field x, field k) -> field {{
+    field mut h = x;
+    for u32 i in 0..{rounds} {{
+        field t = h + k + MIMC_CONSTANTS[i];
+        field t2 = t * t;
+        field t4 = t2 * t2;
+        h = t4 * t2 * t;
+    }}
+    return h + k;
+}}
+
+def main(private field secret, field timestamp, field otp) {{
+    assert(mimc7(timestamp, secret) == otp);
+    return;
+}}
+"""
+
+# In-process verifiers keyed by circuit cache key, so each verification key is loaded and preprocessed once
+_verifiers = {}
+
+# Cached artifacts and verifier per circuit path, so verifying does not re-read and re-hash the circuit every time
+_circuit_verifiers = {}
 
 """
 Simulate ZoKrates proof generation (hash-based)
@@ -36,34 +71,231 @@ def generate_zkp_proof_simulated(otp, timestamp):
     proof = hashlib.sha256(combined).hexdigest()
     return proof
 
+"""
+Map an OTP to a field element usable as a ZoKrates circuit input
+
+Args:
+otp (str or int): Hex digest OTP, or an OTP that is already an integer
+
+Returns:
+int: The OTP reduced into the circuit's scalar field
+"""
+def otp_to_field(otp):
+    
+    if isinstance(otp, int):
+        return otp % FIELD_MODULUS
+    
+    return int(otp, 16) % FIELD_MODULUS
+
+"""
+Write the MiMC OTP circuit (only rewritten when its source changes)
+
+Returns:
+str: Path to the generated .zok file
+"""
+def write_otp_circuit():
+    
+    os.makedirs(CIRCUIT_DIR, exist_ok=True)
+    path = os.path.join(CIRCUIT_DIR, OTP_CIRCUIT_FILE)
+    constants = ",\n".join(f"    {constant}" for constant in MIMC_CONSTANTS)
+    source = MIMC_OTP_TEMPLATE.format(rounds=MIMC_ROUNDS, constants=constants)
+    
+    if not os.path.exists(path) or open(path).read() != source:
+        
+        with open(path, "w") as circuit_file:
+            circuit_file.write(source)
+            
+    return path
+
+"""Check whether a circuit path is the generated MiMC OTP circuit"""
+def is_otp_circuit(circuit_path):
+    
+    return os.path.basename(circuit_path) == OTP_CIRCUIT_FILE
+
+"""
+Build the circuit arguments for a proof
+
+Args:
+circuit_path (str): Circuit the proof is generated with
+otp (str): The one-time password generated by the vehicle
+timestamp (int): The timestamp used in OTP generation
+secret (str, optional): The vehicle's secret, the private input of the MiMC OTP circuit
+
+Returns:
+list of str: Arguments for compute-witness
+"""
+def circuit_args(circuit_path, otp, timestamp, secret=None):
+    
+    if is_otp_circuit(circuit_path):
+        return [str(secret_to_field(secret)), str(timestamp), str(otp_to_field(otp))]
+    
+    return [str(otp_to_field(otp)), str(timestamp)]
+
+"""
+Public inputs a valid proof for the OTP and timestamp must start with
+
+Args:
+circuit_path (str): Circuit the proof was generated with
+otp (str): The expected one-time password
+timestamp (int): The timestamp used in OTP generation
+
+Returns:
+list of int: Expected leading public inputs
+"""
+def expected_public_inputs(circuit_path, otp, timestamp):
+    
+    if is_otp_circuit(circuit_path):
+        return [timestamp, otp_to_field(otp)]
+    
+    return [otp_to_field(otp), timestamp]
+
+"""
+Extract the public inputs of a real ZoKrates proof
+
+Args:
+proof (dict): Parsed proof.json object
+
+Returns:
+list of int: Public inputs (public circuit arguments followed by return values)
+"""
+def proof_public_inputs(proof):
+    
+    return [int(value, 16) for value in proof.get("inputs", [])]
+
 """
 Generate a real ZKP proof using the ZoKrates CLI interface
+The compiled circuit and keys come from the artifact cache, so only the first proof for a circuit pays for compile and setup
 
 Args:
 circuit_path (str): Path to the ZoKrates .zok circuit file (e.g., '../zokrates-files/dummy.zok')
 otp (str): The one-time password generated by the vehicle
 timestamp (int): The timestamp used in OTP generation
+secret (str, optional): The vehicle's secret, required by the MiMC OTP circuit
+
+Returns:
+dict or None: Parsed proof.json (proof points and public inputs), or None if proving failed
+"""
+def generate_zkp_proof_real(circuit_path, otp, timestamp, secret=None):
+    
+    artifacts = get_circuit_artifacts(circuit_path)
+    
+    if artifacts is None:
+        return None
+    
+    args = circuit_args(circuit_path, otp, timestamp, secret)
+    
+    with ProvingJob(artifacts) as job:
+        return job.generate_proof(args)
+
+"""
+Get the in-process verifier for a circuit's cached verification key
+
+Args:
+artifacts (CircuitArtifacts): Cached circuit and keys
+
+Returns:
+Groth16Verifier or None: The preloaded verifier, or None if the key cannot be verified in-process
+"""
+def _get_verifier(artifacts):
+    
+    if artifacts.key not in _verifiers:
+        
+        try:
+            _verifiers[artifacts.key] = Groth16Verifier.from_file(artifacts.verification_key_path)
+            
+        except (OSError, ValueError, KeyError) as e:
+            
+            if zokrates_interface.DEBUG_MODE:
+                print("In-process verifier unavailable, falling back to the ZoKrates CLI:", e)
+                
+            _verifiers[artifacts.key] = None
+            
+    return _verifiers[artifacts.key]
+
+"""
+Resolve a circuit's artifacts and in-process verifier once, reusing them for every later verification
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file
+
+Returns:
+tuple: (CircuitArtifacts or None, Groth16Verifier or None); only circuits with an in-process verifier are
+       remembered, since the CLI fallback needs the cache entry on disk, which the artifact store may evict
+"""
+def _resolve_circuit(circuit_path):
+    
+    path = os.path.abspath(circuit_path)
+    
+    if path in _circuit_verifiers:
+        return _circuit_verifiers[path]
+    
+    artifacts = get_circuit_artifacts(circuit_path)
+    verifier = _get_verifier(artifacts) if artifacts is not None else None
+    
+    if verifier is not None:
+        _circuit_verifiers[path] = (artifacts, verifier)
+        
+    return artifacts, verifier
+
+"""
+Forget the resolved artifacts and verifier of a circuit, e.g. after its source changed
+
+Args:
+circuit_path (str, optional): Path to the circuit (forgets every circuit if not given)
+"""
+def forget_circuit(circuit_path=None):
+    
+    if circuit_path is None:
+        _circuit_verifiers.clear()
+        
+    else:
+        _circuit_verifiers.pop(os.path.abspath(circuit_path), None)
+
+"""
+Verify a real ZKP proof against the circuit's cached verification key
+g16 proofs are checked in-process; other schemes fall back to 'zokrates verify' in a scratch directory
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file the proof was generated for
+proof (dict): Parsed proof.json object produced by generate_zkp_proof_real
 
 Returns:
 bool: True if proof is valid, False otherwise
 """
-def generate_zkp_proof_real(circuit_path, otp, timestamp):
+def verify_zkp_proof_real(circuit_path, proof):
     
-    if not run_zokrates_compile(circuit_path):
-        return False
+    artifacts, verifier = _resolve_circuit(circuit_path)
     
-    if not run_zokrates_setup():
+    if artifacts is None:
         return False
     
-    args = [str(otp), str(timestamp)]
+    if verifier is not None:
+        return verifier.verify(proof)
     
-    if not run_zokrates_compute_witness(args):
-        return False
+    with ProvingJob(artifacts) as job:
+        return job.verify_proof(proof)
+
+"""
+Verify many real ZKP proofs for the same circuit at once
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file the proofs were generated for
+proofs (list of dict): Parsed proof.json objects
+
+Returns:
+list of bool: Verification result for each proof, in input order
+"""
+def verify_zkp_proofs_real_batch(circuit_path, proofs):
     
-    if not run_zokrates_generate_proof():
-        return False
+    artifacts, verifier = _resolve_circuit(circuit_path)
+    
+    if artifacts is None:
+        return [False] * len(proofs)
+    
+    if verifier is not None:
+        return verifier.verify_batch(proofs)
     
-    return run_zokrates_verify()
+    return [verify_zkp_proof_real(circuit_path, proof) for proof in proofs]
 
 # Leftover to allow switching between simulated and real ZKP generation and quickly ensure 
 # A refactored naming convention was able to be applied without being absolute certain in its uniform conformity
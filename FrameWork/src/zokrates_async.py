@@ -0,0 +1,257 @@
+"""
+zokrates_async.py
+
+Requires: zokrates_interface.py, zokrates_jobs.py
+
+Provides an asyncio variant of the ZoKrates CLI interface for event-loop based RSUs and simulation loops
+
+- Runs ZoKrates commands with asyncio.create_subprocess_exec instead of blocking on subprocess.run
+- Limits the number of ZoKrates processes in flight with a semaphore, so thousands of pending
+  authentications can be awaited without a thread or process each
+- Applies a per-call timeout and kills the child process when a call times out or is cancelled
+"""
+
+import asyncio
+
+from zokrates_interface import (
+    zokrates_compile_command,
+    zokrates_setup_command,
+    zokrates_compute_witness_command,
+    zokrates_generate_proof_command,
+    zokrates_verify_command,
+    is_verification_passed
+)
+from zokrates_jobs import ProvingJob
+import zokrates_interface
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+
+
+"""
+AsyncZokratesDriver Class
+
+Runs ZoKrates CLI commands as asyncio subprocesses with bounded concurrency
+- At most max_concurrency ZoKrates processes run at once; further calls wait on the semaphore
+- At most max_concurrency proving jobs hold a scratch directory at once; prove() waits for a slot before creating
+  its directory, so thousands of queued proofs do not each hold a directory of links to the circuit's keys
+- Each call fails (returns False) once its timeout expires, and the child process is killed
+- Cancelling the awaiting task kills the child process and re-raises asyncio.CancelledError
+
+Usage:
+driver = AsyncZokratesDriver(max_concurrency=4)
+is_valid = await driver.prove(artifacts, ["3", "4"])
+
+Args:
+max_concurrency (int): Maximum number of ZoKrates processes running at the same time
+timeout (float): Default timeout in seconds for a single ZoKrates command (None waits forever)
+"""
+class AsyncZokratesDriver:
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Separate from the process semaphore, which each step of a job takes again
+        self._jobs = asyncio.Semaphore(max_concurrency)
+
+
+    """
+    Run one ZoKrates command under the concurrency limit
+
+    Args:
+    command (list of str): Command line to run
+    label (str): Name of the step for debug output
+    cwd (str, optional): Working directory to run in
+    timeout (float, optional): Timeout for this call (defaults to the driver timeout)
+
+    Returns:
+    tuple: (success (bool), stdout (str))
+    """
+    async def _run(self, command, label, cwd=None, timeout=None):
+
+        timeout = self.timeout if timeout is None else timeout
+
+        async with self._semaphore:
+
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd
+                )
+
+            except OSError as e:
+
+                if zokrates_interface.DEBUG_MODE:
+                    print(f"ZoKrates {label} failed:", e)
+
+                return False, ""
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+
+            except asyncio.TimeoutError:
+
+                await self._kill(process)
+
+                if zokrates_interface.DEBUG_MODE:
+                    print(f"ZoKrates {label} timed out after {timeout}s")
+
+                return False, ""
+
+            except asyncio.CancelledError:
+
+                await self._kill(process)
+                raise
+
+        stdout = stdout.decode(errors="replace")
+
+        if process.returncode != 0:
+
+            if zokrates_interface.DEBUG_MODE:
+                print(f"ZoKrates {label} failed:", stderr.decode(errors="replace"))
+
+            return False, stdout
+
+        if zokrates_interface.DEBUG_MODE:
+            print(f"ZoKrates {label} output:", stdout)
+
+        return True, stdout
+
+
+    """Kill a ZoKrates child process and reap it"""
+    async def _kill(self, process):
+
+        if process.returncode is None:
+
+            try:
+                process.kill()
+
+            except ProcessLookupError:
+                pass
+
+            await process.wait()
+
+
+    """Compile a ZoKrates circuit file (see zokrates_interface.run_zokrates_compile)"""
+    async def compile(self, circuit_path, output_path=None, abi_path=None, cwd=None, timeout=None):
+
+        command = zokrates_compile_command(circuit_path, output_path, abi_path)
+        success, _stdout = await self._run(command, "compile", cwd, timeout)
+
+        return success
+
+
+    """Run ZoKrates setup (see zokrates_interface.run_zokrates_setup)"""
+    async def setup(self, program_path=None, proving_key_path=None, verification_key_path=None, backend=None, proving_scheme=None, cwd=None, timeout=None):
+
+        command = zokrates_setup_command(program_path, proving_key_path, verification_key_path, backend, proving_scheme)
+        success, _stdout = await self._run(command, "setup", cwd, timeout)
+
+        return success
+
+
+    """Compute the witness for a ZoKrates circuit (see zokrates_interface.run_zokrates_compute_witness)"""
+    async def compute_witness(self, args, program_path=None, abi_path=None, witness_path=None, cwd=None, timeout=None):
+
+        command = zokrates_compute_witness_command(args, program_path, abi_path, witness_path)
+        success, _stdout = await self._run(command, "compute-witness", cwd, timeout)
+
+        return success
+
+
+    """Generate a ZoKrates proof (see zokrates_interface.run_zokrates_generate_proof)"""
+    async def generate_proof(self, program_path=None, witness_path=None, proving_key_path=None, proof_path=None, backend=None, proving_scheme=None, cwd=None, timeout=None):
+
+        command = zokrates_generate_proof_command(program_path, witness_path, proving_key_path, proof_path, backend, proving_scheme)
+        success, _stdout = await self._run(command, "generate-proof", cwd, timeout)
+
+        return success
+
+
+    """Verify a ZoKrates proof (see zokrates_interface.run_zokrates_verify)"""
+    async def verify(self, verification_key_path=None, proof_path=None, backend=None, cwd=None, timeout=None):
+
+        command = zokrates_verify_command(verification_key_path, proof_path, backend)
+        success, stdout = await self._run(command, "verify", cwd, timeout)
+
+        return success and is_verification_passed(stdout)
+
+
+    """
+    Compute the witness, generate a proof and verify it in an isolated job directory
+
+    Args:
+    artifacts (CircuitArtifacts): Cached circuit and keys to prove with
+    args (list of str): Arguments to pass to the circuit
+    timeout (float, optional): Timeout for each ZoKrates step
+
+    Returns:
+    bool: True if the proof was generated and is valid, False otherwise
+    """
+    async def prove(self, artifacts, args, timeout=None):
+
+        async with self._jobs:
+            return await self._prove_job(artifacts, args, timeout)
+
+
+    """Run the steps of prove() in a fresh job directory, once a job slot is held"""
+    async def _prove_job(self, artifacts, args, timeout):
+
+        with ProvingJob(artifacts) as job:
+
+            if not await self.compute_witness(args, cwd=job.directory, timeout=timeout):
+                return False
+
+            if not await self.generate_proof(
+                backend=artifacts.backend,
+                proving_scheme=artifacts.scheme,
+                cwd=job.directory,
+                timeout=timeout
+            ):
+                return False
+
+            return await self.verify(backend=artifacts.backend, cwd=job.directory, timeout=timeout)
+
+
+    """
+    Prove many witnesses for the same circuit concurrently, bounded by max_concurrency
+
+    Args:
+    artifacts (CircuitArtifacts): Cached circuit and keys to prove with
+    witness_args (list of list of str): Circuit arguments, one list per vehicle
+    timeout (float, optional): Timeout for each ZoKrates step
+
+    Returns:
+    list of bool: Verification result for each witness, in input order
+    """
+    async def prove_many(self, artifacts, witness_args, timeout=None):
+
+        return await asyncio.gather(*(self.prove(artifacts, args, timeout) for args in witness_args))
+
+
+if __name__ == "__main__":
+
+    # Simple test for the async driver: prove several dummy.zok witnesses concurrently
+    import time
+    from zokrates_cache import get_circuit_artifacts
+
+    artifacts = get_circuit_artifacts("dummy.zok")
+
+    if artifacts is None:
+        print("[ZoKrates Async] Compile or setup failed.")
+        exit(1)
+
+    driver = AsyncZokratesDriver(max_concurrency=4)
+    witness_args = [[str(a), str(a + 1)] for a in range(1, 9)]
+
+    start = time.perf_counter()
+    results = asyncio.run(driver.prove_many(artifacts, witness_args))
+    elapsed = time.perf_counter() - start
+
+    print(f"[ZoKrates Async] Results: {results}")
+    print(f"[ZoKrates Async] Proved {len(witness_args)} witnesses in {elapsed:.3f}s")
@@ -0,0 +1,319 @@
+"""
+zokrates_cache.py
+
+Requires: zokrates_interface.py
+
+Provides a content-addressed artifact store for compiled ZoKrates circuits and their setup keys
+Compilation and setup are by far the most expensive ZoKrates steps, so they are run once per circuit and reused
+
+- Keys each circuit by a SHA-256 hash of its .zok source, the proving backend and the proving scheme
+- Keeps the compiled program, ABI, proving key and verification key on disk in one directory per key
+- Checks the integrity of stored artifacts against a manifest before first use and rebuilds corrupted entries
+- Evicts the least recently used entries once the store grows past its configured size
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from zokrates_interface import run_zokrates_compile, run_zokrates_setup
+import zokrates_interface
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".zokrates_cache")
+MAX_ENTRIES = 8
+DEFAULT_BACKEND = "ark"
+DEFAULT_SCHEME = "g16"
+MANIFEST_FILE = "manifest.json"
+
+# Artifact file names inside each cache entry
+PROGRAM_FILE = "out"
+ABI_FILE = "abi.json"
+PROVING_KEY_FILE = "proving.key"
+VERIFICATION_KEY_FILE = "verification.key"
+ARTIFACT_FILES = (PROGRAM_FILE, ABI_FILE, PROVING_KEY_FILE, VERIFICATION_KEY_FILE)
+
+
+"""
+Compute the cache key of a circuit
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file
+backend (str): Proving backend used for setup
+scheme (str): Proving scheme used for setup
+
+Returns:
+str: Hex digest identifying the circuit source, backend and scheme
+"""
+def circuit_key(circuit_path, backend=DEFAULT_BACKEND, scheme=DEFAULT_SCHEME):
+
+    digest = hashlib.sha256()
+
+    with open(circuit_path, "rb") as circuit_file:
+        digest.update(circuit_file.read())
+
+    digest.update(b"\0" + backend.encode() + b"\0" + scheme.encode())
+
+    return digest.hexdigest()
+
+
+"""Compute the SHA-256 hex digest of a file"""
+def _file_digest(path):
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as artifact_file:
+
+        for chunk in iter(lambda: artifact_file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+"""
+CircuitArtifacts Class
+
+Paths to the compiled program and keys of one cached circuit
+
+Args:
+directory (str): Cache entry directory holding the artifacts
+key (str): Cache key of the circuit
+backend (str): Proving backend the keys were generated for
+scheme (str): Proving scheme the keys were generated for
+"""
+class CircuitArtifacts:
+
+    def __init__(self, directory, key, backend, scheme):
+
+        self.directory = directory
+        self.key = key
+        self.backend = backend
+        self.scheme = scheme
+        self.program_path = os.path.join(directory, PROGRAM_FILE)
+        self.abi_path = os.path.join(directory, ABI_FILE)
+        self.proving_key_path = os.path.join(directory, PROVING_KEY_FILE)
+        self.verification_key_path = os.path.join(directory, VERIFICATION_KEY_FILE)
+
+
+"""
+ArtifactStore Class
+
+On-disk, content-addressed store of compiled circuits and setup keys with LRU eviction
+- A cache hit skips compile and setup entirely, leaving only compute-witness, generate-proof and verify on the hot path
+- Entries are built in a temporary directory and moved into place atomically, so a crash never leaves a half-built entry
+- Each entry carries a manifest of artifact digests; an entry whose files no longer match is discarded and rebuilt
+
+Usage:
+store = ArtifactStore()
+artifacts = store.get("dummy.zok")
+
+Args:
+cache_dir (str): Directory holding the cache entries
+max_entries (int): Number of circuits kept before the least recently used ones are evicted
+"""
+class ArtifactStore:
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+        # Entries already integrity-checked by this process
+        self._verified = set()
+
+
+    """
+    Get the artifacts for a circuit, compiling and setting it up on a cache miss
+
+    Args:
+    circuit_path (str): Path to the ZoKrates .zok circuit file
+    backend (str): Proving backend
+    scheme (str): Proving scheme
+
+    Returns:
+    CircuitArtifacts or None: The cached artifacts, or None if compile or setup failed
+    """
+    def get(self, circuit_path, backend=DEFAULT_BACKEND, scheme=DEFAULT_SCHEME):
+
+        key = circuit_key(circuit_path, backend, scheme)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        if os.path.isdir(entry_dir) and (key in self._verified or self._is_intact(entry_dir)):
+
+            if zokrates_interface.DEBUG_MODE and key not in self._verified:
+                print(f"ZoKrates cache hit for {circuit_path} ({key[:12]})")
+
+            self._verified.add(key)
+            self._touch(entry_dir)
+
+            return CircuitArtifacts(entry_dir, key, backend, scheme)
+
+        if os.path.isdir(entry_dir):
+
+            if zokrates_interface.DEBUG_MODE:
+                print(f"ZoKrates cache entry {key[:12]} failed its integrity check, rebuilding")
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            self._verified.discard(key)
+
+        if not self._build(circuit_path, entry_dir, backend, scheme):
+            return None
+
+        self._verified.add(key)
+        self._evict()
+
+        return CircuitArtifacts(entry_dir, key, backend, scheme)
+
+
+    """Remove every cached circuit"""
+    def clear(self):
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._verified.clear()
+
+
+    """Compile and set up a circuit into a fresh cache entry"""
+    def _build(self, circuit_path, entry_dir, backend, scheme):
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix=".build-", dir=self.cache_dir)
+
+        try:
+
+            if not run_zokrates_compile(
+                circuit_path,
+                output_path=os.path.join(build_dir, PROGRAM_FILE),
+                abi_path=os.path.join(build_dir, ABI_FILE)
+            ):
+                return False
+
+            if not run_zokrates_setup(
+                program_path=os.path.join(build_dir, PROGRAM_FILE),
+                proving_key_path=os.path.join(build_dir, PROVING_KEY_FILE),
+                verification_key_path=os.path.join(build_dir, VERIFICATION_KEY_FILE),
+                backend=backend,
+                proving_scheme=scheme
+            ):
+                return False
+
+            manifest = {
+                "circuit": os.path.abspath(circuit_path),
+                "backend": backend,
+                "scheme": scheme,
+                "files": {name: _file_digest(os.path.join(build_dir, name)) for name in ARTIFACT_FILES}
+            }
+
+            with open(os.path.join(build_dir, MANIFEST_FILE), "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+
+            # Artifacts are shared by every proof from here on, so they are made read-only
+            for name in ARTIFACT_FILES:
+                os.chmod(os.path.join(build_dir, name), 0o444)
+
+            try:
+                os.replace(build_dir, entry_dir)
+
+            except OSError:
+
+                # Another process finished building the same circuit first
+                if not os.path.isdir(entry_dir):
+                    raise
+
+            return True
+
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+
+    """Check the artifacts of an entry against the digests recorded in its manifest"""
+    def _is_intact(self, entry_dir):
+
+        try:
+
+            with open(os.path.join(entry_dir, MANIFEST_FILE)) as manifest_file:
+                manifest = json.load(manifest_file)
+
+            return all(
+                _file_digest(os.path.join(entry_dir, name)) == manifest["files"].get(name)
+                for name in ARTIFACT_FILES
+            )
+
+        except (OSError, ValueError, KeyError):
+            return False
+
+
+    """Mark an entry as most recently used"""
+    def _touch(self, entry_dir):
+
+        now = time.time()
+
+        try:
+            os.utime(os.path.join(entry_dir, MANIFEST_FILE), (now, now))
+
+        except OSError:
+            pass
+
+
+    """Evict least recently used entries beyond max_entries"""
+    def _evict(self):
+
+        entries = []
+
+        for name in os.listdir(self.cache_dir):
+
+            manifest_path = os.path.join(self.cache_dir, name, MANIFEST_FILE)
+
+            if os.path.exists(manifest_path):
+                entries.append((os.path.getmtime(manifest_path), name))
+
+        entries.sort(reverse=True)
+
+        for _last_used, name in entries[self.max_entries:]:
+
+            if zokrates_interface.DEBUG_MODE:
+                print(f"Evicting ZoKrates cache entry {name[:12]}")
+
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            self._verified.discard(name)
+
+
+# Store shared by the ZKP and test modules
+_default_store = ArtifactStore()
+
+"""
+Get the cached artifacts for a circuit from the shared store
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file
+backend (str): Proving backend
+scheme (str): Proving scheme
+
+Returns:
+CircuitArtifacts or None: The cached artifacts, or None if compile or setup failed
+"""
+def get_circuit_artifacts(circuit_path, backend=DEFAULT_BACKEND, scheme=DEFAULT_SCHEME):
+
+    return _default_store.get(circuit_path, backend, scheme)
+
+
+if __name__ == "__main__":
+
+    # Simple test for the artifact store: the second lookup should not recompile
+    zokrates_interface.set_debug_mode(True)
+
+    start = time.perf_counter()
+    artifacts = get_circuit_artifacts("dummy.zok")
+    first = time.perf_counter() - start
+
+    if artifacts is None:
+        print("[ZoKrates Cache] Compile or setup failed.")
+        exit(1)
+
+    start = time.perf_counter()
+    get_circuit_artifacts("dummy.zok")
+    second = time.perf_counter() - start
+
+    print(f"[ZoKrates Cache] Entry: {artifacts.directory}")
+    print(f"[ZoKrates Cache] First lookup: {first:.3f}s, cached lookup: {second:.6f}s")
@@ -13,6 +13,73 @@ import os
 
 DEBUG_MODE = False
 
+"""Append a CLI option to a ZoKrates command if a value was provided"""
+def _with_option(command, flag, value):
+    
+    if value is not None:
+        command.extend([flag, str(value)])
+        
+    return command
+
+"""Build the ZoKrates compile command (see run_zokrates_compile for arguments)"""
+def zokrates_compile_command(circuit_path, output_path=None, abi_path=None):
+    
+    command = ["zokrates", "compile", "-i", circuit_path]
+    _with_option(command, "-o", output_path)
+    _with_option(command, "-s", abi_path)
+    
+    return command
+
+"""Build the ZoKrates setup command (see run_zokrates_setup for arguments)"""
+def zokrates_setup_command(program_path=None, proving_key_path=None, verification_key_path=None, backend=None, proving_scheme=None):
+    
+    command = ["zokrates", "setup"]
+    _with_option(command, "-i", program_path)
+    _with_option(command, "-p", proving_key_path)
+    _with_option(command, "-v", verification_key_path)
+    _with_option(command, "-b", backend)
+    _with_option(command, "-s", proving_scheme)
+    
+    return command
+
+"""Build the ZoKrates compute-witness command (see run_zokrates_compute_witness for arguments)"""
+def zokrates_compute_witness_command(args, program_path=None, abi_path=None, witness_path=None):
+    
+    command = ["zokrates", "compute-witness"]
+    _with_option(command, "-i", program_path)
+    _with_option(command, "-s", abi_path)
+    _with_option(command, "-o", witness_path)
+    
+    return command + ["-a"] + list(args)
+
+"""Build the ZoKrates generate-proof command (see run_zokrates_generate_proof for arguments)"""
+def zokrates_generate_proof_command(program_path=None, witness_path=None, proving_key_path=None, proof_path=None, backend=None, proving_scheme=None):
+    
+    command = ["zokrates", "generate-proof"]
+    _with_option(command, "-i", program_path)
+    _with_option(command, "-w", witness_path)
+    _with_option(command, "-p", proving_key_path)
+    _with_option(command, "-j", proof_path)
+    _with_option(command, "-b", backend)
+    _with_option(command, "-s", proving_scheme)
+    
+    return command
+
+"""Build the ZoKrates verify command (see run_zokrates_verify for arguments)"""
+def zokrates_verify_command(verification_key_path=None, proof_path=None, backend=None):
+    
+    command = ["zokrates", "verify"]
+    _with_option(command, "-v", verification_key_path)
+    _with_option(command, "-j", proof_path)
+    _with_option(command, "-b", backend)
+    
+    return command
+
+"""Check the output of 'zokrates verify' for a successful verification"""
+def is_verification_passed(stdout):
+    
+    return ("Proof is valid" in stdout) or ("PASSED" in stdout)
+
 """Enable or disable debug mode for detailed output"""
 def set_debug_mode(enabled):
     global DEBUG_MODE
@@ -46,18 +113,23 @@ Compile a ZoKrates circuit file
 
 Args:
 circuit_path (str): Path to the ZoKrates .zok circuit file
+output_path (str, optional): Where to write the compiled program (ZoKrates default: 'out')
+abi_path (str, optional): Where to write the ABI description (ZoKrates default: 'abi.json')
+cwd (str, optional): Working directory to run in; relative paths and default file names resolve against it
     
 Returns:
 bool: True if compilation succeeds, False otherwise
 """
-def run_zokrates_compile(circuit_path):
+def run_zokrates_compile(circuit_path, output_path=None, abi_path=None, cwd=None):
+    
+    command = zokrates_compile_command(circuit_path, output_path, abi_path)
     
     try:
         
         # Run the ZoKrates compile command with the given circuit file
         result = subprocess.run(
-            ["zokrates", "compile", "-i", circuit_path],
-            capture_output=True, text=True, check=True
+            command,
+            capture_output=True, text=True, check=True, cwd=cwd
         )
         
         if DEBUG_MODE:
@@ -76,17 +148,27 @@ def run_zokrates_compile(circuit_path):
 """
 Run ZoKrates setup to generate proving and verification keys
 
+Args:
+program_path (str, optional): Compiled program to set up (ZoKrates default: 'out')
+proving_key_path (str, optional): Where to write the proving key
+verification_key_path (str, optional): Where to write the verification key
+backend (str, optional): Proving backend, e.g. 'ark'
+proving_scheme (str, optional): Proving scheme, e.g. 'g16'
+cwd (str, optional): Working directory to run in; relative paths and default file names resolve against it
+
 Returns:
 bool: True if setup succeeds, False otherwise
 """
-def run_zokrates_setup():
+def run_zokrates_setup(program_path=None, proving_key_path=None, verification_key_path=None, backend=None, proving_scheme=None, cwd=None):
+    
+    command = zokrates_setup_command(program_path, proving_key_path, verification_key_path, backend, proving_scheme)
     
     try:
         
         # Run the ZoKrates setup command
         result = subprocess.run(
-            ["zokrates", "setup"],
-            capture_output=True, text=True, check=True
+            command,
+            capture_output=True, text=True, check=True, cwd=cwd
         )
         
         if DEBUG_MODE:
@@ -107,18 +189,24 @@ Compute the witness for a ZoKrates circuit
 
 Args:
 args (list of str): Arguments to pass to the circuit (e.g., private/public inputs)
+program_path (str, optional): Compiled program to execute (ZoKrates default: 'out')
+abi_path (str, optional): ABI description of the program (ZoKrates default: 'abi.json')
+witness_path (str, optional): Where to write the witness (ZoKrates default: 'witness')
+cwd (str, optional): Working directory to run in; relative paths and default file names resolve against it
     
 Returns:
 bool: True if witness computation succeeds, False otherwise
 """
-def run_zokrates_compute_witness(args):
+def run_zokrates_compute_witness(args, program_path=None, abi_path=None, witness_path=None, cwd=None):
+    
+    command = zokrates_compute_witness_command(args, program_path, abi_path, witness_path)
     
     try:
         
         # Run the ZoKrates compute-witness command
         result = subprocess.run(
-            ["zokrates", "compute-witness", "-a"] + args,
-            capture_output=True, text=True, check=True
+            command,
+            capture_output=True, text=True, check=True, cwd=cwd
         )
 
         if DEBUG_MODE:
@@ -138,17 +226,28 @@ def run_zokrates_compute_witness(args):
 """
 Generate a ZoKrates proof using the computed witness and setup keys
 
+Args:
+program_path (str, optional): Compiled program (ZoKrates default: 'out')
+witness_path (str, optional): Computed witness (ZoKrates default: 'witness')
+proving_key_path (str, optional): Proving key (ZoKrates default: 'proving.key')
+proof_path (str, optional): Where to write the proof (ZoKrates default: 'proof.json')
+backend (str, optional): Proving backend, e.g. 'ark'
+proving_scheme (str, optional): Proving scheme, e.g. 'g16'
+cwd (str, optional): Working directory to run in; relative paths and default file names resolve against it
+
 Returns:
 bool: True if proof generation succeeds, False otherwise
 """
-def run_zokrates_generate_proof():
+def run_zokrates_generate_proof(program_path=None, witness_path=None, proving_key_path=None, proof_path=None, backend=None, proving_scheme=None, cwd=None):
+    
+    command = zokrates_generate_proof_command(program_path, witness_path, proving_key_path, proof_path, backend, proving_scheme)
     
     try:
         
         # Run the ZoKrates generate-proof command
         result = subprocess.run(
-            ["zokrates", "generate-proof"],
-            capture_output=True, text=True, check=True
+            command,
+            capture_output=True, text=True, check=True, cwd=cwd
         )
         
         if DEBUG_MODE:
@@ -167,23 +266,31 @@ def run_zokrates_generate_proof():
 """
 Verify a ZoKrates proof using the verification key
 
+Args:
+verification_key_path (str, optional): Verification key (ZoKrates default: 'verification.key')
+proof_path (str, optional): Proof to verify (ZoKrates default: 'proof.json')
+backend (str, optional): Verification backend, e.g. 'ark'
+cwd (str, optional): Working directory to run in; relative paths and default file names resolve against it
+
 Returns:
 bool: True if the proof is valid, False otherwise
 """
-def run_zokrates_verify():
+def run_zokrates_verify(verification_key_path=None, proof_path=None, backend=None, cwd=None):
+    
+    command = zokrates_verify_command(verification_key_path, proof_path, backend)
     
     try:
         
         # Run the ZoKrates verify command
         result = subprocess.run(
-            ["zokrates", "verify"],
-            capture_output=True, text=True, check=True
+            command,
+            capture_output=True, text=True, check=True, cwd=cwd
         )
         
         if DEBUG_MODE:
             print("ZoKrates verify output:", result.stdout)
             
-        return ("Proof is valid" in result.stdout) or ("PASSED" in result.stdout)
+        return is_verification_passed(result.stdout)
     
     except Exception as e:
         
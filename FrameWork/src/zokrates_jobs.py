@@ -0,0 +1,221 @@
+"""
+zokrates_jobs.py
+
+Requires: zokrates_interface.py, zokrates_cache.py
+
+Runs ZoKrates proving jobs in isolated scratch directories so many proofs can run at the same time
+
+- Gives every job its own temporary directory, so per-proof files (witness, proof.json, out.wtns...) never clash
+- Links the shared compiled circuit and keys from the artifact cache into each job directory instead of copying them
+- Proves the witnesses of many vehicles concurrently with a process pool spread across all cores
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from zokrates_interface import (
+    run_zokrates_compute_witness,
+    run_zokrates_generate_proof,
+    run_zokrates_verify
+)
+from zokrates_cache import (
+    get_circuit_artifacts,
+    PROGRAM_FILE,
+    ABI_FILE,
+    PROVING_KEY_FILE,
+    VERIFICATION_KEY_FILE
+)
+import zokrates_interface
+
+# Parent directory for job scratch directories (None uses the system temp directory)
+JOBS_DIR = None
+PROOF_FILE = "proof.json"
+
+
+"""
+ProvingJob Class
+
+A single proving job running in its own scratch directory
+- The cached artifacts are symlinked into the directory under ZoKrates' default file names,
+  so every CLI step runs with plain defaults and only writes job-local files
+- Cache artifacts are read-only, so a job can never modify the shared circuit or keys
+- The directory and everything the job wrote are removed when the job is closed
+
+Usage:
+with ProvingJob(artifacts) as job:
+    is_valid = job.prove(["3", "4"])
+
+Args:
+artifacts (CircuitArtifacts): Cached circuit and keys to prove with
+"""
+class ProvingJob:
+
+    def __init__(self, artifacts):
+
+        self.artifacts = artifacts
+        self.directory = tempfile.mkdtemp(prefix="zkjob-", dir=JOBS_DIR)
+
+        links = {
+            PROGRAM_FILE: artifacts.program_path,
+            ABI_FILE: artifacts.abi_path,
+            PROVING_KEY_FILE: artifacts.proving_key_path,
+            VERIFICATION_KEY_FILE: artifacts.verification_key_path
+        }
+
+        for name, source in links.items():
+
+            target = os.path.join(self.directory, name)
+
+            try:
+                os.symlink(os.path.abspath(source), target)
+
+            except OSError:
+
+                # Symlinks need extra privileges on Windows
+                shutil.copyfile(source, target)
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+    """Remove the job's scratch directory"""
+    def close(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+        if zokrates_interface.DEBUG_MODE:
+            print(f"Removed job directory {self.directory}")
+
+
+    """
+    Compute the witness and generate a proof inside the job directory
+
+    Args:
+    args (list of str): Arguments to pass to the circuit
+
+    Returns:
+    dict or None: The parsed proof.json (proof points and public inputs), or None if proving failed
+    """
+    def generate_proof(self, args):
+
+        if not run_zokrates_compute_witness(args, cwd=self.directory):
+            return None
+
+        if not run_zokrates_generate_proof(
+            backend=self.artifacts.backend,
+            proving_scheme=self.artifacts.scheme,
+            cwd=self.directory
+        ):
+            return None
+
+        try:
+
+            with open(os.path.join(self.directory, PROOF_FILE)) as proof_file:
+                return json.load(proof_file)
+
+        except (OSError, ValueError) as e:
+
+            if zokrates_interface.DEBUG_MODE:
+                print("Reading ZoKrates proof failed:", e)
+
+            return None
+
+
+    """
+    Verify a proof against the job's verification key
+
+    Args:
+    proof (dict): Parsed proof.json, e.g. as returned by generate_proof
+
+    Returns:
+    bool: True if the proof is valid, False otherwise
+    """
+    def verify_proof(self, proof):
+
+        with open(os.path.join(self.directory, PROOF_FILE), "w") as proof_file:
+            json.dump(proof, proof_file)
+
+        return run_zokrates_verify(backend=self.artifacts.backend, cwd=self.directory)
+
+
+    """
+    Compute the witness, generate a proof and verify it inside the job directory
+
+    Args:
+    args (list of str): Arguments to pass to the circuit
+
+    Returns:
+    bool: True if the proof was generated and is valid, False otherwise
+    """
+    def prove(self, args):
+
+        if self.generate_proof(args) is None:
+            return False
+
+        return run_zokrates_verify(backend=self.artifacts.backend, cwd=self.directory)
+
+
+"""Prove one witness in a fresh job directory (runs inside a pool worker)"""
+def _prove_in_job(artifacts, args, debug_mode):
+
+    zokrates_interface.set_debug_mode(debug_mode)
+
+    with ProvingJob(artifacts) as job:
+        return job.prove(args)
+
+
+"""
+Prove many witnesses for the same circuit concurrently
+
+Args:
+circuit_path (str): Path to the ZoKrates .zok circuit file
+witness_args (list of list of str): Circuit arguments, one list per vehicle
+max_workers (int, optional): Number of worker processes (defaults to the number of cores)
+
+Returns:
+list of bool: Verification result for each witness, in input order
+"""
+def prove_witnesses(circuit_path, witness_args, max_workers=None):
+
+    # Compile and set up once in the parent so workers only ever read the shared artifacts
+    artifacts = get_circuit_artifacts(circuit_path)
+
+    if artifacts is None:
+        return [False] * len(witness_args)
+
+    if len(witness_args) <= 1 or max_workers == 1:
+        return [_prove_in_job(artifacts, args, zokrates_interface.DEBUG_MODE) for args in witness_args]
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+
+        return list(pool.map(
+            _prove_in_job,
+            [artifacts] * len(witness_args),
+            witness_args,
+            [zokrates_interface.DEBUG_MODE] * len(witness_args)
+        ))
+
+
+if __name__ == "__main__":
+
+    # Simple test for parallel proving: four independent dummy.zok proofs
+    import time
+
+    witness_args = [[str(a), str(a + 1)] for a in range(1, 5)]
+
+    start = time.perf_counter()
+    results = prove_witnesses("dummy.zok", witness_args)
+    elapsed = time.perf_counter() - start
+
+    print(f"[ZoKrates Jobs] Results: {results}")
+    print(f"[ZoKrates Jobs] Proved {len(witness_args)} witnesses in {elapsed:.3f}s")